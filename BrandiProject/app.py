@@ -1,14 +1,19 @@
+import click
 import config
 
 from flask import Flask, jsonify
-from sqlalchemy import create_engine
 from flask_cors import CORS
 from flask_request_validator.exceptions import InvalidRequest
-from model import SellerDao, ProductDao, OrderDao
-from service import SellerService, ProductService, OrderService
-from view import seller_endpoints, product_endpoints, order_endpoints
+from model import SellerDao, ProductDao, OrderDao, IdempotencyDao, WorkerLeaseDao
+from model.dialect import create_database_engine
+from service import SellerService, ProductService, OrderService, PricingEngine, IdempotencyService, QueryFanOut
+from view import seller_endpoints, product_endpoints, order_endpoints, metrics_endpoints
+from worker import StatusNotifier, DiscountScheduler, IdempotencySweeper
 from sqlalchemy.orm import sessionmaker
 from exceptions import InvalidUsage
+from metrics import Metrics
+from slow_query import SlowQueryLog
+from result_cache import ResultCache
 
 
 class Services:
@@ -51,24 +56,98 @@ def create_app(test_config=None):
     else:
         app.config.update(test_config)
 
-    database = create_engine(app.config['DB_URL'], encoding='utf-8', max_overflow=0)
+    database = create_database_engine(app.config['DB_URL'])
     Session = sessionmaker(bind=database, autocommit=False)
 
+    # 비어 있는 데이터베이스 ( SQLite 메모리 데이터베이스 등 ) 에 migrations/ 의 스키마 만들기
+    if app.config.get('DB_BOOTSTRAP_SCHEMA', False):
+        from tools.migrate import upgrade
+        upgrade(database, log=app.logger.info)
+
     # Persistence Layer
     seller_dao = SellerDao()
     product_dao = ProductDao()
     order_dao = OrderDao()
+    idempotency_dao = IdempotencyDao()
+    worker_lease_dao = WorkerLeaseDao()
+
+    # 관리자 리스트 결과 캐시, 커밋된 트랜잭션이 바꾼 테이블을 읽은 결과만 무효화
+    result_cache = ResultCache.from_config(app.config)
+    result_cache.init_app(app, database, Session)
+
+    # 상세 페이지, 홈 화면의 서로 관계없는 조회를 별도 커넥션 풀에서 동시에 실행 ( SQLite 는 차례로 실행 )
+    fan_out = QueryFanOut.from_config(app.config)
+    app.extensions['query_fan_out'] = fan_out
 
     # Business Layer
     services = Services
-    services.seller_service = SellerService(seller_dao, app.config)
-    services.product_service = ProductService(product_dao)
-    services.order_service = OrderService(order_dao, seller_dao)
+    services.seller_service = SellerService(seller_dao, app.config, result_cache, fan_out)
+    pricing_engine = PricingEngine()
+    services.product_service = ProductService(product_dao, pricing_engine, result_cache, fan_out)
+    services.order_service = OrderService(order_dao, seller_dao, result_cache)
+    services.idempotency_service = IdempotencyService(idempotency_dao, app.config)
 
     seller_endpoints(app, services, get_session)
     product_endpoints(app, services, get_session)
     order_endpoints(app, services, get_session)
 
+    # 라우트별 요청 처리 시간, DAO 메소드별 sql 실행 시간 ( /metrics ), 느린 sql 기록 ( /internal/slow-queries )
+    if app.config.get('METRICS_ENABLED', True):
+        metrics = Metrics(SlowQueryLog.from_config(app.config), app.config.get('SQL_COMMENT_TAGS', True))
+        metrics.init_app(app, database)
+        metrics.init_daos(seller_dao, product_dao, order_dao, idempotency_dao, worker_lease_dao)
+        if fan_out.engine is not None:
+            metrics.init_engine(fan_out.engine)
+        metrics_endpoints(app, metrics)
+
+    @app.cli.command('refresh-discount-prices')
+    def refresh_discount_prices():
+        """ 모든 상품의 할인가 ( products.discount_price ) 다시 계산하기 """
+        session = get_session()
+        try:
+            updated_count = services.product_service.refresh_discount_prices(session)
+            session.commit()
+            click.echo('{} products updated'.format(updated_count))
+
+        except Exception:
+            session.rollback()
+            raise
+
+        finally:
+            session.close()
+
+    @app.cli.command('sync-discounts')
+    @click.option('--dry-run', is_flag=True, help='수정하지 않고 대상 상품만 출력')
+    def sync_discounts(dry_run):
+        """ 할인 기간이 시작되거나 끝난 상품의 할인 여부, 할인가 수정하기
+
+        실행 중인 앱 프로세스의 scheduler 가 실행 권한 ( worker_leases ) 을 가지고 있으면 건너뜀 ( stats 의 skipped )
+        """
+        while True:
+            count = discount_scheduler.run_once(dry_run=dry_run)
+            if count < discount_scheduler.batch_size:
+                break
+
+        click.echo(discount_scheduler.stats)
+
+    # Background Workers
+    status_notifier = StatusNotifier(seller_dao, Session, app.config)
+    discount_scheduler = DiscountScheduler(services.product_service, worker_lease_dao, Session, app.config)
+    idempotency_sweeper = IdempotencySweeper(services.idempotency_service, Session, app.config)
+    app.extensions['status_notifier'] = status_notifier
+    app.extensions['discount_scheduler'] = discount_scheduler
+    app.extensions['idempotency_sweeper'] = idempotency_sweeper
+
+    # 슬랙 토큰이 설정된 앱에서만 기본으로 실행 ( 개발, 테스트 앱은 알림을 outbox 에만 쌓고 polling 쓰레드를 만들지 않음 )
+    if app.config.get('STATUS_NOTIFIER_ENABLED', bool(app.config.get('SLACK_API_TOKEN'))):
+        status_notifier.start()
+
+    if app.config.get('DISCOUNT_SCHEDULER_ENABLED', True):
+        discount_scheduler.start()
+
+    if app.config.get('IDEMPOTENCY_SWEEPER_ENABLED', True):
+        idempotency_sweeper.start()
+
     return app
 
 
@@ -0,0 +1,553 @@
+"""
+seller_endpoints, product_endpoints, order_endpoints 가 등록한 모든 API 의 처리량과 p50 / p95 / p99 응답 시간 측정
+
+create_app(test_config=...) 로 앱을 만들고 test client 로 요청하기 때문에 서버를 따로 띄우지 않음
+--seed 를 주면 먼저 tools.datagen 으로 셀러 10k, 상품 1M, 주문 5M 규모의 데이터를 넣음 ( --scale 로 줄일 수 있음 )
+데이터를 바꾸는 API 도 실행하기 때문에 벤치마크용 데이터베이스에서만 실행
+--migrate 를 주면 빈 데이터베이스에 migrations/ 의 스키마를 먼저 만들기 때문에 SQLite 파일로도 실행할 수 있음
+( 데이터를 여러 프로세스가 넣어서 메모리 데이터베이스는 사용할 수 없음 )
+
+    python -m benchmarks.endpoint_suite --db-url mysql+pymysql://... --seed --scale 0.01 --output before.json
+    python -m benchmarks.endpoint_suite --db-url mysql+pymysql://... --baseline before.json --output after.json
+    python -m benchmarks.endpoint_suite --db-url sqlite:////tmp/bench.db --migrate --seed --scale 0.001
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import jwt
+from sqlalchemy import text
+
+from app import create_app
+from model.dialect import create_database_engine
+from tools import datagen
+
+# 셀러, 상품, 주문 수 ( --scale 1 기준 )
+VOLUMES = {'sellers': 10000, 'products': 1000000, 'orders': 5000000}
+
+# 벤치마크로 넣은 셀러의 비밀번호
+PASSWORD = 'Bench!2345'
+
+# 측정할 API 를 등록하는 view 모듈
+VIEW_MODULES = ('view.seller_view', 'view.product_view', 'view.order_view')
+
+# 배송처리 API 요청 1번에 보내는 주문 수
+SHIPMENT_ORDER_COUNT = 10
+
+# 기본 최대 에러 비율, 넘는 API 는 결과에 failed 로 표시하고 exit code 1
+MAX_ERROR_RATE = 0.01
+
+
+def seed_database(db_url, scale, seed, workers):
+    """ tools.datagen 으로 VOLUMES x scale 만큼의 셀러, 상품, 주문 데이터 넣기 """
+    volumes = {key: max(1, int(value * scale)) for key, value in VOLUMES.items()}
+    datagen.generate(db_url, volumes['sellers'], volumes['products'], volumes['orders'], workers=workers,
+                     seed=seed, account_prefix='bench', password=PASSWORD)
+
+    return volumes
+
+
+class OrderPoolExhausted(Exception):
+    pass
+
+
+class Context:
+    """
+    요청을 만들 때 쓰는 셀러, 상품, 주문 정보
+
+    order_count 는 배송처리 API 가 한 번씩만 사용할 상품 준비 상태의 주문 수 ( --requests, --warmup 으로 계산 )
+    """
+    def __init__(self, app, engine, order_count):
+        with engine.connect() as connection:
+            # 벤치마크로 넣은 셀러 중 마스터와 상품이 가장 많은 셀러
+            self.master_id = connection.execute(text("""
+                SELECT MIN(id) FROM sellers WHERE is_master = 1 AND account LIKE 'bench%'
+            """)).scalar()
+            self.seller_id, self.account = connection.execute(text("""
+                SELECT a.id, a.account
+                FROM sellers a
+                JOIN products b
+                ON a.id = b.seller_id
+                WHERE a.account LIKE 'bench%' AND a.is_master = 0
+                GROUP BY a.id, a.account
+                ORDER BY COUNT(*) DESC
+                LIMIT 1
+            """)).fetchone()
+            self.seller_id_list = [row[0] for row in connection.execute(text("""
+                SELECT id FROM sellers
+                WHERE account LIKE 'bench%' AND is_master = 0 AND seller_status_id = 2 AND id != :seller_id
+                ORDER BY id LIMIT 1000
+            """), {'seller_id': self.seller_id})]
+            self.lines = [dict(row) for row in connection.execute(text("""
+                SELECT b.product_id, b.color_id, b.size_id, a.discount_price
+                FROM options b
+                JOIN products a
+                ON a.id = b.product_id
+                WHERE a.seller_id = :seller_id AND b.is_inventory_manage = 0 AND a.minimum_sell_count <= 1
+                AND a.maximum_sell_count >= 3
+                ORDER BY b.id LIMIT 1000
+            """), {'seller_id': self.seller_id})]
+            self.order_id_list = [row[0] for row in connection.execute(text("""
+                SELECT DISTINCT order_id FROM order_details
+                WHERE seller_id = :seller_id AND order_status_id = 1
+                ORDER BY order_id DESC LIMIT :order_count
+            """), {'seller_id': self.seller_id, 'order_count': order_count})]
+            self.category_id = connection.execute(text('SELECT MIN(categories_id) FROM sub_categories')).scalar()
+            self.sub_category_id = connection.execute(text('SELECT MIN(id) FROM sub_categories')).scalar()
+
+        if not self.lines or not self.order_id_list:
+            raise SystemExit('no benchmark data, run with --seed first')
+
+        self.product_id_list = sorted({line['product_id'] for line in self.lines})
+        self.token = self.access_token(app, self.seller_id)
+        self.master_token = self.access_token(app, self.master_id)
+        self.signup_count = itertools.count()
+        self.order_pool = list(self.order_id_list)
+        self.order_pool_lock = threading.Lock()
+
+        # 옵션을 지웠다가 다시 넣는 상품 수정 API 는 주문이 없는 상품에만 실행
+        self.update_product_id_list = []
+
+    @staticmethod
+    def access_token(app, seller_id):
+        token = jwt.encode({'seller_id': seller_id, 'exp': datetime.utcnow() + timedelta(hours=24)},
+                           app.config['JWT_SECRET_KEY'], app.config['ALGORITHM'])
+        return token.decode('utf-8') if isinstance(token, bytes) else token
+
+    def take_orders(self, count):
+        # 배송처리는 주문 상태를 되돌릴 수 없어서 주문을 한 번씩만 사용
+        # 남은 주문이 모자라면 이미 배송처리된 주문으로 측정하지 않도록 중단
+        with self.order_pool_lock:
+            if len(self.order_pool) < count:
+                raise OrderPoolExhausted('order pool exhausted, seed more orders or lower --requests / --warmup')
+            order_id_list, self.order_pool = self.order_pool[:count], self.order_pool[count:]
+        return order_id_list
+
+
+def product_body(ctx, rng):
+    return {
+        'sub_categories_id':    ctx.sub_category_id,
+        'name':                 'benchmark product',
+        'main_image':           'https://image.brandi.com/benchmark.jpg',
+        'is_sell':              1,
+        'is_display':           1,
+        'is_discount':          0,
+        'price':                rng.randrange(5000, 100000, 100),
+        'detail':               'benchmark',
+        'maximum_sell_count':   10,
+        'minimum_sell_count':   1,
+        'options':              [{'color_id': line['color_id'], 'size_id': line['size_id'],
+                                  'is_inventory_manage': 0, 'count': None} for line in ctx.lines[:2]]
+    }
+
+
+def seller_body(ctx, seller_id):
+    return {
+        'image':                        'https://image.brandi.com/seller.jpg',
+        'simple_introduce':             'benchmark',
+        'brand_crm_number':             '02-000-0000',
+        'zip_code':                     12345,
+        'address':                      '서울시 강남구',
+        'detail_address':               '1층',
+        'brand_crm_open':               '10:00',
+        'brand_crm_end':                '18:00',
+        'delivery_information':         'benchmark',
+        'refund_exchange_information':  'benchmark',
+        'seller_status_id':             2,
+        'is_brand_crm_holiday':         0,
+        'brand_name_korean':            '브랜드{}'.format(seller_id),
+        'brand_name_english':           'brand{}'.format(seller_id),
+        'manager_information':          [{'name': '담당자', 'phone_number': '010-0000-0000',
+                                          'email': 'manager{}@brandi.com'.format(seller_id), 'ordering': 1}]
+    }
+
+
+def login(client, ctx, state):
+    # 쓰레드마다 한 번 로그인해서 refresh token 을 받음 ( 측정하지 않음 )
+    if 'refresh_token' not in state:
+        response = client.post('/login', json={'account': ctx.account, 'password': PASSWORD})
+        state['refresh_token'] = response.get_json()['refresh_token']
+
+
+def refresh(client, ctx, state, rng):
+    login(client, ctx, state)
+    return {'json': {'refresh_token': state['refresh_token']}}
+
+
+def save_refresh_token(response, state):
+    # 사용된 refresh token 은 폐기되기 때문에 새로 받은 토큰으로 바꿈
+    if response.status_code == 200:
+        state['refresh_token'] = response.get_json()['refresh_token']
+
+
+def toggle_button(state):
+    # 휴점처리, 휴점해제 버튼을 번갈아 눌러서 매번 상태가 바뀌게 함
+    state['temp_closed'] = not state.get('temp_closed', False)
+    return 3 if state['temp_closed'] else 4
+
+
+def import_file(ctx, rng, rows=10):
+    lines = ['sub_categories_id,name,main_image,is_sell,is_display,is_discount,price,detail,'
+             'maximum_sell_count,minimum_sell_count,options']
+    options = json.dumps(product_body(ctx, rng)['options']).replace('"', '""')
+    for idx in range(rows):
+        lines.append('{},import{},https://image.brandi.com/import.jpg,1,1,0,{},benchmark,10,1,"{}"'.format(
+            ctx.sub_category_id, idx, rng.randrange(5000, 100000, 100), options))
+
+    return {'data': {'file': (io.BytesIO('\n'.join(lines).encode('utf-8')), 'products.csv')},
+            'content_type': 'multipart/form-data'}
+
+
+def now_string():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+ORDER_USER = {
+    'user_name':        'benchmark',
+    'phone_number':     '010-0000-0000',
+    'zip_code':         12345,
+    'address':          'benchmark',
+    'detail_address':   'benchmark'
+}
+
+
+def order_body(ctx, rng):
+    line = rng.choice(ctx.lines)
+    return {'path_args': {'product_id': line['product_id']}, 'json': dict(
+        ORDER_USER, count=1, color_id=line['color_id'], size_id=line['size_id'], total_price=line['discount_price'])}
+
+
+def order_lines_body(ctx, rng):
+    lines = rng.sample(ctx.lines, min(3, len(ctx.lines)))
+    return {'json': dict(ORDER_USER, total_price=sum(line['discount_price'] for line in lines), order_lines=[
+        dict({key: line[key] for key in ('product_id', 'color_id', 'size_id')}, count=1) for line in lines])}
+
+
+# ( method, 라우트 ) 별로 요청을 만드는 함수, ( client, ctx, state, rng ) 를 받아서 client.open 에 넘길 값을 돌려줌
+# 토큰이 필요하면 seller 또는 master 를 같이 적음, 세 번째 값이 있으면 응답을 받은 뒤에 호출
+REQUESTS = {
+    ('POST', '/signup'): ('', lambda client, ctx, state, rng: {'json': {
+        'account':              'benchsignup{}_{}'.format(int(time.time()), next(ctx.signup_count)),
+        'password':             PASSWORD,
+        'brand_crm_number':     '02-000-0000',
+        'phone_number':         '010-0000-0000',
+        'brand_name_korean':    '브랜드',
+        'brand_name_english':   'brand',
+        'seller_property_id':   str(rng.choice(datagen.SELLER_PROPERTY_IDS))}}),
+    ('POST', '/login'): ('', lambda client, ctx, state, rng: {
+        'json': {'account': ctx.account, 'password': PASSWORD}}),
+    ('POST', '/login/refresh'): ('', refresh, save_refresh_token),
+    ('GET', '/mypage'): ('seller', lambda client, ctx, state, rng: {}),
+    ('PUT', '/mypage'): ('seller', lambda client, ctx, state, rng: {'json': seller_body(ctx, ctx.seller_id)}),
+    ('GET', '/master/management-seller'): ('master', lambda client, ctx, state, rng: {
+        'query_string': {'limit': 10, 'offset': rng.randrange(0, 1000, 10)}}),
+    ('PUT', '/master/management-seller'): ('master', lambda client, ctx, state, rng: {'json': {
+        'seller_id': ctx.seller_id_list[state['thread'] % len(ctx.seller_id_list)], 'button': toggle_button(state)}}),
+    ('PUT', '/master/management-seller/status'): ('master', lambda client, ctx, state, rng: {'json': {
+        'seller_id_list': ctx.seller_id_list[-(state['thread'] + 1) * 10:][:10],
+        'button': toggle_button(state)}}),
+    ('GET', '/home'): ('seller', lambda client, ctx, state, rng: {}),
+    # SellerService.get_seller_page 는 경로의 셀러가 마스터인지 확인하기 때문에 마스터 id 로 조회
+    ('GET', '/master/management-seller/<int:seller_id>'): ('master', lambda client, ctx, state, rng: {
+        'path_args': {'seller_id': ctx.master_id}}),
+    ('PUT', '/master/management-seller/<int:seller_id>'): ('master', lambda client, ctx, state, rng: {
+        'path_args': {'seller_id': ctx.seller_id},
+        'json': dict(seller_body(ctx, ctx.seller_id), seller_property_id=1)}),
+    ('GET', '/product/register'): ('seller', lambda client, ctx, state, rng: {}),
+    ('POST', '/product/register'): ('seller', lambda client, ctx, state, rng: {'json': product_body(ctx, rng)}),
+    ('GET', '/category/<int:category_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'category_id': ctx.category_id}}),
+    ('GET', '/product/update/<int:product_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'product_id': rng.choice(ctx.product_id_list)}}),
+    ('GET', '/product/update/<int:product_id>/detail'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'product_id': rng.choice(ctx.product_id_list)}}),
+    ('POST', '/product/batch'): ('seller', lambda client, ctx, state, rng: {'json': {
+        'product_id_list': rng.sample(ctx.product_id_list, min(20, len(ctx.product_id_list))), 'with_detail': 0}}),
+    ('PUT', '/product/update/<int:product_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'product_id': rng.choice(ctx.update_product_id_list)}, 'json': product_body(ctx, rng)}),
+    ('GET', '/product/management'): ('seller', lambda client, ctx, state, rng: {
+        'query_string': {'limit': 10, 'offset': rng.randrange(0, 1000, 10)}}),
+    ('GET', '/product/<int:product_id>/history'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'product_id': rng.choice(ctx.product_id_list)}, 'query_string': {'at': now_string()}}),
+    ('POST', '/product/history'): ('seller', lambda client, ctx, state, rng: {'json': {
+        'product_id_list': rng.sample(ctx.product_id_list, min(20, len(ctx.product_id_list))), 'at': now_string()}}),
+    ('PATCH', '/product/bulk'): ('seller', lambda client, ctx, state, rng: {'json': {
+        'product_id_list': rng.sample(ctx.product_id_list, min(50, len(ctx.product_id_list))), 'is_display': 1}}),
+    ('POST', '/product/import'): ('seller', lambda client, ctx, state, rng: import_file(ctx, rng)),
+    ('GET', '/order/product/<int:product_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'product_id': rng.choice(ctx.product_id_list)}}),
+    ('POST', '/order/product/<int:product_id>'): ('seller', lambda client, ctx, state, rng: order_body(ctx, rng)),
+    ('POST', '/order/products'): ('seller', lambda client, ctx, state, rng: order_lines_body(ctx, rng)),
+    ('GET', '/order/status/<int:order_status_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'order_status_id': 1}, 'query_string': {'limit': 10, 'offset': rng.randrange(0, 1000, 10)}}),
+    ('POST', '/order/shipment'): ('seller', lambda client, ctx, state, rng: {'json': {
+        'order_id_list': ctx.take_orders(SHIPMENT_ORDER_COUNT), 'shipment_button': 1}}),
+    ('GET', '/order/<int:order_id>'): ('seller', lambda client, ctx, state, rng: {
+        'path_args': {'order_id': rng.choice(ctx.order_id_list)}}),
+    ('POST', '/order/batch'): ('seller', lambda client, ctx, state, rng: {'json': {
+        'order_id_list': rng.sample(ctx.order_id_list, min(20, len(ctx.order_id_list)))}}),
+    ('PUT', '/order/change_number'): ('master', lambda client, ctx, state, rng: {'json': {
+        'phone_number': '010-9999-{:04d}'.format(rng.randrange(10000)), 'order_id': rng.choice(ctx.order_id_list)}})
+}
+
+
+def benchmark_routes(app):
+    # 세 view 모듈이 등록한 ( method, 라우트 ) 목록
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if app.view_functions[rule.endpoint].__module__ not in VIEW_MODULES:
+            continue
+        routes.extend((method, rule.rule) for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}))
+
+    return sorted(routes, key=lambda route: (route[1], route[0]))
+
+
+def prepare(app, ctx, rng):
+    # 상품 수정 API 에서 쓸 상품을 미리 등록하기 ( 측정하지 않음 )
+    client = app.test_client()
+    for _ in range(20):
+        response = client.post('/product/register', json=product_body(ctx, rng),
+                               headers={'Authorization': ctx.token})
+        if response.status_code != 200:
+            raise SystemExit('product register failed {}'.format(response.get_data(as_text=True)))
+
+    with app.extensions['benchmark_engine'].connect() as connection:
+        ctx.update_product_id_list = [row[0] for row in connection.execute(text("""
+            SELECT id FROM products WHERE seller_id = :seller_id AND name = 'benchmark product'
+            ORDER BY id DESC LIMIT 20
+        """), {'seller_id': ctx.seller_id})]
+
+
+def percentile(sorted_values, ratio):
+    # nearest-rank
+    return sorted_values[max(0, math.ceil(ratio * len(sorted_values)) - 1)]
+
+
+def run_route(app, ctx, method, rule, request_count, concurrency, warmup, seed, max_error_rate=MAX_ERROR_RATE):
+    """ API 하나를 concurrency 개의 쓰레드로 request_count 번 호출하고 결과 요약하기
+
+    에러 ( 4xx, 5xx ) 비율이 max_error_rate 를 넘으면 failed 로 표시함
+    ( 실패한 요청만 빠르게 측정된 결과를 정상 결과처럼 비교하지 않도록 )
+    """
+    token_type, build = REQUESTS[(method, rule)][:2]
+    after = REQUESTS[(method, rule)][2] if len(REQUESTS[(method, rule)]) > 2 else None
+    headers = {'seller': {'Authorization': ctx.token}, 'master': {'Authorization': ctx.master_token}}.get(token_type, {})
+
+    counter = itertools.count()
+    results = []
+    results_lock = threading.Lock()
+    aborted = []
+
+    def worker(thread):
+        client = app.test_client()
+        state = {'thread': thread}
+        rng = random.Random(seed * 1000 + thread)
+        thread_results = []
+
+        while True:
+            idx = next(counter)
+            if idx >= request_count + warmup:
+                break
+
+            try:
+                kwargs = build(client, ctx, state, rng)
+            except OrderPoolExhausted as e:
+                aborted.append(e)
+                break
+            path_args = kwargs.pop('path_args', {})
+            path = rule.replace('<int:', '<')
+            for key, value in path_args.items():
+                path = path.replace('<{}>'.format(key), str(value))
+
+            started = time.perf_counter()
+            try:
+                response = client.open(path, method=method, headers=headers, **kwargs)
+            except Exception:
+                # 테스트 클라이언트는 처리하지 못한 예외를 그대로 올리기 때문에 500 으로 기록하고 계속 측정
+                logging.exception('%s %s failed', method, path)
+                if idx >= warmup:
+                    thread_results.append((time.perf_counter() - started, 500, 0))
+                continue
+            elapsed = time.perf_counter() - started
+
+            if after is not None:
+                after(response, state)
+
+            if idx >= warmup:
+                thread_results.append((elapsed, response.status_code,
+                                       int(response.headers.get('X-DB-Statements', 0))))
+
+        with results_lock:
+            results.extend(thread_results)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(thread,)) for thread in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    if aborted:
+        raise SystemExit('{} {}: {}'.format(method, rule, aborted[0]))
+
+    if not results:
+        return {'method': method, 'route': rule, 'requests': 0, 'skipped': 'no completed requests'}
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+    status_codes = {}
+    for _, status_code, _ in results:
+        status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+    errors = sum(count for status_code, count in status_codes.items() if int(status_code) >= 400)
+    error_rate = round(errors / len(results), 4)
+
+    return {
+        'method':           method,
+        'route':            rule,
+        'requests':         len(results),
+        'throughput_rps':   round(len(results) / wall, 2),
+        'p50_ms':           round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms':           round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms':           round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms':           round(latencies[-1] * 1000, 3),
+        'error_rate':       error_rate,
+        'failed':           error_rate > max_error_rate,
+        'status_codes':     status_codes,
+        'avg_statements':   round(sum(statements for _, _, statements in results) / len(results), 2)
+    }
+
+
+def compare(baseline, result):
+    # 이전 결과와 API 별 처리량, p95 비교해서 출력
+    previous = {(route['method'], route['route']): route for route in baseline['routes']}
+    for route in result['routes']:
+        before = previous.get((route['method'], route['route']))
+        if before is None or 'p95_ms' not in route or 'p95_ms' not in before:
+            continue
+        print('{:6} {:50} rps {:>10} -> {:>10}  p95 {:>9}ms -> {:>9}ms'.format(
+            route['method'], route['route'], before['throughput_rps'], route['throughput_rps'],
+            before['p95_ms'], route['p95_ms']), file=sys.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='end-to-end endpoint benchmark')
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--migrate', action='store_true', help='측정 전에 migrations/ 의 스키마 만들기')
+    parser.add_argument('--seed', action='store_true', help='측정 전에 데이터 넣기')
+    parser.add_argument('--scale', type=float, default=1.0, help='VOLUMES 에 곱할 값')
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--seed-workers', type=int, help='데이터를 넣는 프로세스 수 ( 기본값 cpu 수 )')
+    parser.add_argument('--requests', type=int, default=200, help='API 별 요청 수')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--max-error-rate', type=float, default=MAX_ERROR_RATE,
+                        help='API 별 최대 에러 비율, 넘는 API 가 있으면 exit code 1')
+    parser.add_argument('--no-result-cache', action='store_true', help='리스트 결과 캐시를 끄고 측정')
+    parser.add_argument('--route', action='append', help='측정할 라우트 ( 여러 번 사용 가능 )')
+    parser.add_argument('--baseline', help='비교할 이전 결과 파일')
+    parser.add_argument('--output', help='결과 JSON 파일, 없으면 stdout')
+    args = parser.parse_args()
+
+    import config
+
+    app = create_app({
+        'DB_URL':                       args.db_url,
+        'DB_BOOTSTRAP_SCHEMA':          args.migrate,
+        'JWT_SECRET_KEY':               config.JWT_SECRET_KEY,
+        'ALGORITHM':                    config.ALGORITHM,
+        'DB_STATS_HEADERS':             True,
+        'SQL_COMMENT_TAGS':             False,
+        'LOGIN_ACCOUNT_BURST':          10 ** 9,
+        'LOGIN_ACCOUNT_PER_MINUTE':     10 ** 9,
+        'LOGIN_IP_BURST':               10 ** 9,
+        'LOGIN_IP_PER_MINUTE':          10 ** 9,
+        'STATUS_NOTIFIER_ENABLED':      False,
+        'DISCOUNT_SCHEDULER_ENABLED':   False,
+        'IDEMPOTENCY_SWEEPER_ENABLED':  False,
+        'RESULT_CACHE_SIZE':            0 if args.no_result_cache else 1000
+    })
+    engine = create_database_engine(args.db_url)
+    app.extensions['benchmark_engine'] = engine
+
+    volumes = None
+    if args.seed:
+        started = time.perf_counter()
+        volumes = seed_database(args.db_url, args.scale, args.random_seed, args.seed_workers)
+        print('seeded {} in {:.1f}s'.format(volumes, time.perf_counter() - started), file=sys.stderr)
+
+    rng = random.Random(args.random_seed)
+    shipment_order_count = (args.requests + args.warmup) * SHIPMENT_ORDER_COUNT
+    ctx = Context(app, engine, shipment_order_count)
+
+    # 배송처리 API 는 주문을 한 번씩만 사용하기 때문에 측정 전에 주문 수가 충분한지 확인
+    if (not args.route or '/order/shipment' in args.route) and len(ctx.order_pool) < shipment_order_count:
+        raise SystemExit('/order/shipment needs {} orders, found {}; seed more orders or lower --requests / --warmup'
+                         .format(shipment_order_count, len(ctx.order_pool)))
+
+    prepare(app, ctx, rng)
+
+    routes = []
+    for method, rule in benchmark_routes(app):
+        if args.route and rule not in args.route:
+            continue
+
+        if (method, rule) not in REQUESTS:
+            # 새로 추가된 API 는 요청 만드는 함수를 REQUESTS 에 추가해야 측정됨
+            routes.append({'method': method, 'route': rule, 'skipped': 'no request builder'})
+            continue
+
+        result = run_route(app, ctx, method, rule, args.requests, args.concurrency, args.warmup, args.random_seed,
+                           args.max_error_rate)
+        routes.append(result)
+        if 'skipped' in result:
+            continue
+
+        print('{method:6} {route:50} {throughput_rps:>10} rps  p95 {p95_ms:>9}ms  errors {error_rate}{mark}'.format(
+            mark='  FAILED' if result['failed'] else '', **result), file=sys.stderr)
+
+    result = {
+        'commit':         git_commit(),
+        'created_at':     datetime.now().isoformat(),
+        'dialect':        engine.dialect.name,
+        'volumes':        volumes,
+        'requests':       args.requests,
+        'concurrency':    args.concurrency,
+        'max_error_rate': args.max_error_rate,
+        'result_cache':   not args.no_result_cache,
+        'routes':         routes
+    }
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare(json.load(baseline), result)
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    failed = ['{} {}'.format(route['method'], route['route']) for route in routes if route.get('failed')]
+    if failed:
+        raise SystemExit('error rate over {}: {}'.format(args.max_error_rate, ', '.join(failed)))
+
+
+if __name__ == '__main__':
+    main()
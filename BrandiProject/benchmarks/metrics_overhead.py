@@ -0,0 +1,136 @@
+"""
+메트릭 수집 ( metrics.py ) 이 요청 1번, sql 구문 1번마다 더하는 시간 측정
+
+    python -m benchmarks.metrics_overhead --iterations 100000 --repeat 5
+
+query_hooks_us 는 DAO 메소드 라벨 ( init_daos ) 을 포함한 sql 구문 1번의 시간 ( SQLAlchemy 가 훅에 넘기는 시간 포함 ),
+query_hook_code_us 는 그중 훅 코드만의 시간, dao_label_us 는 DAO 메소드 호출 1번의 시간
+"""
+import argparse
+import json
+import time
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from metrics import Metrics
+
+
+def per_call_us(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1000000
+
+
+def request_hook_overhead(iterations):
+    # before_request, after_request 훅만 직접 호출해서 요청 1번의 추가 시간 측정
+    app = Flask(__name__)
+    metrics = Metrics()
+    metrics.app = app
+
+    @app.route('/product/<int:product_id>')
+    def product(product_id):
+        return ''
+
+    response = app.response_class('')
+    ctx = app.test_request_context('/product/1')
+    ctx.push()
+    ctx.match_request()
+
+    def hooks():
+        metrics.before_request()
+        metrics.after_request(response)
+
+    try:
+        return per_call_us(hooks, iterations)
+    finally:
+        ctx.pop()
+
+
+class BenchDao:
+    # DAO 메소드 1번에 sql 구문 1번
+
+    def select_one(self, conn):
+        return conn.execute(text('SELECT 1'))
+
+
+def query_hook_overhead(iterations, repeat):
+    # 같은 DAO 메소드를 훅이 없을 때, 빈 훅일 때, 메트릭 훅일 때 실행해서 sql 구문 1번의 추가 시간 측정
+    # 빈 훅과의 차이가 메트릭 코드 ( DAO 메소드 라벨 포함 ) 의 시간이고, 빈 훅과 훅이 없을 때의 차이는 SQLAlchemy 이벤트 호출 시간
+    plain = create_engine('sqlite://')
+    empty = create_engine('sqlite://')
+    measured = create_engine('sqlite://')
+
+    event.listen(empty, 'before_cursor_execute', lambda *args: None)
+    event.listen(empty, 'after_cursor_execute', lambda *args: None)
+    metrics = Metrics()
+    metrics.init_app(Flask(__name__), measured)
+    measured_dao = BenchDao()
+    metrics.init_daos(measured_dao)
+
+    # 다른 프로세스가 끼어드는 시간을 줄이기 위해 번갈아 여러 번 실행하고 가장 짧은 시간을 씀
+    results = [[], [], []]
+    for _ in range(repeat):
+        for result, engine, dao in zip(results, (plain, empty, measured), (BenchDao(), BenchDao(), measured_dao)):
+            with engine.connect() as conn:
+                per_call_us(lambda: dao.select_one(conn), 1000)
+                result.append(per_call_us(lambda: dao.select_one(conn), iterations))
+
+    return [min(result) for result in results]
+
+
+def query_hook_code_overhead(iterations, repeat):
+    # SQLAlchemy 이벤트 호출 없이 before_cursor_execute, after_cursor_execute 만 직접 호출한 시간
+    class Cursor:
+        rowcount = 1
+        description = None
+
+    engine = create_engine('sqlite://')
+    metrics = Metrics()
+    metrics.init_app(Flask(__name__), engine)
+    cursor = Cursor()
+
+    with engine.connect() as conn:
+        def hooks():
+            metrics.before_cursor_execute(conn, cursor, 'SELECT 1', (), None, False)
+            metrics.after_cursor_execute(conn, cursor, 'SELECT 1', (), None, False)
+
+        return min(per_call_us(hooks, iterations) for _ in range(repeat))
+
+
+def dao_label_overhead(iterations, repeat):
+    # init_daos 로 감싼 DAO 메소드 호출 1번의 추가 시간 ( sql 없이 )
+    class NoopDao:
+        def select(self):
+            return None
+
+    plain, labelled = NoopDao(), NoopDao()
+    Metrics().init_daos(labelled)
+
+    plain_us = min(per_call_us(plain.select, iterations) for _ in range(repeat))
+    labelled_us = min(per_call_us(labelled.select, iterations) for _ in range(repeat))
+    return labelled_us - plain_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description='metrics hook overhead')
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    request_us = min(request_hook_overhead(args.iterations) for _ in range(args.repeat))
+    plain_us, empty_us, measured_us = query_hook_overhead(args.iterations, args.repeat)
+    hook_code_us = query_hook_code_overhead(args.iterations, args.repeat)
+    dao_label_us = dao_label_overhead(args.iterations, args.repeat)
+
+    print(json.dumps({
+        'request_hooks_us':     round(request_us, 3),
+        'query_plain_us':       round(plain_us, 3),
+        'event_dispatch_us':    round(empty_us - plain_us, 3),
+        'query_hooks_us':       round(measured_us - empty_us, 3),
+        'query_hook_code_us':   round(hook_code_us, 3),
+        'dao_label_us':         round(dao_label_us, 3)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+단일 상품 주문 N 번과 N 개 상품을 한 번에 주문하는 경우의 처리량 비교
+
+재고관리를 하지 않는 옵션 N 개로 주문을 만들기 때문에 재고는 바뀌지 않지만 주문 데이터는 실제로 저장됨
+테스트 데이터베이스에서만 실행
+
+    python -m benchmarks.order_throughput --db-url mysql+pymysql://... --lines 5 --iterations 200
+"""
+import argparse
+import json
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from model import OrderDao, SellerDao
+from service import OrderService
+
+ORDER_USER = {
+    'user_name':        'benchmark',
+    'phone_number':     '010-0000-0000',
+    'zip_code':         12345,
+    'address':          'benchmark',
+    'detail_address':   'benchmark'
+}
+
+
+def select_order_lines(session, line_count):
+    # 최소 판매 수량이 1 이고 재고관리를 하지 않는 옵션을 상품마다 하나씩 가져오기
+    rows = session.execute(text("""
+        SELECT
+            b.product_id,
+            b.color_id,
+            b.size_id,
+            a.discount_price
+        FROM options b
+        JOIN products a
+        ON a.id = b.product_id
+        WHERE
+            b.id IN (SELECT MIN(id) FROM options WHERE is_inventory_manage = 0 GROUP BY product_id)
+        AND
+            a.minimum_sell_count <= 1
+        LIMIT :limit
+    """), {'limit': line_count}).fetchall()
+
+    if len(rows) < line_count:
+        raise SystemExit('not enough products for {} order lines'.format(line_count))
+
+    return [dict(row, count=1) for row in rows]
+
+
+def run(session_factory, seconds_list, order):
+    session = session_factory()
+    try:
+        started = time.perf_counter()
+        order(session)
+        session.commit()
+        seconds_list.append(time.perf_counter() - started)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def summary(name, seconds_list, line_count):
+    seconds_list = sorted(seconds_list)
+    total = sum(seconds_list)
+
+    return {
+        'name':             name,
+        'iterations':       len(seconds_list),
+        'lines_per_second': round(len(seconds_list) * line_count / total, 2),
+        'p50_ms':           round(seconds_list[len(seconds_list) // 2] * 1000, 3),
+        'p95_ms':           round(seconds_list[int(len(seconds_list) * 0.95)] * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='single item orders vs one multi item order')
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--seller-id', type=int, default=1)
+    parser.add_argument('--lines', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url, encoding='utf-8', max_overflow=0)
+    session_factory = sessionmaker(bind=engine)
+    order_service = OrderService(OrderDao(), SellerDao())
+
+    session = session_factory()
+    lines = select_order_lines(session, args.lines)
+    session.close()
+
+    single_seconds = []
+    multi_seconds = []
+    for _ in range(args.iterations):
+        # 상품 하나씩 주문 ( 주문, 트랜잭션 N 개 )
+        started = time.perf_counter()
+        for line in lines:
+            order_data = dict(ORDER_USER, total_price=line['discount_price'], **{
+                key: line[key] for key in ('product_id', 'color_id', 'size_id', 'count')})
+            run(session_factory, [], lambda s: order_service.order_product(order_data, args.seller_id, s))
+        single_seconds.append(time.perf_counter() - started)
+
+        # N 개 상품을 한 번에 주문 ( 주문, 트랜잭션 1 개 )
+        order_data = dict(ORDER_USER, total_price=sum(line['discount_price'] for line in lines))
+        run(session_factory, multi_seconds, lambda s: order_service.order_products(order_data, lines, args.seller_id, s))
+
+    print(json.dumps([summary('single_item_orders', single_seconds, args.lines),
+                      summary('multi_item_order', multi_seconds, args.lines)], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from flask import _request_ctx_stack
+from sqlalchemy import event
+from slow_query import sql_comment
+
+# 요청 처리 시간 ( 초 )
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# sql 구문 실행 시간 ( 초 )
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# 지금 처리 중인 요청의 시작 시간과 라우트, 요청 밖 ( 백그라운드 작업 ) 에서는 None
+request_started = ContextVar('request_started', default=None)
+request_route = ContextVar('request_route', default=None)
+
+# 지금 처리 중인 요청의 sql 구문 수, 가져온 row 수
+request_stats = ContextVar('request_stats', default=None)
+
+# 지금 실행 중인 DAO 메소드 ( DaoMethod ), DAO 밖에서 실행한 sql 은 None
+current_dao_method = ContextVar('current_dao_method', default=None)
+
+
+class Histogram:
+    """
+    Prometheus histogram 과 같은 형태로 구간별 개수, 합계, 전체 개수를 저장
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        # 구간별 개수를 누적 개수로 바꿔서 돌려줌 ( le 라벨 )
+        with self.lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+
+        cumulative = []
+        running = 0
+        for le, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            running += bucket_count
+            cumulative.append((le, running))
+
+        return cumulative, total, count
+
+
+class DaoMethod:
+    """
+    DAO 메소드 하나의 라벨 ( product_dao.select_product_list ) 과 sql 실행 시간 histogram ( 처음 실행할 때 찾아서 저장 )
+    """
+    __slots__ = ('label', 'histogram')
+
+    def __init__(self, label):
+        self.label = label
+        self.histogram = None
+
+
+def labelled(method, dao_method):
+    # DAO 메소드를 실행하는 동안 current_dao_method 에 dao_method 를 넣어두기
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        token = current_dao_method.set(dao_method)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            current_dao_method.reset(token)
+
+    return wrapper
+
+
+def count_fetched_rows(engine):
+    """ engine 의 결과 ( ResultProxy ) 에서 실제로 가져온 row 수를 요청의 RequestStats 에 더하기
+
+    cursor.rowcount 는 드라이버마다 SELECT 에서 값이 다르고 ( sqlite 는 -1 ) 가져오지 않은 row 도 세기 때문에
+    fetchone, fetchmany, fetchall, first 가 모두 거치는 process_rows 에서 셈
+    """
+    context_class = engine.dialect.execution_ctx_cls
+
+    class RowCountingExecutionContext(context_class):
+        def get_result_proxy(self):
+            result = super().get_result_proxy()
+
+            # 결과는 다른 쓰레드에서 가져올 수도 있어서 sql 을 실행한 요청의 stats 를 미리 찾아둠
+            stats = request_stats.get()
+            if stats is not None:
+                process_rows = result.process_rows
+
+                def counted_process_rows(rows):
+                    rows = process_rows(rows)
+                    stats.add_rows(len(rows))
+                    return rows
+
+                result.process_rows = counted_process_rows
+
+            return result
+
+    engine.dialect.execution_ctx_cls = RowCountingExecutionContext
+
+
+class RequestStats:
+    """
+    요청 1번에서 실행한 sql 구문 수와 가져온 row 수
+    """
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.lock = threading.Lock()
+
+    def add_statement(self):
+        with self.lock:
+            self.statements += 1
+
+    def add_rows(self, rows):
+        with self.lock:
+            self.rows += rows
+
+
+class Metrics:
+    """
+    라우트별 요청 처리 시간과 DAO 메소드별 sql 실행 시간을 histogram 으로 저장하고 /metrics 에 Prometheus 형식으로 보여줌
+
+    app.extensions 에 등록된 로그인 제한, 백그라운드 작업들의 stats ( counts ) 도 같이 보여줌
+    slow_queries 가 있으면 오래 걸린 sql 을 기록하고, comment_tags 이면 모든 sql 끝에 라우트와 DAO 메소드 주석을 붙임
+
+    sql 의 DAO 메소드 라벨은 init_daos 로 감싼 DAO 메소드가 호출될 때 한 번 정해지고, sql 마다 콜 스택을 찾지 않음
+    """
+    def __init__(self, slow_queries=None, comment_tags=False):
+        self.requests = {}
+        self.queries = {}
+        self.lock = threading.Lock()
+        self.extensions = {}
+        self.slow_queries = slow_queries
+        self.comment_tags = comment_tags
+        self.comments = {}
+        self.other = DaoMethod('other')
+        self.app = None
+
+    def init_app(self, app, engine):
+        self.app = app
+        self.extensions = app.extensions
+        app.extensions['metrics'] = self
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+        self.init_engine(engine)
+
+    def init_engine(self, engine):
+        # 요청의 engine 외에 다른 engine ( QueryFanOut 의 커넥션 풀 ) 의 sql 도 같이 측정
+        # 주석을 붙일 때는 before_cursor_execute 가 바꾼 sql 을 돌려줘야 함
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute, retval=self.comment_tags)
+        event.listen(engine, 'after_cursor_execute', self.after_cursor_execute)
+        event.listen(engine, 'handle_error', self.handle_error)
+        count_fetched_rows(engine)
+
+    def init_daos(self, *daos):
+        """ DAO 인스턴스들의 public 메소드를 라벨 ( 모듈 이름.메소드 이름 ) 을 정하는 함수로 바꾸기
+
+        서비스와 백그라운드 작업은 DAO 메소드를 호출할 때마다 인스턴스에서 찾기 때문에 서비스를 만든 뒤에 바꿔도 됨
+        """
+        for dao in daos:
+            module = dao.__class__.__module__.rsplit('.', 1)[-1]
+            for name, method in inspect.getmembers(dao, inspect.ismethod):
+                if not name.startswith('_'):
+                    setattr(dao, name, labelled(method, DaoMethod(module + '.' + name)))
+
+    def histogram(self, histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def before_request(self):
+        request_started.set(time.perf_counter())
+
+        url_rule = _request_ctx_stack.top.request.url_rule
+        request_route.set(url_rule.rule if url_rule is not None else 'unmatched')
+        request_stats.set(RequestStats())
+
+    def after_request(self, response):
+        started = request_started.get()
+        if started is not None:
+            # request 프록시를 여러 번 거치지 않도록 요청 객체를 한 번만 가져옴
+            request = _request_ctx_stack.top.request
+
+            # 라우트는 path parameter 가 들어가기 전 형태 ( /order/status/<int:order_status_id> ) 로 묶음
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            key = (request.method, route, response.status_code)
+            self.histogram(self.requests, key, REQUEST_BUCKETS).observe(time.perf_counter() - started)
+            request_started.set(None)
+            request_route.set(None)
+
+            # 디버그 모드이거나 DB_STATS_HEADERS 이면 sql 구문 수, row 수를 응답 헤더로 보내줌
+            stats = request_stats.get()
+            if stats is not None and (self.app.debug or self.app.config.get('DB_STATS_HEADERS', False)):
+                response.headers['X-DB-Statements'] = str(stats.statements)
+                response.headers['X-DB-Rows'] = str(stats.rows)
+            request_stats.set(None)
+
+        return response
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        dao_method = current_dao_method.get() or self.other
+        conn.info.setdefault('query_started', []).append((time.perf_counter(), dao_method))
+
+        if self.comment_tags:
+            # 라우트, DAO 메소드 조합마다 주석 문자열은 한 번만 만듦
+            route = request_route.get() or threading.current_thread().name
+            comment = self.comments.get((route, dao_method.label))
+            if comment is None:
+                comment = self.comments[(route, dao_method.label)] = sql_comment(route, dao_method.label)
+
+            return statement + comment, parameters
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started, dao_method = conn.info['query_started'].pop()
+        elapsed = time.perf_counter() - started
+
+        histogram = dao_method.histogram
+        if histogram is None:
+            histogram = dao_method.histogram = self.histogram(self.queries, dao_method.label, QUERY_BUCKETS)
+        histogram.observe(elapsed)
+
+        # row 수는 결과를 가져올 때 더함 ( count_fetched_rows )
+        stats = request_stats.get()
+        if stats is not None:
+            stats.add_statement()
+
+        if self.slow_queries is not None and elapsed >= self.slow_queries.threshold:
+            route = request_route.get() or threading.current_thread().name
+            self.slow_queries.record(route, dao_method.label, statement, parameters, elapsed)
+
+    def handle_error(self, context):
+        # 실행에 실패한 구문은 after_cursor_execute 가 호출되지 않아서 여기서 시작 시간을 버림
+        if context.connection is not None and context.connection.info.get('query_started'):
+            context.connection.info['query_started'].pop()
+
+    def render(self):
+        """ Prometheus text 형식으로 바꾸기 """
+        lines = []
+        with self.lock:
+            requests = sorted(self.requests.items())
+            queries = sorted(self.queries.items())
+
+        lines.append('# HELP http_request_duration_seconds request latency by route')
+        lines.append('# TYPE http_request_duration_seconds histogram')
+        for (method, route, status), histogram in requests:
+            labels = 'method="{}",route="{}",status="{}"'.format(method, escape(route), status)
+            lines.extend(histogram_lines('http_request_duration_seconds', labels, histogram))
+
+        lines.append('# HELP db_query_duration_seconds sql statement latency by dao method')
+        lines.append('# TYPE db_query_duration_seconds histogram')
+        for label, histogram in queries:
+            lines.extend(histogram_lines('db_query_duration_seconds', 'dao="{}"'.format(escape(label)), histogram))
+
+        lines.append('# HELP app_component_stat counters of background workers and limiters')
+        lines.append('# TYPE app_component_stat gauge')
+        for name, component in sorted(self.extensions.items()):
+            stats = getattr(component, 'stats', None) or getattr(component, 'counts', None)
+            if not isinstance(stats, dict):
+                continue
+
+            for stat, value in sorted(stats.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append('app_component_stat{{component="{}",stat="{}"}} {}'.format(name, stat, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+def histogram_lines(name, labels, histogram):
+    cumulative, total, count = histogram.snapshot()
+    lines = ['{}_bucket{{{},le="{}"}} {}'.format(name, labels, le, bucket_count) for le, bucket_count in cumulative]
+    lines.append('{}_sum{{{}}} {}'.format(name, labels, total))
+    lines.append('{}_count{{{}}} {}'.format(name, labels, count))
+
+    return lines
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
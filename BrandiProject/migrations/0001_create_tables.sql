@@ -0,0 +1,184 @@
+-- 기본 테이블 ( 셀러, 상품, 주문 )
+-- migrations/ 를 쓰기 전부터 있던 운영 데이터베이스의 스키마 그대로, 이후 변경은 다음 버전 파일로 추가
+-- options, sub_images 는 상품 수정 때 지우고 다시 넣기 때문에 이 테이블들을 참조하는 외래키는 만들지 않음
+
+CREATE TABLE seller_properties (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE seller_status (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE order_status (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE sellers (
+    id                          INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    account                     VARCHAR(45)     NOT NULL,
+    password                    VARCHAR(200)    NOT NULL,
+    brand_name_korean           VARCHAR(100)    NOT NULL,
+    brand_name_english          VARCHAR(100)    NOT NULL,
+    brand_crm_number            VARCHAR(20)     NOT NULL,
+    seller_property_id          INT             NOT NULL,
+    seller_status_id            INT             NOT NULL DEFAULT 1,
+    is_master                   BOOLEAN         NOT NULL DEFAULT FALSE,
+    is_delete                   BOOLEAN         NOT NULL DEFAULT FALSE,
+    image                       VARCHAR(2000),
+    background_image            VARCHAR(2000),
+    simple_introduce            VARCHAR(200),
+    detail_introduce            TEXT,
+    brand_crm_open              VARCHAR(10),
+    brand_crm_end               VARCHAR(10),
+    is_brand_crm_holiday        BOOLEAN         NOT NULL DEFAULT FALSE,
+    zip_code                    INT,
+    address                     VARCHAR(200),
+    detail_address              VARCHAR(200),
+    delivery_information        TEXT,
+    refund_exchange_information TEXT,
+    created_at                  DATETIME        NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (seller_property_id) REFERENCES seller_properties (id),
+    FOREIGN KEY (seller_status_id) REFERENCES seller_status (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE manager_informations (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name            VARCHAR(45),
+    phone_number    VARCHAR(20)     NOT NULL,
+    email           VARCHAR(100),
+    seller_id       INT             NOT NULL,
+    ordering        INT             NOT NULL,
+    FOREIGN KEY (seller_id) REFERENCES sellers (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE seller_status_histories (
+    id                  INT         NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    update_time         DATETIME    NOT NULL,
+    seller_status_id    INT         NOT NULL,
+    seller_id           INT         NOT NULL,
+    FOREIGN KEY (seller_status_id) REFERENCES seller_status (id),
+    FOREIGN KEY (seller_id) REFERENCES sellers (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE categories (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE sub_categories (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name            VARCHAR(45)     NOT NULL,
+    categories_id   INT             NOT NULL,
+    FOREIGN KEY (categories_id) REFERENCES categories (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE colors (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE sizes (
+    id      INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name    VARCHAR(45)     NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE products (
+    id                  INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    name                VARCHAR(100)    NOT NULL,
+    seller_id           INT             NOT NULL,
+    is_sell             BOOLEAN         NOT NULL DEFAULT TRUE,
+    is_display          BOOLEAN         NOT NULL DEFAULT TRUE,
+    is_discount         BOOLEAN         NOT NULL DEFAULT FALSE,
+    sub_categories_id   INT             NOT NULL,
+    price               INT             NOT NULL,
+    discount_rate       INT             NOT NULL DEFAULT 0,
+    discount_start_date DATETIME,
+    discount_end_date   DATETIME,
+    simple_information  VARCHAR(200),
+    main_image          VARCHAR(2000)   NOT NULL,
+    detail              TEXT            NOT NULL,
+    minimum_sell_count  INT             NOT NULL DEFAULT 1,
+    maximum_sell_count  INT             NOT NULL DEFAULT 20,
+    manufacturer        VARCHAR(100),
+    manufacture_date    VARCHAR(20),
+    origin              VARCHAR(100),
+    code_number         INT,
+    created_at          DATETIME        NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (seller_id) REFERENCES sellers (id),
+    FOREIGN KEY (sub_categories_id) REFERENCES sub_categories (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE sub_images (
+    id          INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    image       VARCHAR(2000)   NOT NULL,
+    product_id  INT             NOT NULL,
+    FOREIGN KEY (product_id) REFERENCES products (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE options (
+    id                  INT         NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    product_id          INT         NOT NULL,
+    color_id            INT         NOT NULL,
+    size_id             INT         NOT NULL,
+    is_inventory_manage BOOLEAN     NOT NULL DEFAULT FALSE,
+    count               INT,
+    ordering            INT         NOT NULL,
+    FOREIGN KEY (product_id) REFERENCES products (id),
+    FOREIGN KEY (color_id) REFERENCES colors (id),
+    FOREIGN KEY (size_id) REFERENCES sizes (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 상품 선분이력, 현재 이력의 close_time 은 config.product_record['CLOSE_TIME'] ( 9999-12-31 23:59:59 )
+CREATE TABLE product_records (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    seller_id       INT             NOT NULL,
+    product_id      INT             NOT NULL,
+    product_name    VARCHAR(100)    NOT NULL,
+    price           INT             NOT NULL,
+    discount_rate   INT             NOT NULL DEFAULT 0,
+    start_time      DATETIME        NOT NULL,
+    close_time      DATETIME        NOT NULL,
+    main_image      VARCHAR(2000)   NOT NULL,
+    FOREIGN KEY (seller_id) REFERENCES sellers (id),
+    FOREIGN KEY (product_id) REFERENCES products (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE orders (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_name       VARCHAR(45)     NOT NULL,
+    phone_number    VARCHAR(20)     NOT NULL,
+    zip_code        INT             NOT NULL,
+    address         VARCHAR(200)    NOT NULL,
+    detail_address  VARCHAR(200)    NOT NULL,
+    number          VARCHAR(20),
+    created_at      DATETIME        NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE order_details (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    order_id        INT             NOT NULL,
+    product_id      INT             NOT NULL,
+    detail_number   VARCHAR(20)     NOT NULL,
+    count           INT             NOT NULL,
+    order_status_id INT             NOT NULL DEFAULT 1,
+    option_id       INT             NOT NULL,
+    total_price     INT             NOT NULL,
+    seller_id       INT             NOT NULL,
+    FOREIGN KEY (order_id) REFERENCES orders (id),
+    FOREIGN KEY (product_id) REFERENCES products (id),
+    FOREIGN KEY (order_status_id) REFERENCES order_status (id),
+    FOREIGN KEY (seller_id) REFERENCES sellers (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE order_status_histories (
+    id              INT         NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    update_time     DATETIME    NOT NULL,
+    order_status_id INT         NOT NULL,
+    order_id        INT         NOT NULL,
+    FOREIGN KEY (order_status_id) REFERENCES order_status (id),
+    FOREIGN KEY (order_id) REFERENCES orders (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
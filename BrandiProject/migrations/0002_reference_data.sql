@@ -0,0 +1,72 @@
+-- 상태, 속성, 카테고리, 컬러, 사이즈 기본 데이터
+-- seller_status, order_status 의 id 는 config.py 의 status, order_status 와 같아야 함
+
+INSERT INTO seller_properties (id, name) VALUES
+    (1, '쇼핑몰'),
+    (2, '마켓'),
+    (3, '로드샵'),
+    (4, '디자이너브랜드'),
+    (5, '제너럴브랜드'),
+    (6, '내셔널브랜드'),
+    (7, '뷰티');
+
+INSERT INTO seller_status (id, name) VALUES
+    (1, '입점대기'),
+    (2, '입점'),
+    (3, '휴점'),
+    (4, '퇴점대기'),
+    (5, '퇴점'),
+    (6, '입점거절');
+
+INSERT INTO order_status (id, name) VALUES
+    (1, '상품준비'),
+    (2, '배송중'),
+    (3, '배송완료'),
+    (4, '구매확정');
+
+INSERT INTO categories (id, name) VALUES
+    (1, '아우터'),
+    (2, '상의'),
+    (3, '바지'),
+    (4, '원피스'),
+    (5, '스커트'),
+    (6, '신발'),
+    (7, '가방');
+
+INSERT INTO sub_categories (id, name, categories_id) VALUES
+    (1, '자켓', 1),
+    (2, '가디건', 1),
+    (3, '코트', 1),
+    (4, '티셔츠', 2),
+    (5, '블라우스', 2),
+    (6, '니트', 2),
+    (7, '청바지', 3),
+    (8, '슬랙스', 3),
+    (9, '미니원피스', 4),
+    (10, '롱원피스', 4),
+    (11, '미니스커트', 5),
+    (12, '롱스커트', 5),
+    (13, '운동화', 6),
+    (14, '구두', 6),
+    (15, '숄더백', 7),
+    (16, '크로스백', 7);
+
+INSERT INTO colors (id, name) VALUES
+    (1, 'Black'),
+    (2, 'White'),
+    (3, 'Gray'),
+    (4, 'Navy'),
+    (5, 'Beige'),
+    (6, 'Brown'),
+    (7, 'Red'),
+    (8, 'Pink'),
+    (9, 'Blue'),
+    (10, 'Green');
+
+INSERT INTO sizes (id, name) VALUES
+    (1, 'Free'),
+    (2, 'XS'),
+    (3, 'S'),
+    (4, 'M'),
+    (5, 'L'),
+    (6, 'XL');
@@ -0,0 +1,13 @@
+-- 리프레시 토큰 ( /login/refresh ), 토큰 원문이 아닌 sha256 해시만 저장
+CREATE TABLE refresh_tokens (
+    id          INT         NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    seller_id   INT         NOT NULL,
+    token_hash  CHAR(64)    NOT NULL,
+    expire_time DATETIME    NOT NULL,
+    is_revoked  BOOLEAN     NOT NULL DEFAULT FALSE,
+    created_at  DATETIME    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (seller_id) REFERENCES sellers (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE UNIQUE INDEX ux_refresh_tokens_token_hash ON refresh_tokens (token_hash);
+CREATE INDEX ix_refresh_tokens_seller_revoked ON refresh_tokens (seller_id, is_revoked);
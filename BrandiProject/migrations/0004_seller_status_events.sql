@@ -0,0 +1,16 @@
+-- 셀러 상태 변경 알림 outbox, 상태 변경과 같은 트랜잭션에 저장하고 worker.StatusNotifier 가 전송
+CREATE TABLE seller_status_events (
+    id                  INT         NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    seller_id           INT         NOT NULL,
+    seller_status_id    INT         NOT NULL,
+    attempts            INT         NOT NULL DEFAULT 0,
+    next_attempt_time   DATETIME    NOT NULL,
+    claim_token         CHAR(32),
+    sent_time           DATETIME,
+    created_at          DATETIME    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (seller_id) REFERENCES sellers (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 보내지 않은 알림 ( sent_time IS NULL ) 중 전송할 때가 된 것 찾기
+CREATE INDEX ix_seller_status_events_pending ON seller_status_events (sent_time, next_attempt_time);
+CREATE INDEX ix_seller_status_events_claim_token ON seller_status_events (claim_token);
@@ -0,0 +1,27 @@
+-- 상품 할인가 ( PricingEngine 이 계산해서 저장 ), 상품 리스트의 판매가 필터, 정렬과 주문 금액 확인에 사용
+ALTER TABLE products ADD COLUMN discount_price INT NOT NULL DEFAULT 0;
+
+-- 기존 상품의 할인가 채우기 ( PricingEngine.discount_price 와 같은 계산 )
+-- 할인 중이 아니면 정가
+UPDATE products SET discount_price = price;
+
+-- 할인 기간 안의 할인 상품은 price * ( 100 - discount_rate ) / 100 의 정수 부분
+UPDATE
+    products
+SET
+    discount_price = (price * (100 - discount_rate) - price * (100 - discount_rate) % 100) / 100
+WHERE
+    discount_rate > 0
+AND
+    (discount_start_date IS NULL OR discount_start_date <= CURRENT_TIMESTAMP)
+AND
+    (discount_end_date IS NULL OR discount_end_date >= CURRENT_TIMESTAMP);
+
+-- 10원 단위로 반올림 ( 파이썬 round 처럼 5 는 짝수 쪽으로 )
+UPDATE
+    products
+SET
+    discount_price = discount_price - discount_price % 10
+        + CASE WHEN discount_price % 10 > 5 OR discount_price % 20 = 15 THEN 10 ELSE 0 END
+WHERE
+    discount_price < price;
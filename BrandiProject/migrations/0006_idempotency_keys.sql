@@ -0,0 +1,15 @@
+-- 주문 요청의 Idempotency-Key, 처리가 끝난 요청의 응답을 저장하고 worker.IdempotencySweeper 가 만료된 키를 삭제
+CREATE TABLE idempotency_keys (
+    id              INT             NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    seller_id       INT             NOT NULL,
+    idempotency_key VARCHAR(255)    NOT NULL,
+    request_hash    CHAR(64)        NOT NULL,
+    status_code     INT,
+    response_body   TEXT,
+    expire_time     DATETIME        NOT NULL,
+    created_at      DATETIME        NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 같은 셀러의 같은 키는 한 번만 등록 ( IdempotencyDao.insert_key 의 IntegrityError )
+CREATE UNIQUE INDEX ux_idempotency_keys_seller_key ON idempotency_keys (seller_id, idempotency_key);
+CREATE INDEX ix_idempotency_keys_expire_time ON idempotency_keys (expire_time);
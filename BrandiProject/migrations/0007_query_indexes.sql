@@ -0,0 +1,37 @@
+-- DAO 쿼리의 필터, 조인, 정렬에 맞춘 인덱스
+-- 외래키만 있는 컬럼에 자동으로 만들어진 인덱스는 같은 컬럼으로 시작하는 아래 인덱스가 대신함
+
+-- 로그인 ( SellerDao.get_seller_data ), 같은 계정 중복 가입 방지
+CREATE UNIQUE INDEX ux_sellers_account ON sellers (account);
+
+-- 셀러 목록의 담당자 조인 ( b.ordering = 1 )
+CREATE INDEX ix_manager_informations_seller_ordering ON manager_informations (seller_id, ordering);
+
+-- 셀러 목록 ( 마스터 제외, 등록일 역순 )
+CREATE INDEX ix_sellers_master_created ON sellers (is_master, created_at);
+
+-- 셀러별 상품 목록 ( 등록일 역순 )
+CREATE INDEX ix_products_seller_created ON products (seller_id, created_at);
+CREATE INDEX ix_products_created ON products (created_at);
+
+-- 할인 기간 시작, 종료 상품 찾기 ( ProductDao.select_discount_window_changes 의 UNION 각 구문 )
+CREATE INDEX ix_products_discount_start ON products (discount_start_date);
+CREATE INDEX ix_products_discount_end ON products (discount_end_date);
+
+-- 주문할 때 상품, 컬러, 사이즈로 옵션 찾기
+CREATE INDEX ix_options_product_color_size ON options (product_id, color_id, size_id);
+
+-- 상품 수정 때 현재 이력 닫기 ( product_id = ? AND close_time = ? )
+CREATE INDEX ix_product_records_product_close ON product_records (product_id, close_time);
+
+-- 특정 시점의 이력과 최근 이력 목록 ( start_time 역순 )
+CREATE INDEX ix_product_records_product_start ON product_records (product_id, start_time, close_time);
+
+-- 주문 상태별 목록, 홈 화면의 상태별 개수
+CREATE INDEX ix_order_details_status_order ON order_details (order_status_id, order_id);
+
+-- 주문 목록의 상태 변경 시간 조인 ( d.order_id = a.id AND d.order_status_id = b.order_status_id )
+CREATE INDEX ix_order_status_histories_order_status ON order_status_histories (order_id, order_status_id);
+
+-- 홈 화면의 최근 30 일 주문
+CREATE INDEX ix_orders_created ON orders (created_at);
@@ -0,0 +1,12 @@
+-- 상품 수정 화면 ( ProductService.get_product ) 에서 제조일을 datetime 으로 읽어서 형식을 바꾸기 때문에 DATETIME 으로 변경
+-- 저장된 값은 MySQL 이 날짜 문자열 ( 2020-10-01, 2020-10-01 12:00, 2020-10-01 12:00:00 ) 을 DATETIME 으로 변환함
+-- 날짜 형식이 아닌 값이 있으면 strict 모드에서 ALTER 가 실패하기 때문에 먼저 NULL 로 바꾼 뒤 적용
+
+UPDATE
+    products
+SET
+    manufacture_date = NULL
+WHERE
+    manufacture_date NOT REGEXP '^[0-9]{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])( ([01][0-9]|2[0-3]):[0-5][0-9](:[0-5][0-9])?)?$';
+
+ALTER TABLE products MODIFY manufacture_date DATETIME;
@@ -0,0 +1,6 @@
+-- 상품 등록, 수정 API 는 할인율 없이 ( null ) 요청할 수 있어서 할인율 컬럼에 NULL 을 허용
+-- 할인가 계산 ( PricingEngine ) 은 NULL 할인율을 할인 없음으로 봄
+
+ALTER TABLE products MODIFY discount_rate INT DEFAULT 0;
+
+ALTER TABLE product_records MODIFY discount_rate INT DEFAULT 0;
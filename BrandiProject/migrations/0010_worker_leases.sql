@@ -0,0 +1,10 @@
+-- 여러 앱 프로세스 중 한 곳에서만 실행해야 하는 백그라운드 작업의 실행 권한 ( lease )
+-- owner 가 lease_time 까지 실행 권한을 가지고, 실행할 때마다 연장함 ( WorkerLeaseDao.acquire_lease )
+CREATE TABLE worker_leases (
+    name        VARCHAR(45)     NOT NULL PRIMARY KEY,
+    owner       CHAR(32),
+    lease_time  DATETIME        NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- worker.DiscountScheduler ( 같은 상품의 할인 여부와 선분이력을 여러 프로세스가 중복으로 수정하지 않도록 함 )
+INSERT INTO worker_leases (name, owner, lease_time) VALUES ('discount-scheduler', NULL, '2000-01-01 00:00:00');
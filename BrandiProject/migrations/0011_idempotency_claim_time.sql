@@ -0,0 +1,5 @@
+-- 처리 중인 Idempotency-Key 를 등록한 시간, claim lease 가 지나도 응답이 저장되지 않은 키는
+-- 처리하던 프로세스가 죽은 것으로 보고 같은 요청의 재시도가 다시 등록할 수 있음 ( IdempotencyDao.reclaim_key )
+ALTER TABLE idempotency_keys ADD COLUMN claim_time DATETIME;
+
+UPDATE idempotency_keys SET claim_time = created_at;
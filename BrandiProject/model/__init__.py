@@ -1,9 +1,13 @@
 from .seller_dao import SellerDao
 from .product_dao import ProductDao
 from .order_dao import OrderDao
+from .idempotency_dao import IdempotencyDao
+from .worker_lease_dao import WorkerLeaseDao
 
 __all__ = [
     'SellerDao',
     'ProductDao',
-    'OrderDao'
+    'OrderDao',
+    'IdempotencyDao',
+    'WorkerLeaseDao'
 ]
@@ -0,0 +1,157 @@
+import re
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import StaticPool
+
+
+def json_object_arguments(columns):
+    # ( 'b.id', 'b.color_id' ) -> 'id', b.id, 'color_id', b.color_id
+    return ', '.join("'{}', {}".format(column.split('.')[-1], column) for column in columns)
+
+
+class MySQLDialect:
+    """
+    DAO 의 sql 중 데이터베이스마다 문법이 다른 부분 ( MySQL )
+    """
+    name = 'mysql'
+
+    # 현재 시간
+    now = 'now()'
+
+    # 조회한 row 잠그기
+    for_update = 'FOR UPDATE'
+
+    def date_format(self, column, date_format):
+        # date_format 은 두 데이터베이스에서 같은 의미인 %Y, %m, %d, %H 만 사용
+        return "DATE_FORMAT({}, '{}')".format(column, date_format)
+
+    def days_ago(self, days):
+        return 'DATE_SUB(NOW(), INTERVAL {:d} day)'.format(days)
+
+    def to_integer(self, expression):
+        return 'cast({} AS signed)'.format(expression)
+
+    def json_array_agg(self, columns):
+        # 컬럼들을 { 컬럼 이름: 값 } JSON 객체로 묶은 배열 ( MySQL 5.7.22 이상, row 가 없으면 NULL )
+        return 'JSON_ARRAYAGG(JSON_OBJECT({}))'.format(json_object_arguments(columns))
+
+    def delete_limit(self, table, where, order_by):
+        # where 조건의 row 를 order_by 순서로 :limit 개만 삭제
+        return 'DELETE FROM {} WHERE {} ORDER BY {} LIMIT :limit'.format(table, where, order_by)
+
+    def translate_ddl(self, statement):
+        # migrations/ 의 sql 은 MySQL 문법이라 그대로 실행 ( 구문 하나를 구문 리스트로 바꿈 )
+        return [statement]
+
+
+class SQLiteDialect(MySQLDialect):
+    """
+    DAO 의 sql 중 데이터베이스마다 문법이 다른 부분 ( SQLite )
+
+    MySQL 의 now() 처럼 서버 시간대 ( localtime ) 를 사용하고, 잠금은 데이터베이스 전체 쓰기 잠금이라 FOR UPDATE 는 생략
+    """
+    name = 'sqlite'
+
+    now = "datetime('now', 'localtime')"
+
+    for_update = ''
+
+    AUTO_INCREMENT_PATTERN = re.compile(r'\bINT\s+NOT NULL\s+AUTO_INCREMENT\s+PRIMARY KEY\b', re.I)
+    TABLE_OPTIONS_PATTERN = re.compile(r'\)\s*ENGINE\s*=.*$', re.I | re.S)
+    CURRENT_TIMESTAMP_PATTERN = re.compile(r'\bDEFAULT CURRENT_TIMESTAMP\b', re.I)
+    MODIFY_COLUMN_PATTERN = re.compile(r'^\s*ALTER\s+TABLE\s+(\w+)\s+MODIFY\s+(?:COLUMN\s+)?(\w+)\s+(.+?)\s*$',
+                                       re.I | re.S)
+
+    def date_format(self, column, date_format):
+        return "strftime('{}', {})".format(date_format, column)
+
+    def days_ago(self, days):
+        return "datetime('now', 'localtime', '-{:d} days')".format(days)
+
+    def to_integer(self, expression):
+        return 'CAST({} AS INTEGER)'.format(expression)
+
+    def json_array_agg(self, columns):
+        # row 가 없으면 '[]'
+        return 'json_group_array(json_object({}))'.format(json_object_arguments(columns))
+
+    def delete_limit(self, table, where, order_by):
+        # 기본 빌드의 SQLite 는 DELETE 에 ORDER BY, LIMIT 을 쓸 수 없어서 id 를 먼저 고름
+        return 'DELETE FROM {0} WHERE id IN (SELECT id FROM {0} WHERE {1} ORDER BY {2} LIMIT :limit)'.format(
+            table, where, order_by)
+
+    def translate_ddl(self, statement):
+        # MySQL DDL 을 SQLite 문법으로 바꾸기 ( AUTO_INCREMENT, 테이블 옵션, 기본값 현재 시간, 컬럼 타입 변경 )
+        modify = self.MODIFY_COLUMN_PATTERN.match(statement)
+        if modify is not None:
+            return self.modify_column(*modify.groups())
+
+        statement = self.AUTO_INCREMENT_PATTERN.sub('INTEGER PRIMARY KEY', statement)
+        statement = self.TABLE_OPTIONS_PATTERN.sub(')', statement)
+        return [self.CURRENT_TIMESTAMP_PATTERN.sub("DEFAULT (datetime('now', 'localtime'))", statement)]
+
+    def modify_column(self, table, column, definition):
+        # SQLite 는 컬럼 타입을 바꿀 수 없어서 새 컬럼에 값을 복사하고 기존 컬럼을 지운 뒤 이름을 바꿈 ( SQLite 3.35 이상 )
+        # 컬럼 순서는 맨 뒤로 바뀌고, 인덱스나 외래키가 있는 컬럼은 DROP COLUMN 이 실패함
+        new_column = '{}__new'.format(column)
+        return [
+            'ALTER TABLE {} ADD COLUMN {} {}'.format(table, new_column, definition),
+            'UPDATE {} SET {} = {}'.format(table, new_column, column),
+            'ALTER TABLE {} DROP COLUMN {}'.format(table, column),
+            'ALTER TABLE {} RENAME COLUMN {} TO {}'.format(table, new_column, column)
+        ]
+
+
+DIALECTS = {dialect.name: dialect for dialect in (MySQLDialect(), SQLiteDialect())}
+
+
+def dialect_of(name):
+    if name not in DIALECTS:
+        raise ValueError('unsupported database {}'.format(name))
+
+    return DIALECTS[name]
+
+
+def get_dialect(session):
+    # 세션이 연결된 데이터베이스의 dialect
+    return dialect_of(session.get_bind().dialect.name)
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+# SQLite 는 날짜를 문자열로 저장해서, MySQL 처럼 DATETIME 컬럼을 datetime 으로 읽도록 변환 등록
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATETIME', parse_datetime)
+
+
+def sqlite_regexp(pattern, value):
+    # MySQL 의 value REGEXP pattern ( SQLite 는 regexp(pattern, value) 함수를 호출함 )
+    return value is not None and re.search(pattern, str(value)) is not None
+
+
+def create_database_engine(db_url, **kwargs):
+    """ DB_URL 에 맞는 설정으로 engine 만들기
+
+    - MySQL  : 기존 설정 ( max_overflow=0 )
+    - SQLite : 여러 쓰레드에서 사용할 수 있도록 설정하고, 메모리 데이터베이스 ( sqlite:// ) 는 모든 세션이
+               같은 연결을 쓰도록 StaticPool 사용 ( 연결마다 데이터베이스가 따로 생기기 때문 ),
+               migrations/ 의 REGEXP 를 쓸 수 있도록 regexp 함수 등록
+    """
+    url = make_url(db_url)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(url, encoding='utf-8', max_overflow=0, **kwargs)
+
+    connect_args = {'check_same_thread': False, 'detect_types': sqlite3.PARSE_DECLTYPES, 'timeout': 30}
+    if url.database in (None, '', ':memory:'):
+        kwargs.setdefault('poolclass', StaticPool)
+
+    engine = create_engine(url, encoding='utf-8', connect_args=connect_args, **kwargs)
+    event.listen(engine, 'connect',
+                 lambda dbapi_connection, record: dbapi_connection.create_function('regexp', 2, sqlite_regexp))
+
+    return engine
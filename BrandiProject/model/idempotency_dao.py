@@ -0,0 +1,102 @@
+from sqlalchemy import text
+from exceptions import NoAffectedRowException
+from .dialect import get_dialect
+
+
+class IdempotencyDao:
+
+    def insert_key(self, idempotency, session):
+        # 처리 중인 요청으로 키 등록하기, ( seller_id, idempotency_key ) 가 unique 라서 이미 있으면 IntegrityError
+        insert_row = session.execute(text("""
+            INSERT INTO idempotency_keys (
+                seller_id,
+                idempotency_key,
+                request_hash,
+                claim_time,
+                expire_time
+            ) VALUES (
+                :seller_id,
+                :idempotency_key,
+                :request_hash,
+                :claim_time,
+                :expire_time
+            )
+        """), idempotency).rowcount
+
+        if insert_row == 0:
+            raise NoAffectedRowException(500, 'insert_key insert error')
+
+    def select_key(self, seller_id, idempotency_key, session):
+        # 등록된 키와 저장된 응답 가져오기
+        idempotency = session.execute(text("""
+            SELECT
+                request_hash,
+                status_code,
+                response_body,
+                claim_time,
+                expire_time
+            FROM idempotency_keys
+            WHERE
+                seller_id = :seller_id
+            AND
+                idempotency_key = :idempotency_key
+        """), {'seller_id': seller_id, 'idempotency_key': idempotency_key}).fetchone()
+
+        return idempotency
+
+    def reclaim_key(self, idempotency, session):
+        # claim lease 가 지나도 응답이 저장되지 않은 키를 다시 처리 중으로 등록하기
+        # 조건과 변경을 한 구문으로 처리해서 동시에 들어온 재시도 중 하나만 등록됨
+        reclaim_row = session.execute(text("""
+            UPDATE
+                idempotency_keys
+            SET
+                claim_time = :claim_time,
+                expire_time = :expire_time
+            WHERE
+                seller_id = :seller_id
+            AND
+                idempotency_key = :idempotency_key
+            AND
+                request_hash = :request_hash
+            AND
+                status_code IS NULL
+            AND
+                claim_time < :stale_time
+        """), idempotency).rowcount
+
+        return reclaim_row
+
+    def update_response(self, idempotency, session):
+        # 처리가 끝난 요청의 응답 저장하기
+        update_row = session.execute(text("""
+            UPDATE
+                idempotency_keys
+            SET
+                status_code = :status_code,
+                response_body = :response_body
+            WHERE
+                seller_id = :seller_id
+            AND
+                idempotency_key = :idempotency_key
+        """), idempotency).rowcount
+
+        if update_row == 0:
+            raise NoAffectedRowException(500, 'update_response update error')
+
+    def delete_key(self, seller_id, idempotency_key, session):
+        # 실패한 요청은 다시 시도할 수 있도록 키 삭제하기
+        session.execute(text("""
+            DELETE FROM idempotency_keys
+            WHERE
+                seller_id = :seller_id
+            AND
+                idempotency_key = :idempotency_key
+        """), {'seller_id': seller_id, 'idempotency_key': idempotency_key})
+
+    def delete_expired_keys(self, now, limit, session):
+        # 만료된 키를 limit 개씩 삭제하고 삭제한 개수 돌려주기
+        delete_row = session.execute(text(get_dialect(session).delete_limit(
+            'idempotency_keys', 'expire_time < :now', 'expire_time')), {'now': now, 'limit': limit}).rowcount
+
+        return delete_row
@@ -1,6 +1,7 @@
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from exceptions import NoAffectedRowException, NoDataException
+from .dialect import get_dialect
 
 
 class OrderDao:
@@ -12,6 +13,7 @@ class OrderDao:
                 id,
                 price,
                 discount_rate,
+                discount_price,
                 maximum_sell_count,
                 minimum_sell_count
             FROM products
@@ -107,6 +109,21 @@ class OrderDao:
 
     def insert_order_data(self, order_data, option_id, seller_id, session):
         # 주문 정보 데이터에 저장하기
+        order_id = self.insert_order(order_data, session)
+
+        # 주문 상세 정보 저장하기
+        self.insert_order_details([{
+            'order_id': order_id,
+            'product_id': order_data['product_id'],
+            'detail_number': datetime.today().strftime("%Y%m%d") + '%06d' % order_id,
+            'count': order_data['count'],
+            'option_id': option_id,
+            'total_price': order_data['total_price'],
+            'seller_id': seller_id
+        }], session)
+
+    def insert_order(self, order_data, session):
+        # 주문 정보 저장하고 주문 번호, 주문 상태 히스토리 등록하기
         order_id = session.execute(text("""
             INSERT INTO orders (
                 user_name,
@@ -124,7 +141,7 @@ class OrderDao:
         """), order_data).lastrowid
 
         if order_id is None:
-            raise NoAffectedRowException(500, 'insert_order_data insert error')
+            raise NoAffectedRowException(500, 'insert_order insert error')
 
         # 주문 아이디 이용하여 주문 번호 등록 하기
         order_number = session.execute(text("""
@@ -138,9 +155,28 @@ class OrderDao:
                'number': datetime.today().strftime("%Y%m%d")+'%05d' % order_id}).rowcount
 
         if order_number == 0:
-            raise NoAffectedRowException(500, 'insert_order_data update error')
+            raise NoAffectedRowException(500, 'insert_order update error')
 
-        # 주문 상세 정보 저장하기
+        # 주문 상태 히스토리 저장하기
+        order_history = session.execute(text("""
+            INSERT INTO order_status_histories (
+                update_time,
+                order_status_id,
+                order_id
+            ) VALUES (
+                {now},
+                1,
+                :order_id
+            )
+        """.format(now=get_dialect(session).now)), {'order_id': order_id}).rowcount
+
+        if order_history == 0:
+            raise NoAffectedRowException(500, 'insert_order history insert error')
+
+        return order_id
+
+    def insert_order_details(self, order_details, session):
+        # 주문 상세 정보 여러 개를 한 번에 저장하기 ( executemany )
         order_detail_row = session.execute(text("""
             INSERT INTO order_details (
                 order_id,
@@ -161,29 +197,78 @@ class OrderDao:
                 :total_price,
                 :seller_id
             )
-        """), {'order_id': order_id, 'product_id': order_data['product_id'],
-               'detail_number': datetime.today().strftime("%Y%m%d") + '%06d' % order_id,
-               'count': order_data['count'], 'seller_id': seller_id,
-               'option_id': option_id, 'total_price': order_data['total_price']}).rowcount
+        """), order_details).rowcount
 
-        if order_detail_row == 0:
-            raise NoAffectedRowException(500, 'insert_order_data detail insert error')
+        if order_detail_row != len(order_details):
+            raise NoAffectedRowException(500, 'insert_order_details insert error')
 
-        # 주문 상태 히스토리 저장하기
-        order_history = session.execute(text("""
-            INSERT INTO order_status_histories (
-                update_time,
-                order_status_id,
-                order_id
-            ) VALUES (
-                now(),
-                1,
-                :order_id
-            )
-        """), {'order_id': order_id}).rowcount
+    def select_products_for_order(self, product_id_list, session):
+        # 여러 상품을 주문할 때 상품 정보 가져오기
+        products = session.execute(text("""
+            SELECT
+                id,
+                discount_price,
+                maximum_sell_count,
+                minimum_sell_count
+            FROM products
+            WHERE
+                id IN :product_id_list
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list}).fetchall()
 
-        if order_history == 0:
-            raise NoAffectedRowException(500, 'insert_order_data history insert error')
+        return products
+
+    def select_options_for_order(self, product_id_list, session):
+        # 주문할 상품들의 옵션 id 가져오기 ( 잠금 없이 )
+        options = session.execute(text("""
+            SELECT
+                id,
+                product_id,
+                color_id,
+                size_id
+            FROM options
+            WHERE
+                product_id IN :product_id_list
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list}).fetchall()
+
+        return options
+
+    def lock_options(self, option_id_list, session):
+        # 재고를 수정할 옵션들을 id 순서로 잠그기
+        # 여러 주문이 같은 옵션을 주문해도 항상 같은 순서로 잠그기 때문에 데드락이 생기지 않음
+        options = session.execute(text("""
+            SELECT
+                id,
+                count,
+                is_inventory_manage
+            FROM options
+            WHERE
+                id IN :option_id_list
+            ORDER BY id
+            {for_update}
+        """.format(for_update=get_dialect(session).for_update)).bindparams(
+            bindparam('option_id_list', expanding=True)), {'option_id_list': sorted(option_id_list)}).fetchall()
+
+        if len(options) != len(option_id_list):
+            raise NoDataException(500, 'lock_options select error')
+
+        return options
+
+    def decrease_option_counts(self, option_counts, session):
+        # 잠근 옵션들의 재고 수량을 한 번에 줄이기 ( executemany )
+        # option_counts : [{'id': 옵션 id, 'count': 주문 수량}, ...]
+        option_row = session.execute(text("""
+            UPDATE
+                options
+            SET
+                count = count - :count
+            WHERE
+                id = :id
+        """), option_counts).rowcount
+
+        if option_row != len(option_counts):
+            raise NoAffectedRowException(500, 'decrease_option_counts update error')
 
     def select_order_products(self, query_string_list, session):
         # 준비완료, 배송중, 배송완료, 구매확정 상품 리스트 가져오기
@@ -340,11 +425,11 @@ class OrderDao:
                 order_status_id,
                 order_id
             ) VALUES (
-                now(),
+                {now},
                 2,
                 :order_id
             )
-        """), {'order_id': order_id}).rowcount
+        """.format(now=get_dialect(session).now)), {'order_id': order_id}).rowcount
 
         if history_row == 0:
             raise NoAffectedRowException(500, 'order_status_change_shipment insert error')
@@ -370,17 +455,17 @@ class OrderDao:
                 order_status_id,
                 order_id
             ) VALUES (
-                now(),
+                {now},
                 3,
                 :order_id
             )
-        """), {'order_id': order_id}).rowcount
+        """.format(now=get_dialect(session).now)), {'order_id': order_id}).rowcount
 
         if history_row == 0:
             raise NoAffectedRowException(500, 'order_status_change_complete insert error')
 
     def select_order_details(self, order_id, session):
-        # 주문 상세페이지 정보 가져오기
+        # 주문 상세페이지 정보 가져오기 ( 주문한 상품마다 한 줄 )
         order_data = session.execute(text("""
             SELECT 
                 a.number,
@@ -397,6 +482,7 @@ class OrderDao:
                 c.name,
                 c.price,
                 c.discount_rate,
+                c.discount_price,
                 c.id,
                 d.brand_name_korean,
                 e.size_id,
@@ -418,9 +504,10 @@ class OrderDao:
             ON g.id = e.size_id
             WHERE 
                 a.id = :order_id
-        """), {'order_id': order_id}).fetchone()
+            ORDER BY b.id
+        """), {'order_id': order_id}).fetchall()
 
-        if order_data is None:
+        if not order_data:
             raise NoDataException(500, 'select_order_details select error')
 
         return order_data
@@ -438,6 +525,67 @@ class OrderDao:
 
         return histories
 
+    def select_orders_details(self, order_id_list, session):
+        # 여러 주문의 상세페이지 정보 한 번에 가져오기 ( 주문한 상품마다 한 줄 )
+        order_data = session.execute(text("""
+            SELECT 
+                a.id AS order_id,
+                a.number,
+                a.created_at,
+                a.address,
+                a.detail_address,
+                a.zip_code,
+                a.user_name,
+                a.phone_number,
+                b.order_status_id,
+                b.count,
+                b.detail_number,
+                b.total_price,
+                c.name,
+                c.price,
+                c.discount_rate,
+                c.discount_price,
+                c.id,
+                d.brand_name_korean,
+                e.size_id,
+                e.color_id,
+                f.name as color_name,
+                g.name as size_name
+            FROM orders a
+            JOIN order_details b
+            ON a.id = b.order_id
+            JOIN products c
+            ON b.product_id = c.id
+            JOIN sellers d 
+            ON d.id = c.seller_id 
+            JOIN options e 
+            ON b.option_id = e.id
+            JOIN colors f
+            ON f.id = e.color_id
+            JOIN sizes g
+            ON g.id = e.size_id
+            WHERE 
+                a.id IN :order_id_list
+            ORDER BY b.id
+        """).bindparams(bindparam('order_id_list', expanding=True)), {'order_id_list': order_id_list}).fetchall()
+
+        return order_data
+
+    def select_orders_histories(self, order_id_list, session):
+        # 여러 주문의 상태 변화 히스토리 목록 가져오기
+        histories = session.execute(text("""
+            SELECT
+                order_id,
+                update_time,
+                order_status_id
+            FROM order_status_histories
+            WHERE
+                order_id IN :order_id_list
+            ORDER BY id
+        """).bindparams(bindparam('order_id_list', expanding=True)), {'order_id_list': order_id_list}).fetchall()
+
+        return histories
+
     def update_phone_number(self, data, session):
         # 핸드폰 번호 수정하기
         update_row = session.execute(text("""
@@ -1,8 +1,18 @@
-from sqlalchemy import text
+import json
+from sqlalchemy import text, bindparam
 from exceptions import NoAffectedRowException, NoDataException
+from .dialect import get_dialect
+
+
+# 상품 상세의 옵션, 서브 이미지 컬럼 ( 응답에 그대로 들어감 )
+PRODUCT_OPTION_COLUMNS = ('b.id', 'b.product_id', 'b.color_id', 'b.size_id', 'b.is_inventory_manage', 'b.count',
+                          'b.ordering')
+PRODUCT_IMAGE_COLUMNS = ('c.id', 'c.image', 'c.product_id')
 
 
 class ProductDao:
+    # 상품 일괄 수정에서 수정할 수 있는 컬럼
+    BULK_UPDATE_COLUMNS = ('is_sell', 'is_display', 'price', 'discount_rate', 'discount_start_date', 'discount_end_date')
 
     def select_category_list(self, session):
         # 1 차 카테고리 전체 리스트 가져오기
@@ -71,6 +81,7 @@ class ProductDao:
                 sub_categories_id,
                 price,
                 discount_rate,
+                discount_price,
                 discount_start_date,
                 discount_end_date,
                 simple_information,
@@ -90,6 +101,7 @@ class ProductDao:
                 :sub_categories_id,
                 :price,
                 :discount_rate,
+                :discount_price,
                 :discount_start_date,
                 :discount_end_date,
                 :simple_information,
@@ -136,11 +148,11 @@ class ProductDao:
                    :name,
                    :price,
                    :discount_rate,
-                   now(),
+                   {now},
                    :close_time,
                    :main_image
                )
-           """), {
+           """.format(now=get_dialect(session).now)), {
                     'seller_id': product_data['seller_id'],
                     'product_id': product_id,
                     'name': product_data['name'],
@@ -192,45 +204,240 @@ class ProductDao:
         if image == 0:
             raise NoAffectedRowException(500, 'insert_data_sub_image insert error')
 
-    def select_product_data(self, product_id, session):
-        # 상품 데이터 가져오기
+    def insert_products(self, product_list, session):
+        # 여러 상품 등록하기, 옵션과 이미지에 상품 id 가 필요해서 한 줄씩 insert 하고 id 리스트를 돌려줌
+        product_id_list = []
+        for product_data in product_list:
+            product_id = session.execute(text("""
+                INSERT INTO products (
+                    name,
+                    seller_id,
+                    is_sell,
+                    is_display,
+                    is_discount,
+                    sub_categories_id,
+                    price,
+                    discount_rate,
+                    discount_price,
+                    discount_start_date,
+                    discount_end_date,
+                    simple_information,
+                    main_image,
+                    detail,
+                    minimum_sell_count,
+                    maximum_sell_count,
+                    manufacturer,
+                    manufacture_date,
+                    origin
+                ) VALUES (
+                    :name,
+                    :seller_id,
+                    :is_sell,
+                    :is_display,
+                    :is_discount,
+                    :sub_categories_id,
+                    :price,
+                    :discount_rate,
+                    :discount_price,
+                    :discount_start_date,
+                    :discount_end_date,
+                    :simple_information,
+                    :main_image,
+                    :detail,
+                    :minimum_sell_count,
+                    :maximum_sell_count,
+                    :manufacturer,
+                    :manufacture_date,
+                    :origin
+                )
+            """), product_data).lastrowid
+
+            if product_id is None:
+                raise NoAffectedRowException(500, 'insert_products insert error')
+
+            product_id_list.append(product_id)
+
+        # 등록한 상품들의 code_number 한 번에 등록하기
+        code = session.execute(text("""
+            UPDATE
+                products
+            SET
+                code_number = id * 100
+            WHERE
+                id IN :product_id_list
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list}).rowcount
+
+        if code != len(product_id_list):
+            raise NoAffectedRowException(500, 'insert_products code number update error')
+
+        return product_id_list
+
+    def insert_options(self, option_list, session):
+        # 여러 상품의 옵션 데이터를 한 번에 등록하기 ( executemany )
+        option = session.execute(text("""
+            INSERT INTO options (
+                product_id,
+                color_id,
+                size_id,
+                is_inventory_manage,
+                count,
+                ordering
+            ) VALUES (
+                :product_id,
+                :color_id,
+                :size_id,
+                :is_inventory_manage,
+                :count,
+                :ordering
+            )
+        """), option_list).rowcount
+
+        if option != len(option_list):
+            raise NoAffectedRowException(500, 'insert_options insert error')
+
+    def insert_sub_images(self, image_list, session):
+        # 여러 상품의 서브 이미지를 한 번에 등록하기 ( executemany )
+        image = session.execute(text("""
+            INSERT INTO sub_images (
+                image,
+                product_id
+            ) VALUES (
+                :image,
+                :product_id
+            )
+        """), image_list).rowcount
+
+        if image != len(image_list):
+            raise NoAffectedRowException(500, 'insert_sub_images insert error')
+
+    def select_product(self, product_id, with_detail, session):
+        # 상품 데이터와 옵션, 서브 이미지를 한 번에 가져오기 ( 옵션, 이미지는 JSON 배열로 묶음 )
+        dialect = get_dialect(session)
         product_data = session.execute(text("""
             SELECT
-                *
+                a.is_sell,
+                a.is_display,
+                a.sub_categories_id,
+                a.manufacturer,
+                a.manufacture_date,
+                a.origin,
+                a.name,
+                a.simple_information,
+                a.main_image,
+                {detail}
+                a.price,
+                a.discount_rate,
+                a.is_discount,
+                a.discount_price,
+                a.discount_start_date,
+                a.discount_end_date,
+                a.minimum_sell_count,
+                a.maximum_sell_count,
+                a.code_number,
+                (
+                    SELECT
+                        {options}
+                    FROM options b
+                    WHERE
+                        b.product_id = a.id
+                ) AS options,
+                (
+                    SELECT
+                        {images}
+                    FROM sub_images c
+                    WHERE
+                        c.product_id = a.id
+                ) AS image_list
+            FROM products a
+            WHERE
+                a.id = :id
+        """.format(detail='a.detail,' if with_detail else '',
+                   options=dialect.json_array_agg(PRODUCT_OPTION_COLUMNS),
+                   images=dialect.json_array_agg(PRODUCT_IMAGE_COLUMNS))), {'id': product_id}).fetchone()
+
+        if product_data is None:
+            raise NoDataException(500, 'select_product select error')
+
+        options = json.loads(product_data['options'] or '[]')
+        image_list = json.loads(product_data['image_list'] or '[]')
+
+        return dict(product_data,
+                    options=sorted(options, key=lambda option: option['ordering']),
+                    image_list=sorted(image_list, key=lambda image: image['id']))
+
+    def select_product_detail(self, product_id, session):
+        # 상품 상세 설명 ( html ) 만 가져오기
+        product_detail = session.execute(text("""
+            SELECT
+                detail
             FROM products
             WHERE
                 id = :id
         """), {'id': product_id}).fetchone()
 
-        if product_data is None:
-            raise NoDataException(500, 'select_product_data select error')
+        if product_detail is None:
+            raise NoDataException(500, 'select_product_detail select error')
 
-        return product_data
+        return product_detail['detail']
 
-    def select_product_options(self, product_id, session):
-        # 상품의 옵션 정보 가져오기
-        options = session.execute(text("""
+    def select_products(self, product_id_list, with_detail, session):
+        # 여러 상품 데이터 한 번에 가져오기 ( 옵션, 서브 이미지는 select_options_for_products, select_images_for_products )
+        products = session.execute(text("""
             SELECT
-                *
-            FROM options
+                id,
+                is_sell,
+                is_display,
+                sub_categories_id,
+                manufacturer,
+                manufacture_date,
+                origin,
+                name,
+                simple_information,
+                main_image,
+                {detail}
+                price,
+                discount_rate,
+                is_discount,
+                discount_price,
+                discount_start_date,
+                discount_end_date,
+                minimum_sell_count,
+                maximum_sell_count,
+                code_number
+            FROM products
             WHERE
-                product_id = :product_id
-        """), {'product_id': product_id}).fetchall()
+                id IN :product_id_list
+        """.format(detail='detail,' if with_detail else '')).bindparams(
+            bindparam('product_id_list', expanding=True)), {'product_id_list': product_id_list}).fetchall()
+
+        return products
 
-        if options is None:
-            raise NoDataException(500, 'select_product_options select error')
+    def select_options_for_products(self, product_id_list, session):
+        # 여러 상품의 옵션들 가져오기 ( 상품마다 ordering 순서 )
+        options = session.execute(text("""
+            SELECT
+                {columns}
+            FROM options b
+            WHERE
+                b.product_id IN :product_id_list
+            ORDER BY b.product_id, b.ordering
+        """.format(columns=', '.join(PRODUCT_OPTION_COLUMNS))).bindparams(
+            bindparam('product_id_list', expanding=True)), {'product_id_list': product_id_list}).fetchall()
 
         return options
 
-    def select_product_images(self, product_id, session):
-        # 상품의 이미지 리스트 가져오기
+    def select_images_for_products(self, product_id_list, session):
+        # 여러 상품의 서브 이미지들 가져오기
         images = session.execute(text("""
             SELECT
-                *
-            FROM sub_images
+                {columns}
+            FROM sub_images c
             WHERE
-                product_id = :product_id
-        """), {'product_id': product_id}).fetchall()
+                c.product_id IN :product_id_list
+            ORDER BY c.id
+        """.format(columns=', '.join(PRODUCT_IMAGE_COLUMNS))).bindparams(
+            bindparam('product_id_list', expanding=True)), {'product_id_list': product_id_list}).fetchall()
 
         return images
 
@@ -248,6 +455,7 @@ class ProductDao:
                 sub_categories_id   = :sub_categories_id,
                 price               = :price,
                 discount_rate       = :discount_rate,
+                discount_price      = :discount_price,
                 discount_start_date = :discount_start_date,
                 discount_end_date   = :discount_end_date,
                 simple_information  = :simple_information,
@@ -270,12 +478,12 @@ class ProductDao:
                 UPDATE
                     product_records
                 SET 
-                    close_time = now()
+                    close_time = {now}
                 WHERE
                     product_id = :product_id
                 AND
                     close_time = :close_time
-            """), product_data).rowcount
+            """.format(now=get_dialect(session).now)), product_data).rowcount
 
         if update_prerecord == 0:
             raise NoAffectedRowException(500, 'update_product_data pre-record update error')
@@ -297,11 +505,11 @@ class ProductDao:
                 :name,
                 :price,
                 :discount_rate,
-                now(),
+                {now},
                 :close_time,
                 :main_image
             )
-        """), product_data).rowcount
+        """.format(now=get_dialect(session).now)), product_data).rowcount
 
         if product_record == 0:
             raise NoAffectedRowException(500, 'update_product_data record insert error')
@@ -388,6 +596,7 @@ class ProductDao:
                 a.code_number,
                 a.price,
                 a.discount_rate,
+                a.discount_price,
                 a.is_sell,
                 a.is_display,
                 a.is_discount,
@@ -470,10 +679,38 @@ class ProductDao:
             AND
                 a.id = :product_number """
 
+        # 최소 판매가 ( 할인가 기준 )
+        if query_string_list['min_price'] is not None:
+            sql += """
+            AND
+                a.discount_price >= :min_price """
+
+        # 최대 판매가 ( 할인가 기준 )
+        if query_string_list['max_price'] is not None:
+            sql += """
+            AND
+                a.discount_price <= :max_price """
+
         total_count = session.execute(text(count+sql), query_string_list).fetchone()
 
+        """
+        정렬하기 ( 등록일 역순, 판매가순, 판매가 역순 )
+        order_by : a.created_at DESC / a.discount_price ASC / a.discount_price DESC
+                          1          /          2           /          3
+        """
+        if query_string_list['order_by'] == 2:
+            sql += """
+            ORDER BY a.discount_price ASC, a.id DESC """
+
+        elif query_string_list['order_by'] == 3:
+            sql += """
+            ORDER BY a.discount_price DESC, a.id DESC """
+
+        else:
+            sql += """
+            ORDER BY a.created_at DESC """
+
         sql += """
-            ORDER BY created_at DESC
             LIMIT :limit
             OFFSET :offset
         """
@@ -481,3 +718,289 @@ class ProductDao:
         product_list = session.execute(text(data+sql), query_string_list).fetchall()
 
         return {'product_list': [dict(row) for row in product_list], 'total_count': total_count['cnt']}
+
+    def select_product_records(self, product_id, limit, offset, session):
+        # 상품의 선분이력 전체 목록 가져오기 ( 최근 이력부터 )
+        records = session.execute(text("""
+            SELECT
+                product_id,
+                product_name,
+                price,
+                discount_rate,
+                start_time,
+                close_time,
+                main_image
+            FROM product_records
+            WHERE
+                product_id = :product_id
+            ORDER BY start_time DESC
+            LIMIT :limit
+            OFFSET :offset
+        """), {'product_id': product_id, 'limit': limit, 'offset': offset}).fetchall()
+
+        return records
+
+    def select_product_records_at(self, product_id_list, at, session):
+        # 특정 시점에 유효했던 상품들의 이력 가져오기
+        # 상품마다 (product_id, start_time, close_time) 인덱스를 역순으로 한 번만 찾아서
+        # 이력이 수천개인 상품도 :at 이전에 시작한 모든 이력을 읽지 않음
+        records = session.execute(text("""
+            SELECT
+                b.product_id,
+                b.product_name,
+                b.price,
+                b.discount_rate,
+                b.start_time,
+                b.close_time,
+                b.main_image
+            FROM (
+                SELECT (
+                    SELECT
+                        id
+                    FROM product_records
+                    WHERE
+                        product_id = p.id
+                    AND
+                        start_time <= :at
+                    ORDER BY start_time DESC
+                    LIMIT 1
+                ) AS record_id
+                FROM products p
+                WHERE
+                    p.id IN :product_id_list
+            ) a
+            JOIN product_records b
+            ON b.id = a.record_id
+            WHERE
+                b.close_time > :at
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list,
+            'at': at}).fetchall()
+
+        return records
+
+    def select_products_for_pricing(self, last_id, limit, session):
+        # 할인가 계산에 필요한 상품 데이터를 id 순서로 나눠서 가져오기
+        products = session.execute(text("""
+            SELECT
+                id,
+                price,
+                discount_rate,
+                discount_price,
+                discount_start_date,
+                discount_end_date
+            FROM products
+            WHERE
+                id > :last_id
+            ORDER BY id
+            LIMIT :limit
+        """), {'last_id': last_id, 'limit': limit}).fetchall()
+
+        return products
+
+    def select_products_by_id(self, product_id_list, session):
+        # 여러 상품의 가격, 할인 데이터 가져오기
+        products = session.execute(text("""
+            SELECT
+                id,
+                price,
+                is_discount,
+                discount_rate,
+                discount_price,
+                discount_start_date,
+                discount_end_date
+            FROM products
+            WHERE
+                id IN :product_id_list
+            ORDER BY id
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list}).fetchall()
+
+        return products
+
+    def update_products_bulk(self, product_id_list, columns, discount_prices, session):
+        # 여러 상품의 주어진 컬럼만 한 번의 UPDATE 로 수정하기
+        # columns         : {컬럼명: 값}, 모든 상품에 같은 값으로 수정
+        # discount_prices : [{'id': 상품 id, 'discount_price': 할인가, 'is_discount': 할인 여부}, ...], 상품마다 다른 값
+        sets = []
+        params = {'product_id_list': product_id_list}
+
+        for column, value in columns.items():
+            if column not in self.BULK_UPDATE_COLUMNS:
+                raise ValueError('invalid column {}'.format(column))
+
+            sets.append('{0} = :{0}'.format(column))
+            params[column] = value
+
+        if discount_prices:
+            price_cases = []
+            discount_cases = []
+            for idx, product in enumerate(discount_prices):
+                price_cases.append('WHEN :id_{0} THEN :price_{0}'.format(idx))
+                discount_cases.append('WHEN :id_{0} THEN :is_discount_{0}'.format(idx))
+                params['id_{}'.format(idx)] = product['id']
+                params['price_{}'.format(idx)] = product['discount_price']
+                params['is_discount_{}'.format(idx)] = product['is_discount']
+
+            sets.append('discount_price = CASE id {} ELSE discount_price END'.format(' '.join(price_cases)))
+            sets.append('is_discount = CASE id {} ELSE is_discount END'.format(' '.join(discount_cases)))
+
+        update_row = session.execute(text("""
+            UPDATE
+                products
+            SET
+                {}
+            WHERE
+                id IN :product_id_list
+        """.format(',\n                '.join(sets))).bindparams(bindparam('product_id_list', expanding=True)),
+            params).rowcount
+
+        if update_row != len(product_id_list):
+            raise NoAffectedRowException(500, 'update_products_bulk update error')
+
+    def update_discount_prices(self, discount_prices, session):
+        # 여러 상품의 할인가를 한 번의 UPDATE 로 수정하기
+        # discount_prices : [{'id': 상품 id, 'discount_price': 할인가}, ...]
+        if not discount_prices:
+            return
+
+        cases = []
+        params = {'product_id_list': []}
+        for idx, product in enumerate(discount_prices):
+            cases.append('WHEN :id_{0} THEN :price_{0}'.format(idx))
+            params['id_{}'.format(idx)] = product['id']
+            params['price_{}'.format(idx)] = product['discount_price']
+            params['product_id_list'].append(product['id'])
+
+        update_row = session.execute(text("""
+            UPDATE
+                products
+            SET
+                discount_price = CASE id {} END
+            WHERE
+                id IN :product_id_list
+        """.format(' '.join(cases))).bindparams(bindparam('product_id_list', expanding=True)), params).rowcount
+
+        if update_row == 0:
+            raise NoAffectedRowException(500, 'update_discount_prices update error')
+
+    def select_discount_window_changes(self, now, limit, session):
+        # 할인 기간이 시작되었는데 할인 중이 아니거나, 할인 기간이 끝났는데 할인 중인 상품 가져오기
+        # 시작 날짜가 없으면 PricingEngine 처럼 이미 시작된 것으로 봄
+        # discount_start_date, discount_end_date 인덱스를 각각 사용하도록 세 구문을 UNION
+        products = session.execute(text("""
+            SELECT
+                id,
+                is_discount,
+                price,
+                discount_rate,
+                discount_price,
+                discount_start_date,
+                discount_end_date
+            FROM products
+            WHERE
+                discount_start_date <= :now
+            AND
+                (discount_end_date IS NULL OR discount_end_date >= :now)
+            AND
+                is_discount = 0
+            AND
+                discount_rate > 0
+            UNION ALL
+            SELECT
+                id,
+                is_discount,
+                price,
+                discount_rate,
+                discount_price,
+                discount_start_date,
+                discount_end_date
+            FROM products
+            WHERE
+                discount_start_date IS NULL
+            AND
+                (discount_end_date IS NULL OR discount_end_date >= :now)
+            AND
+                is_discount = 0
+            AND
+                discount_rate > 0
+            UNION ALL
+            SELECT
+                id,
+                is_discount,
+                price,
+                discount_rate,
+                discount_price,
+                discount_start_date,
+                discount_end_date
+            FROM products
+            WHERE
+                discount_end_date < :now
+            AND
+                is_discount = 1
+            ORDER BY id
+            LIMIT :limit
+        """), {'now': now, 'limit': limit}).fetchall()
+
+        return products
+
+    def update_discount_status(self, product_id_list, is_discount, session):
+        # 여러 상품의 할인 여부를 한 번에 수정하기
+        update_row = session.execute(text("""
+            UPDATE
+                products
+            SET
+                is_discount = :is_discount
+            WHERE
+                id IN :product_id_list
+        """).bindparams(bindparam('product_id_list', expanding=True)), {
+            'is_discount': is_discount,
+            'product_id_list': product_id_list}).rowcount
+
+        if update_row != len(product_id_list):
+            raise NoAffectedRowException(500, 'update_discount_status update error')
+
+    def insert_product_records_bulk(self, product_id_list, close_time, session):
+        # 여러 상품의 현재 이력을 닫고 현재 상품 데이터로 새 이력을 한 번에 등록하기
+        session.execute(text("""
+            UPDATE
+                product_records
+            SET
+                close_time = {now}
+            WHERE
+                product_id IN :product_id_list
+            AND
+                close_time = :close_time
+        """.format(now=get_dialect(session).now)).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list,
+            'close_time': close_time})
+
+        record_row = session.execute(text("""
+            INSERT INTO product_records (
+                seller_id,
+                product_id,
+                product_name,
+                price,
+                discount_rate,
+                start_time,
+                close_time,
+                main_image
+            )
+            SELECT
+                seller_id,
+                id,
+                name,
+                price,
+                discount_rate,
+                {now},
+                :close_time,
+                main_image
+            FROM products
+            WHERE
+                id IN :product_id_list
+        """.format(now=get_dialect(session).now)).bindparams(bindparam('product_id_list', expanding=True)), {
+            'product_id_list': product_id_list,
+            'close_time': close_time}).rowcount
+
+        if record_row != len(product_id_list):
+            raise NoAffectedRowException(500, 'insert_product_records_bulk insert error')
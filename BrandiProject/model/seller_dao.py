@@ -1,5 +1,6 @@
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from exceptions import NoAffectedRowException, NoDataException
+from .dialect import get_dialect
 
 
 class SellerDao:
@@ -50,11 +51,11 @@ class SellerDao:
                 seller_status_id,
                 seller_id
             ) VALUES (
-                now(),
+                {now},
                 1,
                 :seller_id
             )
-        """), {'seller_id': seller_id}).rowcount
+        """.format(now=get_dialect(session).now)), {'seller_id': seller_id}).rowcount
 
         if history_row == 0:
             raise NoAffectedRowException(500, 'insert_seller status history insert error')
@@ -76,6 +77,70 @@ class SellerDao:
 
         return seller if seller else None
 
+    def insert_refresh_token(self, refresh_token, session):
+        # 리프레시 토큰 저장하기 ( 토큰 원문이 아닌 해시값만 저장 )
+        token_row = session.execute(text("""
+            INSERT INTO refresh_tokens (
+                seller_id,
+                token_hash,
+                expire_time
+            ) VALUES (
+                :seller_id,
+                :token_hash,
+                :expire_time
+            )
+        """), refresh_token).rowcount
+
+        if token_row == 0:
+            raise NoAffectedRowException(500, 'insert_refresh_token insert error')
+
+    def get_refresh_token(self, token_hash, session):
+        # 해시값으로 리프레시 토큰과 셀러 상태 가져오기
+        refresh_token = session.execute(text("""
+            SELECT
+                a.id,
+                a.seller_id,
+                a.expire_time,
+                a.is_revoked,
+                b.is_delete,
+                b.seller_status_id
+            FROM refresh_tokens a
+            JOIN sellers b
+            ON a.seller_id = b.id
+            WHERE
+                a.token_hash = :token_hash
+        """), {'token_hash': token_hash}).fetchone()
+
+        return refresh_token if refresh_token else None
+
+    def revoke_refresh_token(self, token_id, session):
+        # 사용된 리프레시 토큰 폐기하기, 이미 폐기된 토큰이면 0 반환
+        revoke_row = session.execute(text("""
+            UPDATE
+                refresh_tokens
+            SET
+                is_revoked = 1
+            WHERE
+                id = :id
+            AND
+                is_revoked = 0
+        """), {'id': token_id}).rowcount
+
+        return revoke_row
+
+    def revoke_seller_refresh_tokens(self, seller_id_list, session):
+        # 셀러들의 모든 리프레시 토큰 폐기하기 ( 발급된 토큰이 없을 수도 있어서 row 수 확인하지 않음 )
+        session.execute(text("""
+            UPDATE
+                refresh_tokens
+            SET
+                is_revoked = 1
+            WHERE
+                seller_id IN :seller_id_list
+            AND
+                is_revoked = 0
+        """).bindparams(bindparam('seller_id_list', expanding=True)), {'seller_id_list': seller_id_list})
+
     def get_seller_information(self, seller_id, session):
         # 셀러 정보 관리 - 셀러 정보 가져오기
         seller = session.execute(text("""
@@ -142,7 +207,7 @@ class SellerDao:
         return seller_status
 
     def update_seller_information(self, seller, session):   # 셀러정보관리 페이지 update
-        # 셀러정보관리 페이지 업데이트
+        # 셀러정보관리 페이지 업데이트 ( 셀러 상태는 status_change 로 변경 )
         update_row = session.execute(text("""
             UPDATE
                 sellers
@@ -159,7 +224,6 @@ class SellerDao:
                 detail_address              = :detail_address,
                 delivery_information        = :delivery_information,
                 refund_exchange_information = :refund_exchange_information,
-                seller_status_id            = :seller_status_id,
                 brand_name_korean           = :brand_name_korean,
                 brand_name_english          = :brand_name_english,
                 brand_crm_number            = :brand_crm_number
@@ -328,170 +392,168 @@ class SellerDao:
 
         return {'seller_list': [dict(row) for row in seller_list], 'total_count': total_count['cnt']}
 
-    # 셀러 상태 입점으로 변경
-    def status_change_store(self, seller_id, session):
-        update_row = session.execute(text("""
-            UPDATE
-                sellers
-            SET 
-                seller_status_id = 2
-            WHERE
-                id = :id
-            """), {'id': seller_id}).rowcount
-
-        if update_row == 0:
-            raise NoAffectedRowException(500, 'status_change_store update error')
-
-        history_row = session.execute(text("""
-            INSERT INTO seller_status_histories (
-                update_time,
+    def insert_status_events(self, seller_id_list, now, session):
+        # 셀러 상태 변경 알림을 outbox 에 저장하기 ( 상태 변경과 같은 트랜잭션 )
+        event_row = session.execute(text("""
+            INSERT INTO seller_status_events (
+                seller_id,
                 seller_status_id,
-                seller_id
-            ) VALUES (
-                now(),
-                2,
-                :seller_id
+                next_attempt_time
             )
-        """), {'seller_id': seller_id}).rowcount
-
-        if history_row == 0:
-            raise NoAffectedRowException(500, 'status_change_store insert error')
-
-    # 셀러 상태 퇴점 대기 상태로 변경
-    def status_change_closed_wait(self, seller_id, session):
-        update_row = session.execute(text("""
-            UPDATE
-                sellers
-            SET 
-                seller_status_id = 4
+            SELECT
+                id,
+                seller_status_id,
+                :now
+            FROM sellers
             WHERE
-                id = :id
-            """), {'id': seller_id}).rowcount
+                id IN :seller_id_list
+        """).bindparams(bindparam('seller_id_list', expanding=True)), {
+            'seller_id_list': seller_id_list,
+            'now': now}).rowcount
 
-        if update_row == 0:
-            raise NoAffectedRowException(500, 'status_change_closed_wait update error')
+        if event_row != len(seller_id_list):
+            raise NoAffectedRowException(500, 'insert_status_events insert error')
 
-        history_row = session.execute(text("""
-            INSERT INTO seller_status_histories (
-                update_time,
-                seller_status_id,
-                seller_id
-            ) VALUES (
-                now(),
-                4,
-                :seller_id
-            )
-        """), {'seller_id': seller_id}).rowcount
+    def claim_status_events(self, claim_token, now, lease_time, limit, session):
+        # 전송할 알림을 가져오기, 다른 worker 가 같은 알림을 보내지 않도록 lease_time 까지 선점
+        event_ids = session.execute(text("""
+            SELECT
+                id
+            FROM seller_status_events
+            WHERE
+                sent_time IS NULL
+            AND
+                next_attempt_time <= :now
+            ORDER BY id
+            LIMIT :limit
+        """), {'now': now, 'limit': limit}).fetchall()
 
-        if history_row == 0:
-            raise NoAffectedRowException(500, 'status_change_closed_wait insert error')
+        if not event_ids:
+            return []
 
-    # 셀러상태 휴점 상태로 변경
-    def status_change_temporarily_closed(self, seller_id, session):
-        update_row = session.execute(text("""
+        session.execute(text("""
             UPDATE
-                sellers
-            SET 
-                seller_status_id = 3
+                seller_status_events
+            SET
+                claim_token = :claim_token,
+                next_attempt_time = :lease_time
             WHERE
-                id = :id
-            """), {'id': seller_id}).rowcount
-
-        if update_row == 0:
-            raise NoAffectedRowException(500, 'status_change_temporarily_closed update error')
-            
-        history_row = session.execute(text("""
-            INSERT INTO seller_status_histories (
-                update_time,
+                id IN :event_ids
+            AND
+                sent_time IS NULL
+            AND
+                next_attempt_time <= :now
+        """).bindparams(bindparam('event_ids', expanding=True)), {
+            'claim_token': claim_token,
+            'lease_time': lease_time,
+            'now': now,
+            'event_ids': [row['id'] for row in event_ids]})
+
+        events = session.execute(text("""
+            SELECT
+                id,
+                seller_id,
                 seller_status_id,
-                seller_id
-            ) VALUES (
-                now(),
-                3,
-                :seller_id
-            )
-        """), {'seller_id': seller_id}).rowcount
+                attempts,
+                created_at
+            FROM seller_status_events
+            WHERE
+                claim_token = :claim_token
+            ORDER BY id
+        """), {'claim_token': claim_token}).fetchall()
 
-        if history_row == 0:
-            raise NoAffectedRowException(500, 'status_change_temporarily_closed insert error')
+        return events
 
-    # 셀러상태 입점 거절로 변경
-    def status_change_refused_store(self, seller_id, session):
-        update_row = session.execute(text("""
+    def mark_status_events_sent(self, event_ids, now, session):
+        # 전송된 알림 처리하기
+        session.execute(text("""
             UPDATE
-                sellers
-            SET 
-                seller_status_id = 6,
-                is_delete = True
+                seller_status_events
+            SET
+                sent_time = :now,
+                claim_token = NULL
             WHERE
-                id = :id
-            """), {'id': seller_id}).rowcount
+                id IN :event_ids
+        """).bindparams(bindparam('event_ids', expanding=True)), {'event_ids': event_ids, 'now': now})
 
-        if update_row == 0:
-            raise NoAffectedRowException(500, 'status_change_refused_store update error')
+    def retry_status_events(self, event_ids, next_attempt_time, session):
+        # 전송 실패한 알림의 재시도 횟수와 다음 전송 시간 수정하기
+        session.execute(text("""
+            UPDATE
+                seller_status_events
+            SET
+                attempts = attempts + 1,
+                next_attempt_time = :next_attempt_time,
+                claim_token = NULL
+            WHERE
+                id IN :event_ids
+        """).bindparams(bindparam('event_ids', expanding=True)), {
+            'event_ids': event_ids,
+            'next_attempt_time': next_attempt_time})
 
-        history_row = session.execute(text("""
-            INSERT INTO seller_status_histories (
-                update_time,
-                seller_status_id,
-                seller_id
-            ) VALUES (
-                now(),
-                6,
-                :seller_id
-            )
-        """), {'seller_id': seller_id}).rowcount
+    def get_status_id_list(self, seller_id_list, session):
+        # 여러 셀러의 입점상태 한 번에 가져오기
+        seller_status = session.execute(text("""
+            SELECT
+                id,
+                seller_status_id
+            FROM sellers
+            WHERE
+                id IN :seller_id_list
+        """).bindparams(bindparam('seller_id_list', expanding=True)), {'seller_id_list': seller_id_list}).fetchall()
 
-        if history_row == 0:
-            raise NoAffectedRowException(500, 'status_change_refused_store insert error')
+        return seller_status
 
-    def status_change_closed_store(self, seller_id, session):
-        # 셀러상태 퇴점으로 변경
+    def status_change(self, seller_id_list, transition, session):
+        # 셀러 상태 변경하기 ( 버튼별 변경 규칙은 seller_service.STATUS_TRANSITIONS )
+        # 변경 가능한 상태인 셀러만 업데이트 되기 때문에 상태를 미리 조회하지 않아도 됨
         update_row = session.execute(text("""
             UPDATE
                 sellers
-            SET 
-                seller_status_id = 5,
-                is_delete = True
+            SET
+                seller_status_id = :seller_status_id,
+                is_delete = CASE WHEN :is_delete THEN True ELSE is_delete END
             WHERE
-                id = :id
-            """), {'id': seller_id}).rowcount
-
+                id IN :seller_id_list
+            AND
+                seller_status_id IN :from_status
+        """).bindparams(bindparam('seller_id_list', expanding=True), bindparam('from_status', expanding=True)), {
+            'seller_status_id': transition['status'],
+            'is_delete': transition['is_delete'],
+            'from_status': list(transition['from_status']),
+            'seller_id_list': seller_id_list}).rowcount
+
+        # 변경 가능한 셀러가 없으면 0 반환
         if update_row == 0:
-            raise NoAffectedRowException(500, 'status_change_closed_store update error')
+            return update_row
 
-        # 셀러 상태 히스토리 등록 하기
+        # 일부 셀러만 변경되었으면 ( 조회 후 다른 요청이 상태를 바꾼 경우 ) 에러 발생
+        if update_row != len(seller_id_list):
+            raise NoAffectedRowException(500, 'status_change update error')
+
+        # 셀러 상태 히스토리 등록하기, 변경된 상태를 같은 구문에서 읽어서 저장
         history_row = session.execute(text("""
             INSERT INTO seller_status_histories (
                 update_time,
                 seller_status_id,
                 seller_id
-            ) VALUES (
-                now(),
-                5,
-                :seller_id
             )
-        """), {'seller_id': seller_id}).rowcount
-
-        if history_row == 0:
-            raise NoAffectedRowException(500, 'status_change_closed_store insert error')
-
-    def get_status_id(self, seller_id, session):
-        # 셀러 입점상태 가져오기
-        seller_status_id = session.execute(text("""
             SELECT
-                seller_status_id
+                {now},
+                seller_status_id,
+                id
             FROM sellers
-            WHERE 
-                id = :id
-            """), {'id': seller_id}).fetchone()
+            WHERE
+                id IN :seller_id_list
+        """.format(now=get_dialect(session).now)).bindparams(bindparam('seller_id_list', expanding=True)), {
+            'seller_id_list': seller_id_list}).rowcount
 
-        if seller_status_id is None:
-            raise NoDataException(500, 'get_status_id select error')
+        if history_row != update_row:
+            raise NoAffectedRowException(500, 'status_change insert error')
 
-        return seller_status_id
+        return update_row
 
-    def select_home_data(self, session):
+    def count_products(self, session):
         # 상품 총 개수
         total_products = session.execute(text("""
             SELECT
@@ -499,6 +561,9 @@ class SellerDao:
             FROM products
         """)).fetchone()
 
+        return total_products['cnt']
+
+    def count_display_products(self, session):
         # 노출 상품 총 개수
         display_products = session.execute(text("""
             SELECT 
@@ -508,48 +573,43 @@ class SellerDao:
                 is_display = 1
         """)).fetchone()
 
-        # 상품 준비 총 개수
-        prepare_shipment = session.execute(text("""
-            SELECT
-                count(*) as cnt
-            FROM order_details
-            WHERE
-                order_status_id = 1
-        """)).fetchone()
+        return display_products['cnt']
 
-        # 배송 완료 총 개수
-        complete_shipment = session.execute(text("""
+    def count_order_details(self, order_status_id, session):
+        # 주문 상태별 주문 상품 총 개수 ( 상품 준비 : 1, 배송 완료 : 3 )
+        order_details = session.execute(text("""
             SELECT
                 count(*) as cnt
             FROM order_details
             WHERE
-                order_status_id = 3
-        """)).fetchone()
+                order_status_id = :order_status_id
+        """), {'order_status_id': order_status_id}).fetchone()
+
+        return order_details['cnt']
+
+    def select_daily_orders(self, days, session):
+        dialect = get_dialect(session)
 
-        # 최근 30 일간의 결제완료된 주문건수 및 총 금액
+        # 최근 days 일간의 결제완료된 주문건수 및 총 금액
         total_count_price = session.execute(text("""
             SELECT 
-                DATE_FORMAT (a.created_at, '%Y%m%d') AS date, 
+                {date} AS date, 
                 count(*) AS count,
-                cast(sum(b.total_price) AS signed) AS price
+                {price} AS price
             FROM orders a
             JOIN order_details b
             ON a.id = b.order_id 
-            WHERE a.created_at > DATE_SUB(NOW(), INTERVAL 30 day)
+            WHERE a.created_at > {start}
             GROUP BY 
                 date 
             ORDER BY date              
-        """)).fetchall()
+        """.format(date=dialect.date_format('a.created_at', '%Y%m%d'), price=dialect.to_integer('sum(b.total_price)'),
+                   start=dialect.days_ago(days)))).fetchall()
 
-        return {'total_count': total_products['cnt'],
-                'display_count': display_products['cnt'],
-                'prepare_count': prepare_shipment['cnt'],
-                'complete_count': complete_shipment['cnt'],
-                'count_and_price': [dict(row) for row in total_count_price]
-                }
+        return [dict(row) for row in total_count_price]
 
     def update_seller_information_master(self, seller, session):
-        # 마스터가 셀러정보를 업데이트할 때
+        # 마스터가 셀러정보를 업데이트할 때 ( 셀러 상태는 status_change 로 변경 )
         update_row = session.execute(text("""
             UPDATE
                 sellers
@@ -566,7 +626,6 @@ class SellerDao:
                 detail_address              = :detail_address,
                 delivery_information        = :delivery_information,
                 refund_exchange_information = :refund_exchange_information,
-                seller_status_id            = :seller_status_id,
                 brand_name_korean           = :brand_name_korean,
                 brand_name_english          = :brand_name_english,
                 brand_crm_number            = :brand_crm_number,
@@ -0,0 +1,21 @@
+from sqlalchemy import text
+
+
+class WorkerLeaseDao:
+
+    def acquire_lease(self, name, owner, now, lease_time, session):
+        # 실행 권한이 비어 있거나 ( lease_time 이 지남 ) 이미 가지고 있으면 lease_time 까지 가져오기
+        # 같은 row 를 수정하기 때문에 여러 프로세스가 동시에 실행해도 트랜잭션이 끝날 때까지 한 곳만 가져감
+        lease_row = session.execute(text("""
+            UPDATE
+                worker_leases
+            SET
+                owner = :owner,
+                lease_time = :lease_time
+            WHERE
+                name = :name
+            AND
+                (owner = :owner OR lease_time < :now)
+        """), {'name': name, 'owner': owner, 'now': now, 'lease_time': lease_time}).rowcount
+
+        return lease_row == 1
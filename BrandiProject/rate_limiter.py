@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBucketStore:
+    """
+    프로세스 내부 메모리에 token bucket 상태를 저장
+    키가 max_keys 를 넘으면 가장 오래 사용되지 않은 버킷부터 삭제
+    """
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        # 마지막 사용 이후 채워진 만큼 토큰을 더하고 1개를 사용, 토큰이 없으면 False
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+
+            return allowed
+
+    def give_back(self, key, capacity):
+        # 사용한 토큰 1개를 돌려줌, 시간은 그대로 두어서 채워지는 양에는 영향 없음
+        with self.lock:
+            if key in self.buckets:
+                tokens, updated = self.buckets[key]
+                self.buckets[key] = (min(capacity, tokens + 1), updated)
+
+
+class SqliteBucketStore:
+    """
+    같은 서버의 여러 worker 프로세스가 token bucket 을 공유하도록 로컬 sqlite 파일에 저장
+    """
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        connection = self._connect()
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS login_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tokens     REAL NOT NULL,
+                updated    REAL NOT NULL
+            )
+        """)
+
+    def _connect(self):
+        # sqlite 커넥션은 쓰레드끼리 공유할 수 없어서 쓰레드마다 하나씩 사용
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, capacity, refill_rate, now):
+        connection = self._connect()
+        # 다른 worker 와 동시에 같은 버킷을 수정하지 않도록 쓰기 잠금을 먼저 잡음
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT tokens, updated FROM login_buckets WHERE bucket_key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            connection.execute(
+                'INSERT OR REPLACE INTO login_buckets (bucket_key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return allowed
+
+    def give_back(self, key, capacity):
+        connection = self._connect()
+        connection.execute(
+            'UPDATE login_buckets SET tokens = MIN(?, tokens + 1) WHERE bucket_key = ?', (capacity, key))
+
+
+class LoginRateLimiter:
+    """
+    계정별, 클라이언트 IP 별 로그인 시도 횟수 제한 ( token bucket )
+    IP 버킷은 모든 시도를 세고, 계정 버킷은 로그인에 성공하면 돌려줘서 실패한 시도만 셈
+    ( 성공한 로그인까지 세면 자주 로그인하는 셀러의 계정이 잠길 수 있음 )
+
+    burst      : 한 번에 허용하는 최대 시도 횟수
+    per_minute : 1분마다 다시 채워지는 시도 횟수
+    """
+    def __init__(self, store, account_burst, account_per_minute, ip_burst, ip_per_minute):
+        self.store = store
+        self.account_limit = (account_burst, account_per_minute / 60)
+        self.ip_limit = (ip_burst, ip_per_minute / 60)
+        self.counts = {'allowed': 0, 'throttled_account': 0, 'throttled_ip': 0, 'succeeded': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        store_path = config.get('LOGIN_RATE_LIMIT_STORE')
+        store = SqliteBucketStore(store_path) if store_path else MemoryBucketStore()
+
+        return cls(store,
+                   config.get('LOGIN_ACCOUNT_BURST', 5),
+                   config.get('LOGIN_ACCOUNT_PER_MINUTE', 5),
+                   config.get('LOGIN_IP_BURST', 20),
+                   config.get('LOGIN_IP_PER_MINUTE', 30))
+
+    def allow(self, account, ip):
+        # IP 버킷이 비어 있으면 계정 버킷은 사용하지 않음
+        now = time.monotonic() if isinstance(self.store, MemoryBucketStore) else time.time()
+
+        if not self.store.take('ip:{}'.format(ip), *self.ip_limit, now):
+            self.counts['throttled_ip'] += 1
+            return False
+
+        if account is not None and not self.store.take('account:{}'.format(account), *self.account_limit, now):
+            self.counts['throttled_account'] += 1
+            return False
+
+        self.counts['allowed'] += 1
+        return True
+
+    def succeeded(self, account):
+        # 로그인에 성공하면 allow 에서 사용한 계정 버킷의 토큰을 돌려줌
+        self.counts['succeeded'] += 1
+        if account is not None:
+            self.store.give_back('account:{}'.format(account), self.account_limit[0])
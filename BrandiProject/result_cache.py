@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+
+# 데이터를 바꾸는 sql 의 대상 테이블 ( DAO 의 INSERT, UPDATE, DELETE 는 모두 테이블 하나만 바꿈 )
+WRITE_PATTERN = re.compile(r'^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)', re.I)
+
+
+def changed_table(statement):
+    match = WRITE_PATTERN.match(statement)
+    return match.group(1).lower() if match else None
+
+
+def normalize(params):
+    # 값이 없는 필터는 빼고 이름순으로 정렬해서, 같은 조건이면 파라미터 순서와 상관없이 같은 키가 되도록 함
+    return tuple(sorted((name, value) for name, value in params.items() if value is not None))
+
+
+class ResultCache:
+    """
+    관리자 리스트 ( 상품, 주문, 셀러 ) 의 페이지와 총 개수를 ( 리스트, 셀러, 필터 조건 ) 별로 저장
+
+    - 저장한 결과는 조회한 테이블 이름을 같이 기록하고, 세션이 커밋될 때 그 트랜잭션에서 INSERT, UPDATE, DELETE 한
+      테이블의 버전을 올려서 해당 테이블을 읽은 결과만 무효화 ( 커밋 전이나 롤백된 변경은 무효화하지 않음 )
+    - 다른 서버 프로세스의 변경은 알 수 없어서 ttl 초가 지나면 다시 조회
+    - max_entries 개를 넘으면 가장 오래 사용되지 않은 결과부터 삭제 ( 0 이면 사용하지 않음 ),
+      limit 이 max_limit 보다 큰 페이지는 저장하지 않음
+    """
+    def __init__(self, max_entries=1000, ttl=60, max_limit=100):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_limit = max_limit
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'stale': 0, 'skipped': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def stats(self):
+        # 리스트별 개수가 요청 중에 추가되기 때문에 /metrics 에는 복사본을 보여줌
+        with self.lock:
+            return dict(self.counts, entries=len(self.entries))
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('RESULT_CACHE_SIZE', 1000), config.get('RESULT_CACHE_TTL_SECONDS', 60),
+                   config.get('RESULT_CACHE_MAX_LIMIT', 100))
+
+    def init_app(self, app, engine, session_factory):
+        app.extensions['result_cache'] = self
+
+        event.listen(engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(session_factory, 'after_begin', self.after_begin)
+        event.listen(session_factory, 'after_commit', self.after_commit)
+        event.listen(session_factory, 'after_rollback', self.after_rollback)
+
+    def after_begin(self, session, transaction, connection):
+        # 트랜잭션에서 바꾼 테이블을 세션과 연결 양쪽에서 같은 set 으로 참조
+        if transaction.parent is not None:
+            return
+
+        changes = set()
+        connection.info['result_cache_changes'] = changes
+        session.info['result_cache_changes'] = changes
+        session.info['result_cache_generation'] = self.generation
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        changes = conn.info.get('result_cache_changes')
+        if changes is None:
+            return
+
+        table = changed_table(statement)
+        if table is not None:
+            changes.add(table)
+
+    def after_commit(self, session):
+        session.info.pop('result_cache_generation', None)
+        changes = session.info.pop('result_cache_changes', None)
+        if changes:
+            self.invalidate(changes)
+
+    def after_rollback(self, session):
+        session.info.pop('result_cache_generation', None)
+        session.info.pop('result_cache_changes', None)
+
+    def invalidate(self, tables):
+        # 테이블 버전을 올리면 그 전에 조회한 결과는 다음 get_or_load 에서 버려짐
+        with self.lock:
+            self.generation += 1
+            for table in tables:
+                self.versions[table] = self.generation
+            self.counts['invalidations'] += 1
+
+    def get_or_load(self, session, namespace, scope, params, tables, load):
+        """ 저장된 결과가 있으면 돌려주고, 없으면 load() 로 조회해서 저장하기
+
+        Args:
+            session   : db 연결
+            namespace : 리스트 이름 ( product_list, order_list, seller_list )
+            scope     : 조회한 셀러 id
+            params    : 필터 조건 딕셔너리
+            tables    : load 가 조회하는 테이블 이름
+            load      : 결과를 조회하는 함수
+
+        Returns:
+            결과 ( 저장된 결과는 여러 요청이 같이 사용하기 때문에 수정하지 않음 )
+
+        """
+        if self.max_entries <= 0 or (params.get('limit') or 0) > self.max_limit:
+            return load()
+
+        key = (namespace, scope, normalize(params))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, generation, entry_tables, expire_time = entry
+                if expire_time > time.monotonic() \
+                        and all(self.versions.get(table, 0) <= generation for table in entry_tables):
+                    self.entries.move_to_end(key)
+                    self.count(namespace, 'hits')
+                    return value
+
+                del self.entries[key]
+                self.counts['stale'] += 1
+
+            self.count(namespace, 'misses')
+
+            # 트랜잭션이 이미 시작됐으면 시작할 때의 세대를 기준으로 함 ( 그 뒤에 커밋된 변경은 보이지 않을 수 있음 )
+            generation = session.info.get('result_cache_generation', self.generation)
+
+        value = load()
+
+        with self.lock:
+            # 조회하는 동안 읽은 테이블이 바뀌었으면 이전 데이터일 수 있어서 저장하지 않음
+            if any(self.versions.get(table, 0) > generation for table in tables):
+                self.counts['skipped'] += 1
+                return value
+
+            self.entries[key] = (value, generation, tuple(tables), time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counts['evictions'] += 1
+
+        return value
+
+    def count(self, namespace, stat):
+        # 전체 개수와 리스트별 개수 ( product_list_hits ... ) 를 같이 올림, lock 을 잡은 상태에서 호출
+        self.counts[stat] += 1
+        name = '{}_{}'.format(namespace, stat)
+        self.counts[name] = self.counts.get(name, 0) + 1
@@ -1,9 +1,17 @@
 from .seller_service  import SellerService
 from .product_service import ProductService
 from .order_service import OrderService
+from .pricing_engine import PricingEngine
+from .product_import import ProductImportReader
+from .idempotency_service import IdempotencyService
+from .fan_out import QueryFanOut
 
 __all__ = [
     'SellerService',
     'ProductService',
-    'OrderService'
+    'OrderService',
+    'PricingEngine',
+    'ProductImportReader',
+    'IdempotencyService',
+    'QueryFanOut'
 ]
\ No newline at end of file
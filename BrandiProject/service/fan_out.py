@@ -0,0 +1,113 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import sessionmaker
+from model.dialect import create_database_engine
+
+
+class QueryFanOut:
+    """
+    서로 관계없는 읽기 쿼리 ( DAO 메소드 ) 를 작은 쓰레드 풀에서 동시에 실행하고 결과를 모으기
+
+    - 첫 번째 쿼리는 요청의 세션에서 실행하고, 나머지는 쓰레드마다 별도 세션 ( 전용 커넥션 풀 ) 에서 실행
+    - 커넥션 풀 크기를 쓰레드 수와 같게 해서, 쿼리가 요청이 쓰는 커넥션 풀을 기다리거나 그 풀을 비우지 않음
+    - 쓰레드 풀은 프로세스 전체가 같이 쓰기 때문에 요청 1번은 쓰레드를 per_request ( FAN_OUT_PER_REQUEST, 기본 2 ) 개까지만
+      사용하고, 나머지 쿼리는 묶어서 같은 쓰레드에서 차례로 실행
+    - 쓰레드가 모두 다른 요청의 쿼리를 실행 중이면 기다리지 않고 요청 쓰레드에서 차례로 실행 ( 요청끼리 줄을 서지 않음 ),
+      workers ( FAN_OUT_WORKERS, 기본 4 ) 는 동시에 fan-out 하는 요청 수 x per_request 정도로 설정
+    - 별도 세션은 요청 트랜잭션의 커밋되지 않은 변경을 볼 수 없기 때문에 데이터를 바꾸지 않는 조회에만 사용
+    - contextvars 를 복사해서 실행하기 때문에 요청별 sql 구문 수 ( metrics.RequestStats ) 에 같이 더해짐
+    - workers 가 0 이거나 SQLite ( 데이터베이스 전체 잠금, 메모리 데이터베이스는 커넥션 하나 ) 이면 요청의 세션에서 차례로 실행
+    """
+    def __init__(self, engine=None, workers=0, per_request=2):
+        self.engine = engine
+        self.workers = workers if engine is not None else 0
+        self.per_request = max(1, min(per_request, self.workers or 1))
+        self.session_factory = sessionmaker(bind=engine, autocommit=False) if self.workers else None
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='fan-out') if self.workers else None
+
+        # 비어 있는 쓰레드 수, 쓰레드가 없으면 executor 에 넘기지 않고 요청 쓰레드에서 실행
+        self.free_workers = threading.BoundedSemaphore(self.workers) if self.workers else None
+        self.lock = threading.Lock()
+        self.stats = {'fan_outs': 0, 'parallel_queries': 0, 'sequential_queries': 0, 'saturated': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        workers = config.get('FAN_OUT_WORKERS', 4)
+        if not workers or make_url(config['DB_URL']).get_backend_name() == 'sqlite':
+            return cls()
+
+        return cls(create_database_engine(config['DB_URL'], pool_size=workers), workers,
+                   config.get('FAN_OUT_PER_REQUEST', 2))
+
+    def run(self, session, *calls):
+        """ ( DAO 메소드, 인자 ... ) 를 동시에 실행하고 결과를 같은 순서로 돌려주기
+
+        DAO 메소드는 인자 뒤에 세션을 받아서 실행함 ( method(*args, session) )
+        쿼리 중 하나라도 실패하면 모든 쿼리가 끝난 뒤 첫 번째 에러를 그대로 올림
+        동시에 실행하는 쿼리는 요청 쓰레드의 1개와 쓰레드 풀의 per_request 개까지
+
+        Args:
+            session : 요청의 db 연결
+            *calls  : ( DAO 메소드, 인자 ... ) 튜플
+
+        Returns:
+            results : 쿼리 결과 리스트
+
+        """
+        if self.executor is None or len(calls) < 2:
+            with self.lock:
+                self.stats['sequential_queries'] += len(calls)
+            return [method(*args, session) for method, *args in calls]
+
+        # 첫 번째 쿼리를 뺀 나머지를 per_request 개로 묶어서 묶음마다 쓰레드 하나에서 실행
+        indexed_calls = list(enumerate(calls))
+        groups = [indexed_calls[1:][idx::self.per_request]
+                  for idx in range(min(self.per_request, len(calls) - 1))]
+
+        # 요청 쓰레드도 놀지 않도록 첫 번째 쿼리는 요청의 세션으로 직접 실행
+        # 비어 있는 쓰레드가 없는 묶음도 기다리지 않고 요청 쓰레드에서 실행
+        futures = []
+        inline = indexed_calls[:1]
+        for group in groups:
+            if self.free_workers.acquire(blocking=False):
+                futures.append(self.executor.submit(contextvars.copy_context().run, self.execute, group))
+            else:
+                inline.extend(group)
+
+        with self.lock:
+            self.stats['fan_outs'] += 1 if futures else 0
+            self.stats['parallel_queries'] += len(calls) - len(inline)
+            self.stats['sequential_queries'] += len(inline) - 1
+            self.stats['saturated'] += 1 if len(futures) < len(groups) else 0
+
+        results = [None] * len(calls)
+        try:
+            for idx, (method, *args) in inline:
+                results[idx] = method(*args, session)
+        finally:
+            errors = [future.exception() for future in futures]
+
+        for error in errors:
+            if error is not None:
+                raise error
+
+        for future in futures:
+            for idx, result in future.result():
+                results[idx] = result
+
+        return results
+
+    def execute(self, group):
+        # 묶음의 쿼리를 별도 세션 하나에서 차례로 실행하고 ( 순서, 결과 ) 리스트 돌려주기
+        try:
+            session = self.session_factory()
+            try:
+                return [(idx, method(*args, session)) for idx, (method, *args) in group]
+
+            finally:
+                session.close()
+
+        finally:
+            self.free_workers.release()
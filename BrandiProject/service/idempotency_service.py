@@ -0,0 +1,172 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+
+class IdempotencyService:
+    """
+    Idempotency-Key 헤더로 같은 요청이 다시 들어오면 처음 요청의 응답을 그대로 돌려주기
+
+    키는 처리 전에 idempotency_keys 에 먼저 등록해서 같은 키의 요청이 동시에 처리되지 않도록 하고,
+    처리가 끝나면 응답을 저장함. 저장된 응답은 메모리 캐시 ( LRU ) 에도 두어서 재시도는 데이터베이스까지 가지 않음
+
+    등록 후 claim lease ( IDEMPOTENCY_CLAIM_LEASE_SECONDS, 기본 60 초 ) 가 지나도 응답이 저장되지 않은 키는
+    처리하던 프로세스가 죽은 것으로 보고 같은 요청의 재시도가 다시 등록해서 처리함
+    ( lease 는 주문 처리에 걸리는 가장 긴 시간보다 길어야 같은 주문이 두 번 처리되지 않음 )
+    """
+    def __init__(self, idempotency_dao, config):
+        self.idempotency_dao = idempotency_dao
+        self.ttl = timedelta(hours=config.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+        self.claim_lease = timedelta(seconds=config.get('IDEMPOTENCY_CLAIM_LEASE_SECONDS', 60))
+        self.cache_size = config.get('IDEMPOTENCY_CACHE_SIZE', 10000)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'claimed': 0, 'reclaimed': 0, 'replayed': 0, 'cache_hits': 0, 'in_progress': 0,
+                      'key_reused': 0}
+
+    @staticmethod
+    def request_hash(method, path, body):
+        # 같은 키로 다른 요청을 보냈는지 확인하기 위한 요청 해시
+        return hashlib.sha256(b'\n'.join([method.encode(), path.encode(), body])).hexdigest()
+
+    def begin(self, seller_id, idempotency_key, request_hash, session):
+        """ 키를 등록해서 처음 들어온 요청인지 확인하기
+
+        Args:
+            seller_id       : 셀러 id
+            idempotency_key : Idempotency-Key 헤더 값
+            request_hash    : 요청 해시
+            session         : db 연결
+
+        Returns:
+            None                : 처음 들어온 요청이거나 claim lease 가 지난 키를 다시 등록했을 때,
+                                  처리가 끝나면 complete 호출
+            'in progress'       : 같은 키의 요청이 아직 처리 중일 때
+            'key reused'        : 같은 키로 다른 요청을 보냈을 때
+            stored              : 이미 처리된 요청의 응답 ( status_code, response_body )
+
+        """
+        stored = self.get_cached(seller_id, idempotency_key)
+        if stored is not None:
+            self.stats['cache_hits'] += 1
+            return self.replay(stored, request_hash)
+
+        now = datetime.now()
+        try:
+            self.idempotency_dao.insert_key({
+                'seller_id':        seller_id,
+                'idempotency_key':  idempotency_key,
+                'request_hash':     request_hash,
+                'claim_time':       now,
+                'expire_time':      now + self.ttl
+            }, session)
+            self.stats['claimed'] += 1
+            return None
+
+        except IntegrityError:
+            stored = self.idempotency_dao.select_key(seller_id, idempotency_key, session)
+
+        # 키를 등록한 요청이 아직 응답을 저장하지 않았거나, 그 사이 만료되어 삭제된 경우
+        if stored is None or stored['status_code'] is None:
+            if stored is not None and stored['request_hash'] != request_hash:
+                self.stats['key_reused'] += 1
+                return 'key reused'
+
+            # 처리하던 요청이 claim lease 안에 응답을 저장하지 못했으면 이 요청이 다시 처리
+            if stored is not None and self.idempotency_dao.reclaim_key({
+                'seller_id':        seller_id,
+                'idempotency_key':  idempotency_key,
+                'request_hash':     request_hash,
+                'claim_time':       now,
+                'stale_time':       now - self.claim_lease,
+                'expire_time':      now + self.ttl
+            }, session):
+                self.stats['reclaimed'] += 1
+                return None
+
+            self.stats['in_progress'] += 1
+            return 'in progress'
+
+        stored = {'request_hash': stored['request_hash'], 'status_code': stored['status_code'],
+                  'response_body': stored['response_body'], 'expire_time': stored['expire_time']}
+        self.set_cached(seller_id, idempotency_key, stored)
+
+        return self.replay(stored, request_hash)
+
+    def complete(self, seller_id, idempotency_key, request_hash, status_code, response_body, session):
+        """ 처리가 끝난 요청의 응답 저장하기
+
+        서버 에러 ( 5xx ) 는 다시 시도할 수 있도록 응답을 저장하지 않고 키를 삭제
+
+        Args:
+            seller_id       : 셀러 id
+            idempotency_key : Idempotency-Key 헤더 값
+            request_hash    : 요청 해시
+            status_code     : 응답 상태 코드
+            response_body   : 응답 body
+            session         : db 연결
+
+        Returns:
+
+        """
+        if status_code >= 500:
+            self.idempotency_dao.delete_key(seller_id, idempotency_key, session)
+            return
+
+        self.idempotency_dao.update_response({
+            'seller_id':        seller_id,
+            'idempotency_key':  idempotency_key,
+            'status_code':      status_code,
+            'response_body':    response_body
+        }, session)
+
+        self.set_cached(seller_id, idempotency_key, {
+            'request_hash':     request_hash,
+            'status_code':      status_code,
+            'response_body':    response_body,
+            'expire_time':      datetime.now() + self.ttl
+        })
+
+    def replay(self, stored, request_hash):
+        if stored['request_hash'] != request_hash:
+            self.stats['key_reused'] += 1
+            return 'key reused'
+
+        self.stats['replayed'] += 1
+        return stored['status_code'], stored['response_body']
+
+    def get_cached(self, seller_id, idempotency_key):
+        with self.lock:
+            stored = self.cache.get((seller_id, idempotency_key))
+            if stored is None:
+                return None
+
+            if stored['expire_time'] < datetime.now():
+                del self.cache[(seller_id, idempotency_key)]
+                return None
+
+            self.cache.move_to_end((seller_id, idempotency_key))
+            return stored
+
+    def set_cached(self, seller_id, idempotency_key, stored):
+        with self.lock:
+            self.cache[(seller_id, idempotency_key)] = stored
+            self.cache.move_to_end((seller_id, idempotency_key))
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def delete_expired_keys(self, now, batch_size, session):
+        """ 만료된 키를 batch_size 개 삭제하기
+
+        Args:
+            now        : 기준 시간
+            batch_size : 한 번에 삭제할 키 개수
+            session    : db 연결
+
+        Returns:
+            삭제된 키 개수
+
+        """
+        return self.idempotency_dao.delete_expired_keys(now, batch_size, session)
@@ -1,10 +1,16 @@
+from datetime import datetime
 from config import shipment_button, order_status
+from result_cache import ResultCache
+
+# 주문 리스트가 조회하는 테이블 ( 이 테이블이 바뀌면 저장된 리스트 무효화 )
+ORDER_LIST_TABLES = ('orders', 'order_details', 'order_status_histories', 'products', 'options', 'sellers')
 
 
 class OrderService:
-    def __init__(self, order_dao, seller_dao):
+    def __init__(self, order_dao, seller_dao, result_cache=None):
         self.order_dao = order_dao
         self.seller_dao = seller_dao
+        self.result_cache = result_cache or ResultCache(max_entries=0)
 
     def get_product_data(self, product_id, session):
         """ 상품 구매할 때 구매하려는 상품의 정보 가져오기
@@ -21,11 +27,8 @@ class OrderService:
         product = dict()
         product['id'] = product_data['id']
 
-        if product_data['discount_rate'] != 0:
-            # 할인 금액은 10단위부터라고 되어 있음
-            product['price'] = round(int(product_data['price']*(100-product_data['discount_rate'])/100), -1)
-        else:
-            product['price'] = product_data['price']
+        # 판매가는 할인 기간이 반영된 할인가 ( PricingEngine 으로 계산해서 저장된 값 )
+        product['price'] = product_data['discount_price']
 
         # 옵션 정보, 컬러 id 와 이름, 사이즈 id 와 이름 가져오기
         option_data = self.order_dao.select_product_option(product_id, session)
@@ -44,6 +47,7 @@ class OrderService:
 
         Returns:
             invalid count : 주문수량과 재고수량이 맞지 않을 때
+            invalid price : 총 결제금액이 할인가 x 주문수량과 맞지 않을 때
 
         """
         # 상품 최소 판매 수량, 최대 판매 수량 데이터 가져오기
@@ -65,11 +69,91 @@ class OrderService:
                 or product_data['minimum_sell_count'] > order_data['count']:
             return 'invalid count'
 
+        # 클라이언트가 보낸 총 결제금액을 저장된 할인가로 확인
+        if order_data['total_price'] != product_data['discount_price'] * order_data['count']:
+            return 'invalid price'
+
         # 주문할 때 옵션의 재고수량 변경 후에 옵션 아이디 가져와서 주문 테이블에 넣기
         option_id = self.order_dao.change_option_inventory(order_data, session)
 
         self.order_dao.insert_order_data(order_data, option_id, seller_id, session)
 
+    def order_products(self, order_data, order_lines, seller_id, session):
+        """ 여러 상품을 하나의 주문으로 주문하기
+
+        옵션들을 id 순서로 잠근 다음 재고를 확인하고 줄이기 때문에 동시에 주문해도 데드락이 생기지 않음
+        주문은 1개, 주문 상세는 상품마다 1개씩 한 번에 저장
+
+        Args:
+            order_data  : 주문자 데이터, 총 결제금액
+            order_lines : 주문 상품 리스트 [{ 상품 id, 컬러 id, 사이즈 id, 주문 수량 }]
+            seller_id   : 셀러 id
+            session     : db 연결
+
+        Returns:
+            invalid option : 상품이나 옵션이 없을 때
+            invalid count  : 주문수량과 재고수량, 최소/최대 판매 수량이 맞지 않을 때
+            invalid price  : 총 결제금액이 할인가 x 주문수량의 합과 맞지 않을 때
+            order_id       : 주문 id
+
+        """
+        # 같은 옵션을 여러 번 보낸 경우 수량을 합쳐서 한 줄로 만들기
+        lines = {}
+        for line in order_lines:
+            key = (line['product_id'], line['color_id'], line['size_id'])
+            lines[key] = lines.get(key, 0) + line['count']
+
+        product_id_list = list({key[0] for key in lines})
+        products = {product['id']: product
+                    for product in self.order_dao.select_products_for_order(product_id_list, session)}
+        option_ids = {(option['product_id'], option['color_id'], option['size_id']): option['id']
+                      for option in self.order_dao.select_options_for_order(product_id_list, session)}
+
+        if any(key[0] not in products or key not in option_ids for key in lines):
+            return 'invalid option'
+
+        # 옵션 id 순서로 잠그고 잠근 뒤의 재고 수량으로 확인
+        options = {option['id']: option
+                   for option in self.order_dao.lock_options([option_ids[key] for key in lines], session)}
+
+        total_price = 0
+        option_counts = []
+        for key, count in lines.items():
+            product = products[key[0]]
+            option = options[option_ids[key]]
+
+            if count < product['minimum_sell_count'] or count > product['maximum_sell_count']:
+                return 'invalid count'
+
+            if option['is_inventory_manage'] == 1:
+                if option['count'] < count:
+                    return 'invalid count'
+                option_counts.append({'id': option['id'], 'count': count})
+
+            total_price += product['discount_price'] * count
+
+        if order_data['total_price'] != total_price:
+            return 'invalid price'
+
+        if option_counts:
+            self.order_dao.decrease_option_counts(sorted(option_counts, key=lambda option: option['id']), session)
+
+        order_id = self.order_dao.insert_order(order_data, session)
+
+        # 주문 상세 번호는 주문 번호 뒤에 상품 순서 2자리를 붙임
+        detail_number = datetime.today().strftime("%Y%m%d") + '%06d' % order_id
+        self.order_dao.insert_order_details([{
+            'order_id':         order_id,
+            'product_id':       key[0],
+            'detail_number':    detail_number + '%02d' % idx,
+            'count':            count,
+            'option_id':        option_ids[key],
+            'total_price':      products[key[0]]['discount_price'] * count,
+            'seller_id':        seller_id
+        } for idx, (key, count) in enumerate(lines.items(), 1)], session)
+
+        return order_id
+
     def get_order_product_list(self, query_string_list, session):
         """ 주문 리스트 가져오기
 
@@ -83,6 +167,12 @@ class OrderService:
 
         상품 준비 관리 : 1  / 배송중 관리 : 2  / 배송완료 관리 : 3  / 구매확정 관리 : 4
         """
+        # 같은 셀러가 같은 필터로 다시 조회하면 저장된 결과 사용
+        return self.result_cache.get_or_load(
+            session, 'order_list', query_string_list['seller_id'], query_string_list, ORDER_LIST_TABLES,
+            lambda: self.load_order_product_list(query_string_list, session))
+
+    def load_order_product_list(self, query_string_list, session):
         order_products = self.order_dao.select_order_products(query_string_list, session)
         orders = order_products['order_list']
         order_list = []
@@ -163,8 +253,57 @@ class OrderService:
             order_data : 주문 상세 데이터
 
         """
-        order = self.order_dao.select_order_details(order_id, session)
+        order_details = self.order_dao.select_order_details(order_id, session)
+
+        # 주문 상태 변경 이력 가져오기
+        histories = self.order_dao.select_order_histories(order_id, session)
+
+        return self.build_order_details(order_details, histories)
+
+    def get_orders_details(self, order_id_list, session):
+        """ 여러 주문의 상세 데이터 한 번에 가져오기
+
+        주문 상세, 상태 변경 이력을 IN 쿼리 한 번씩으로 가져와서 주문별로 묶음
+
+        Args:
+            order_id_list : 주문 id 리스트 ( 중복은 한 번만 가져옴 )
+            session       : db 연결
+
+        Returns:
+            orders : 요청한 순서대로 주문 상세 데이터 리스트 ( 주문 id 포함 ), 없는 주문 id 리스트
+
+        """
+        order_id_list = list(dict.fromkeys(order_id_list))
+
+        order_details = {}
+        for detail in self.order_dao.select_orders_details(order_id_list, session):
+            order_details.setdefault(detail['order_id'], []).append(detail)
+
+        histories = {order_id: [] for order_id in order_details}
+        if order_details:
+            for history in self.order_dao.select_orders_histories(list(order_details), session):
+                histories[history['order_id']].append(history)
+
+        return {
+            'orders':  [dict(self.build_order_details(order_details[order_id], histories[order_id]), order_id=order_id)
+                        for order_id in order_id_list if order_id in order_details],
+            'missing': [order_id for order_id in order_id_list if order_id not in order_details]
+        }
+
+    def build_order_details(self, order_details, histories):
+        """ 주문 상세페이지 응답 만들기
+
+        Args:
+            order_details : 주문한 상품마다 한 줄인 주문 상세 데이터
+            histories     : 주문 상태 변경 이력
+
+        Returns:
+            order_data : 주문 상세 데이터
+
+        """
+        order = order_details[0]
 
+        # 주문 정보와 첫 번째 상품 정보는 기존처럼 바로 넣고, 주문한 모든 상품은 order_products 에 넣어줌
         order_data = {
             'detail_number':    order['detail_number'],
             'number':           order['number'],
@@ -175,8 +314,7 @@ class OrderService:
             'product_name':     order['name'],
             'price':            order['price'],
             'discount_rate':    order['discount_rate'],
-            'discount_price':   round(int(order['price']*(100-order['discount_rate'])/100), -1)
-                                if order['discount_rate'] != 0 else 0,
+            'discount_price':   order['discount_price'] if order['discount_rate'] != 0 else 0,
             'count':            order['count'],
             'user_name':        order['user_name'],
             'phone_number':     order['phone_number'],
@@ -187,8 +325,21 @@ class OrderService:
             'color_name':       order['color_name']
         }
 
-        # 주문 상태 변경 이력 가져오기
-        histories = self.order_dao.select_order_histories(order_id, session)
+        order_data['order_products'] = [{
+            'detail_number':    detail['detail_number'],
+            'order_status_id':  detail['order_status_id'],
+            'product_name':     detail['name'],
+            'price':            detail['price'],
+            'discount_rate':    detail['discount_rate'],
+            'discount_price':   detail['discount_price'] if detail['discount_rate'] != 0 else 0,
+            'count':            detail['count'],
+            'product_number':   detail['id'],
+            'total_price':      detail['total_price'],
+            'brand_name':       detail['brand_name_korean'],
+            'size_name':        detail['size_name'],
+            'color_name':       detail['color_name']
+        } for detail in order_details]
+
         data = []
 
         # 히스토리 시간 형태 바꾸기 위해서 for 문 실행
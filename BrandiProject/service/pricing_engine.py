@@ -0,0 +1,66 @@
+from datetime import datetime
+
+
+class PricingEngine:
+    """
+    상품 할인가 계산
+
+    할인율이 있고 현재 시간이 할인 기간 ( discount_start_date ~ discount_end_date ) 안이면 할인가, 아니면 정가
+    할인 기간의 시작, 끝 날짜가 없으면 그쪽은 기간 제한이 없는 것으로 봄
+    할인 금액은 10원 단위부터라서 10원 단위로 반올림
+
+    계산된 값은 products.discount_price 에 저장해서 리스트 필터링, 정렬과 주문 금액 확인에 사용
+    """
+    DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+    def is_discount_active(self, product, now=None):
+        # 할인 기간 안에 있는 할인 상품인지 확인
+        if not product['discount_rate']:
+            return False
+
+        now = now or datetime.now()
+        start_date = self.to_datetime(product['discount_start_date'])
+        end_date = self.to_datetime(product['discount_end_date'])
+
+        if start_date is not None and now < start_date:
+            return False
+
+        if end_date is not None and now > end_date:
+            return False
+
+        return True
+
+    def discount_price(self, product, now=None):
+        # 상품 1개의 할인가 ( 할인 중이 아니면 정가 )
+        if not self.is_discount_active(product, now):
+            return product['price']
+
+        return round(int(product['price']*(100-product['discount_rate'])/100), -1)
+
+    def apply(self, products, now=None):
+        """ 여러 상품의 할인가를 같은 기준 시간으로 한 번에 계산하기
+
+        Args:
+            products : price, discount_rate, discount_start_date, discount_end_date 를 가진 상품 리스트
+            now      : 기준 시간, 없으면 현재 시간
+
+        Returns:
+            discount_prices : products 와 같은 순서의 할인가 리스트
+
+        """
+        now = now or datetime.now()
+
+        return [self.discount_price(product, now) for product in products]
+
+    def to_datetime(self, value):
+        # 요청 Body 로 들어온 날짜 문자열은 datetime 으로 변환
+        if value is None or isinstance(value, datetime):
+            return value
+
+        for date_format in self.DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+
+        raise ValueError('invalid discount date {}'.format(value))
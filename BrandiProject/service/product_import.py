@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+from .pricing_engine import PricingEngine
+
+
+class ProductImportReader:
+    """
+    상품 일괄 등록 파일 ( CSV, JSON lines ) 을 한 줄씩 읽으면서 상품 등록 API 와 같은 규칙으로 유효성 검사
+
+    파일 전체를 메모리에 올리지 않고 업로드 스트림에서 한 줄씩 읽음
+    CSV 의 options, image_list 컬럼은 JSON 문자열로 받음
+    """
+    FORMATS = ('csv', 'jsonl')
+
+    # ( 키, 타입, 필수 여부, 허용 값 ) - POST /product/register 의 validate_params 와 같은 규칙
+    FIELDS = (
+        ('sub_categories_id',   int,  True,  None),
+        ('name',                str,  True,  None),
+        ('main_image',          str,  True,  None),
+        ('is_sell',             int,  True,  (0, 1)),
+        ('is_display',          int,  True,  (0, 1)),
+        ('is_discount',         int,  True,  (0, 1)),
+        ('price',               int,  True,  None),
+        ('detail',              str,  True,  None),
+        ('maximum_sell_count',  int,  True,  None),
+        ('minimum_sell_count',  int,  True,  None),
+        ('options',             list, True,  None),
+        ('discount_rate',       int,  False, None),
+        ('discount_start_date', str,  False, None),
+        ('discount_end_date',   str,  False, None),
+        ('simple_information',  str,  False, None),
+        ('manufacturer',        str,  False, None),
+        ('manufacture_date',    str,  False, None),
+        ('origin',              str,  False, None),
+        ('image_list',          list, False, None)
+    )
+
+    # 상품 등록 API 에서 옵션마다 꼭 있어야 하는 키
+    OPTION_KEYS = ('color_id', 'size_id', 'is_inventory_manage')
+
+    def __init__(self, stream, file_format, encoding='utf-8-sig'):
+        if file_format not in self.FORMATS:
+            raise ValueError('invalid file format {}'.format(file_format))
+
+        self.file = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        self.file_format = file_format
+        self.pricing_engine = PricingEngine()
+
+    def __iter__(self):
+        """ 파일을 한 줄씩 읽어서 ( 줄 번호, 상품 데이터, 에러 리스트 ) 를 돌려줌
+
+        에러 리스트가 비어 있으면 상품 데이터는 등록할 수 있는 상태
+        """
+        rows = self.read_csv() if self.file_format == 'csv' else self.read_jsonl()
+
+        for row_number, row in rows:
+            if isinstance(row, str):
+                yield row_number, None, [row]
+                continue
+
+            product_data, errors = self.validate(row, from_text=self.file_format == 'csv')
+            yield row_number, product_data, errors
+
+    def read_csv(self):
+        # 헤더 다음 줄부터 1번
+        for row_number, row in enumerate(csv.DictReader(self.file), 1):
+            if None in row:
+                yield row_number, 'too many columns'
+                continue
+
+            yield row_number, row
+
+    def read_jsonl(self):
+        for row_number, line in enumerate(self.file, 1):
+            if not line.strip():
+                continue
+
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield row_number, 'invalid json'
+                continue
+
+            yield row_number, row if isinstance(row, dict) else 'row must be an object'
+
+    def validate(self, row, from_text):
+        """ 한 줄의 데이터를 타입 변환하고 유효성 검사하기
+
+        Args:
+            row       : 파일에서 읽은 한 줄
+            from_text : CSV 처럼 모든 값이 문자열인지 여부
+
+        Returns:
+            product_data : 상품 등록에 쓰는 상품 데이터
+            errors       : 에러 메세지 리스트
+
+        """
+        product_data = {}
+        errors = []
+
+        for key, value_type, required, allowed in self.FIELDS:
+            value = row.get(key)
+            if from_text and value == '':
+                value = None
+
+            if value is None:
+                if required:
+                    errors.append('{} is required'.format(key))
+                product_data[key] = None
+                continue
+
+            try:
+                value = self.to_type(value, value_type, from_text)
+            except ValueError:
+                errors.append('{} must be {}'.format(key, value_type.__name__))
+                continue
+
+            if allowed is not None and value not in allowed:
+                errors.append('{} must be one of {}'.format(key, allowed))
+                continue
+
+            product_data[key] = value
+
+        # 옵션 안의 키값들이 None 이면 상품 등록 API 와 같이 에러
+        for option in product_data.get('options') or []:
+            if not isinstance(option, dict) or any(option.get(key) is None for key in self.OPTION_KEYS):
+                errors.append('option data not exist')
+                break
+            option.setdefault('count', None)
+
+        for image in product_data.get('image_list') or []:
+            if not isinstance(image, dict) or not image.get('image'):
+                errors.append('image data not exist')
+                break
+
+        # 할인가 계산에 쓰는 날짜 형식 확인
+        for key in ('discount_start_date', 'discount_end_date'):
+            try:
+                self.pricing_engine.to_datetime(product_data.get(key))
+            except ValueError:
+                errors.append('{} invalid date'.format(key))
+
+        return product_data, errors
+
+    @staticmethod
+    def to_type(value, value_type, from_text):
+        if value_type is int:
+            # JSON 의 true, false 는 int 로 받지 않음
+            if isinstance(value, bool) or isinstance(value, float):
+                raise ValueError
+            return int(value)
+
+        if value_type is list:
+            if from_text:
+                value = json.loads(value)
+            if not isinstance(value, list):
+                raise ValueError
+            return value
+
+        if not isinstance(value, str):
+            raise ValueError
+        return value
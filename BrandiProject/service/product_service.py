@@ -1,9 +1,18 @@
+from datetime import datetime
 from config import product_record
+from result_cache import ResultCache
+from .fan_out import QueryFanOut
+
+# 상품 관리 리스트가 조회하는 테이블 ( 이 테이블이 바뀌면 저장된 리스트 무효화 )
+PRODUCT_LIST_TABLES = ('products', 'sellers')
 
 
 class ProductService:
-    def __init__(self, product_dao):
+    def __init__(self, product_dao, pricing_engine, result_cache=None, fan_out=None):
         self.product_dao = product_dao
+        self.pricing_engine = pricing_engine
+        self.result_cache = result_cache or ResultCache(max_entries=0)
+        self.fan_out = fan_out or QueryFanOut()
 
     def get_category_color_size(self, session):
         """ 상품등록 페이지에 1차카테고리, 컬러, 사이즈 리스트 받아오기
@@ -15,14 +24,12 @@ class ProductService:
             data_list : 카테고리, 컬러, 사이즈 리스트
 
         """
-        # 1차 카테고리 리스트 가져오기
-        category_list = self.product_dao.select_category_list(session)
-
-        # 컬러 리스트 가져오기
-        color_list = self.product_dao.select_color_list(session)
-
-        # 사이즈 리스트 가져오기
-        size_list = self.product_dao.select_size_list(session)
+        # 1차 카테고리, 컬러, 사이즈 리스트를 동시에 가져오기
+        category_list, color_list, size_list = self.fan_out.run(
+            session,
+            (self.product_dao.select_category_list,),
+            (self.product_dao.select_color_list,),
+            (self.product_dao.select_size_list,))
 
         return {'categories': [dict(row) for row in category_list],
                 'colors': [dict(row) for row in color_list],
@@ -40,6 +47,10 @@ class ProductService:
         """
         # 선분이력 close_time 값 넣어주기
         product_data['close_time'] = product_record['CLOSE_TIME']
+
+        # 할인가 계산해서 같이 저장하기, 할인 여부는 지금 할인 기간인지에 따라 정해짐
+        product_data['discount_price'] = self.pricing_engine.discount_price(product_data)
+        product_data['is_discount'] = int(self.pricing_engine.is_discount_active(product_data))
         product_id = self.product_dao.insert_product_data(product_data, session)
 
         # 옵션리스트에 ordering 을 지정해서 데이터베이스에 넣어주기
@@ -56,6 +67,108 @@ class ProductService:
                 image['product_id'] = product_id
                 self.product_dao.insert_data_sub_image(image, session)
 
+    def import_products(self, product_list, seller_id, session):
+        """ 상품 여러 개를 한 번에 등록하기 ( 상품 일괄 등록 )
+
+        상품은 id 가 필요해서 한 줄씩 등록하고 code_number, 옵션, 서브 이미지, 선분이력은 묶어서 한 번에 등록
+
+        Args:
+            product_list : 유효성 검사를 통과한 상품 데이터 리스트
+            seller_id    : 셀러 id
+            session      : db 연결
+
+        Returns:
+            product_id_list : 등록된 상품 id 리스트 ( product_list 와 같은 순서 )
+
+        """
+        for product_data in product_list:
+            product_data['seller_id'] = seller_id
+            product_data['discount_price'] = self.pricing_engine.discount_price(product_data)
+            product_data['is_discount'] = int(self.pricing_engine.is_discount_active(product_data))
+
+        product_id_list = self.product_dao.insert_products(product_list, session)
+
+        # 옵션리스트에 상품 id 와 ordering 을 지정해서 모든 상품의 옵션을 한 번에 넣어주기
+        option_list = []
+        image_list = []
+        for product_id, product_data in zip(product_id_list, product_list):
+            for ordering, option in enumerate(product_data['options'], 1):
+                option_list.append(dict(option, product_id=product_id, ordering=ordering))
+
+            for image in product_data['image_list'] or []:
+                image_list.append(dict(image, product_id=product_id))
+
+        if option_list:
+            self.product_dao.insert_options(option_list, session)
+
+        if image_list:
+            self.product_dao.insert_sub_images(image_list, session)
+
+        # 선분이력은 products 에 저장된 값으로 한 번에 등록
+        self.product_dao.insert_product_records_bulk(product_id_list, product_record['CLOSE_TIME'], session)
+
+        return product_id_list
+
+    def patch_products(self, product_id_list, columns, session):
+        """ 여러 상품의 판매 여부, 진열 여부, 가격, 할인 정보를 한 번에 수정하기
+
+        주어진 컬럼만 수정하고, 가격이나 할인율이 실제로 바뀐 상품만 선분이력을 닫고 새로 등록
+
+        Args:
+            product_id_list : 수정할 상품 id 리스트
+            columns         : 수정할 컬럼과 값 ( 값이 None 인 컬럼은 수정하지 않음 )
+            session         : db 연결
+
+        Returns:
+            'invalid request' : 수정할 컬럼이 없을 때
+            result            : 수정된 상품 id 리스트, 존재하지 않는 상품 id 리스트, 이력이 추가된 상품 개수
+
+        """
+        columns = {column: value for column, value in columns.items() if value is not None}
+
+        if not columns:
+            return 'invalid request'
+
+        # 중복된 상품 id 제거 ( 순서는 유지 )
+        product_id_list = list(dict.fromkeys(product_id_list))
+        products = self.product_dao.select_products_by_id(product_id_list, session)
+        found_id_list = [product['id'] for product in products]
+        found_ids = set(found_id_list)
+        result = {
+            'updated': found_id_list,
+            'not_exist': [product_id for product_id in product_id_list if product_id not in found_ids],
+            'record_count': 0
+        }
+
+        if not products:
+            return result
+
+        # 가격, 할인 정보가 바뀌는 경우에만 상품마다 할인가를 다시 계산
+        discount_prices = []
+        record_id_list = []
+        if any(column not in ('is_sell', 'is_display') for column in columns):
+            now = datetime.now()
+            for product in products:
+                patched = dict(product, **columns)
+                discount_price = self.pricing_engine.discount_price(patched, now)
+                is_discount = int(self.pricing_engine.is_discount_active(patched, now))
+
+                if discount_price != product['discount_price'] or is_discount != product['is_discount']:
+                    discount_prices.append({'id': product['id'], 'discount_price': discount_price,
+                                            'is_discount': is_discount})
+
+                # 선분이력에는 가격과 할인율이 남기 때문에 둘 중 하나가 바뀐 상품만 이력 추가
+                if patched['price'] != product['price'] or patched['discount_rate'] != product['discount_rate']:
+                    record_id_list.append(product['id'])
+
+        self.product_dao.update_products_bulk(found_id_list, columns, discount_prices, session)
+
+        if record_id_list:
+            self.product_dao.insert_product_records_bulk(record_id_list, product_record['CLOSE_TIME'], session)
+            result['record_count'] = len(record_id_list)
+
+        return result
+
     def get_sub_categories(self, category_id, session):
         """ 1차 카테고리 클릭했을 때 그에 해당하는 2차 카테고리 불러오기
 
@@ -71,26 +184,71 @@ class ProductService:
 
         return sub_category_list
 
-    def get_product(self, product_id, session):
+    def get_product(self, product_id, session, with_detail=True):
         """ 상품 상세페이지 들어갔을 때 등록된 상품 정보 가져오기
 
         Args:
-            product_id : 상품 id
-            session    : db 연결
+            product_id  : 상품 id
+            session     : db 연결
+            with_detail : 상세 설명 ( html ) 을 같이 가져올지 여부, False 이면 get_product_detail 로 따로 가져옴
 
         Returns:
             product : 상품 데이터
 
         """
-        # 상품 데이터 가져오기
-        product_data = self.product_dao.select_product_data(product_id, session)
+        # 상품 데이터와 상품에 해당하는 옵션들, 서브 이미지들을 한 번에 가져오기
+        product_data = self.product_dao.select_product(product_id, with_detail, session)
+
+        return self.build_product(product_data, product_data['options'], product_data['image_list'], with_detail)
 
-        # 상품에 해당하는 옵션들 가져오기
-        option_list = self.product_dao.select_product_options(product_id, session)
+    def get_products(self, product_id_list, session, with_detail=True):
+        """ 여러 상품의 상세 정보 한 번에 가져오기
 
-        # 상품에 해당하는 서브 이미지들 가져오기
-        sub_images = self.product_dao.select_product_images(product_id, session)
+        상품, 옵션, 서브 이미지를 테이블마다 IN 쿼리 한 번으로 가져와서 상품별로 묶음
+
+        Args:
+            product_id_list : 상품 id 리스트 ( 중복은 한 번만 가져옴 )
+            session         : db 연결
+            with_detail     : 상세 설명 ( html ) 을 같이 가져올지 여부
 
+        Returns:
+            products : 요청한 순서대로 상품 데이터 리스트 ( 상품 id 포함 ), 없는 상품 id 리스트
+
+        """
+        product_id_list = list(dict.fromkeys(product_id_list))
+
+        products = {row['id']: row for row in self.product_dao.select_products(product_id_list, with_detail, session)}
+        found_id_list = [product_id for product_id in product_id_list if product_id in products]
+
+        options = {product_id: [] for product_id in found_id_list}
+        image_lists = {product_id: [] for product_id in found_id_list}
+        if found_id_list:
+            for option in self.product_dao.select_options_for_products(found_id_list, session):
+                options[option['product_id']].append(dict(option))
+
+            for image in self.product_dao.select_images_for_products(found_id_list, session):
+                image_lists[image['product_id']].append(dict(image))
+
+        return {
+            'products': [dict(self.build_product(products[product_id], options[product_id],
+                                                 image_lists[product_id], with_detail), id=product_id)
+                         for product_id in found_id_list],
+            'missing':  [product_id for product_id in product_id_list if product_id not in products]
+        }
+
+    def build_product(self, product_data, options, image_list, with_detail):
+        """ 상품 상세페이지 응답 만들기
+
+        Args:
+            product_data : 상품 데이터
+            options      : 옵션 리스트
+            image_list   : 서브 이미지 리스트
+            with_detail  : 상세 설명 ( html ) 포함 여부
+
+        Returns:
+            product : 상품 데이터
+
+        """
         # 새로운 상품 데이터 리스트 만들면서 할인가, 시간 형식 수정
         product = {
             'is_sell':              product_data['is_sell'],
@@ -103,12 +261,10 @@ class ProductService:
             'name':                 product_data['name'],
             'simple_information':   product_data['simple_information'],
             'main_image':           product_data['main_image'],
-            'detail':               product_data['detail'],
             'price':                product_data['price'],
             'discount_rate':        product_data['discount_rate'],
             'is_discount':          product_data['is_discount'],
-            'discount_price':       round(int(product_data['price']*(100-product_data['discount_rate'])/100), -1)
-                                    if product_data['discount_rate'] != 0 else 0,
+            'discount_price':       product_data['discount_price'] if product_data['discount_rate'] != 0 else 0,
             'discount_start_date':  product_data['discount_start_date'].strftime('%Y-%m-%d %H:%M:%S')
                                     if product_data['discount_start_date'] is not None else None,
             'discount_end_date':    product_data['discount_end_date'].strftime('%Y-%m-%d %H:%M:%S')
@@ -116,12 +272,28 @@ class ProductService:
             'minimum_sell_count':   product_data['minimum_sell_count'],
             'maximum_sell_count':   product_data['maximum_sell_count'],
             'code_number':          product_data['code_number'],
-            'options':              [dict(row) for row in option_list],
-            'image_list':           [dict(row) for row in sub_images]
+            'options':              options,
+            'image_list':           image_list
         }
 
+        if with_detail:
+            product['detail'] = product_data['detail']
+
         return product
 
+    def get_product_detail(self, product_id, session):
+        """ 상품 상세 설명 ( html ) 가져오기
+
+        Args:
+            product_id : 상품 id
+            session    : db 연결
+
+        Returns:
+            detail : 상품 상세 설명
+
+        """
+        return {'detail': self.product_dao.select_product_detail(product_id, session)}
+
     def post_update_product(self, product_data, session):
         """ 상품 상세페이지 수정하기
 
@@ -135,6 +307,10 @@ class ProductService:
         # 선분이력 close_time 값 넣어주기
         product_data['close_time'] = product_record['CLOSE_TIME']
 
+        # 할인가 계산해서 같이 저장하기, 할인 여부는 지금 할인 기간인지에 따라 정해짐
+        product_data['discount_price'] = self.pricing_engine.discount_price(product_data)
+        product_data['is_discount'] = int(self.pricing_engine.is_discount_active(product_data))
+
         # 옵션에 상품 id 값 넣어주기
         options = product_data['options']
         for option in options:
@@ -163,6 +339,12 @@ class ProductService:
             product_list : 상품리스트 및 상품리스트의 총 개수
 
         """
+        # 같은 셀러가 같은 필터로 다시 조회하면 저장된 결과 사용
+        return self.result_cache.get_or_load(
+            session, 'product_list', query_string_list['seller_id'], query_string_list, PRODUCT_LIST_TABLES,
+            lambda: self.load_product_list(query_string_list, session))
+
+    def load_product_list(self, query_string_list, session):
         products_data = self.product_dao.select_product_list(query_string_list, session)
         products_list = products_data['product_list']
         product_list = []
@@ -177,7 +359,7 @@ class ProductService:
                 'code_number':          product['code_number'],
                 'price':                product['price'],
                 'discount_rate':        product['discount_rate'],
-                'discount_price':       round(int(product['price']*(100-product['discount_rate'])/100), -1),
+                'discount_price':       product['discount_price'],
                 'is_sell':              product['is_sell'],
                 'is_display':           product['is_display'],
                 'is_discount':          product['is_discount'],
@@ -188,3 +370,128 @@ class ProductService:
             product_list.append(product_data)
 
         return {'product_list': product_list, 'total_count': products_data['total_count']}
+
+    def refresh_discount_prices(self, session, batch_size=1000, now=None):
+        """ 모든 상품의 할인가를 다시 계산해서 저장하기
+
+        id 순서로 batch_size 개씩 나눠서 계산하고, 값이 바뀐 상품만 한 번의 UPDATE 로 수정
+
+        Args:
+            session    : db 연결
+            batch_size : 한 번에 계산할 상품 개수
+            now        : 할인가 계산 기준 시간
+
+        Returns:
+            updated_count : 할인가가 바뀐 상품 개수
+
+        """
+        last_id = 0
+        updated_count = 0
+
+        while True:
+            products = self.product_dao.select_products_for_pricing(last_id, batch_size, session)
+
+            if not products:
+                return updated_count
+
+            discount_prices = self.pricing_engine.apply(products, now)
+            changed = [{'id': product['id'], 'discount_price': discount_price}
+                       for product, discount_price in zip(products, discount_prices)
+                       if product['discount_price'] != discount_price]
+
+            self.product_dao.update_discount_prices(changed, session)
+            updated_count += len(changed)
+            last_id = products[-1]['id']
+
+    def sync_discount_windows(self, now, batch_size, dry_run, session):
+        """ 할인 기간이 시작되거나 끝난 상품들의 할인 여부, 할인가, 선분이력을 한 묶음 수정하기
+
+        Args:
+            now        : 기준 시간
+            batch_size : 한 번에 처리할 상품 개수
+            dry_run    : True 이면 대상 상품만 찾고 수정하지 않음
+            session    : db 연결
+
+        Returns:
+            result : 할인이 시작된 상품 id 리스트, 할인이 끝난 상품 id 리스트, 처리한 상품 개수
+
+        """
+        products = self.product_dao.select_discount_window_changes(now, batch_size, session)
+
+        activated = [product['id'] for product in products if product['is_discount'] == 0]
+        expired = [product['id'] for product in products if product['is_discount'] == 1]
+        result = {'activated': activated, 'expired': expired, 'count': len(products)}
+
+        if dry_run or not products:
+            return result
+
+        # 할인가는 상품마다 다르기 때문에 CASE 로 한 번에 수정
+        discount_prices = self.pricing_engine.apply(products, now)
+        self.product_dao.update_discount_prices(
+            [{'id': product['id'], 'discount_price': discount_price}
+             for product, discount_price in zip(products, discount_prices)
+             if product['discount_price'] != discount_price], session)
+
+        if activated:
+            self.product_dao.update_discount_status(activated, 1, session)
+
+        if expired:
+            self.product_dao.update_discount_status(expired, 0, session)
+
+        self.product_dao.insert_product_records_bulk(activated + expired, product_record['CLOSE_TIME'], session)
+
+        return result
+
+    def get_product_history(self, product_id, at, limit, offset, session):
+        """ 상품 가격 이력 ( 선분이력 ) 가져오기
+
+        Args:
+            product_id : 상품 id
+            at         : 조회 시점, 없으면 전체 이력
+            limit      : pagination 범위
+            offset     : pagination 시작 번호
+            session    : db 연결
+
+        Returns:
+            history : 조회 시점에 유효한 이력 또는 전체 이력 리스트
+
+        """
+        if at is not None:
+            records = self.product_dao.select_product_records_at([product_id], at, session)
+            return {'product_id': product_id,
+                    'at': at,
+                    'record': self.format_record(records[0]) if records else None}
+
+        records = self.product_dao.select_product_records(product_id, limit, offset, session)
+
+        return {'product_id': product_id, 'records': [self.format_record(record) for record in records]}
+
+    def get_product_prices_at(self, product_id_list, at, session):
+        """ 여러 상품의 특정 시점 가격 가져오기
+
+        Args:
+            product_id_list : 상품 id 리스트
+            at              : 조회 시점
+            session         : db 연결
+
+        Returns:
+            prices : 상품 id 별 조회 시점의 이력 ( 그 시점에 이력이 없는 상품은 None )
+
+        """
+        records = self.product_dao.select_product_records_at(product_id_list, at, session)
+        record_map = {record['product_id']: self.format_record(record) for record in records}
+
+        return {'at': at, 'records': [{'product_id': product_id, 'record': record_map.get(product_id)}
+                                      for product_id in product_id_list]}
+
+    @staticmethod
+    def format_record(record):
+        # 선분이력 시간 형식 수정
+        return {
+            'product_name':     record['product_name'],
+            'price':            record['price'],
+            'discount_rate':    record['discount_rate'],
+            'main_image':       record['main_image'],
+            'start_time':       record['start_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            'close_time':       record['close_time'].strftime('%Y-%m-%d %H:%M:%S')
+        }
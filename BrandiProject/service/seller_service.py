@@ -1,16 +1,73 @@
 import jwt
 import bcrypt
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 from flask import current_app
-from slack import WebClient
-from slack.errors import SlackApiError
-from config import slack_channel, status, action_button
+from config import status, action_button
+from exceptions import NoAffectedRowException
+from result_cache import ResultCache
+from .fan_out import QueryFanOut
+
+# 셀러 리스트가 조회하는 테이블 ( 이 테이블이 바뀌면 저장된 리스트 무효화 )
+SELLER_LIST_TABLES = ('sellers', 'manager_informations')
+
+# 홈 화면에 개수를 보여주는 주문 상태 id ( 상품 준비, 배송 완료 )
+PREPARE_PRODUCT = 1
+COMPLETE_SHIPMENT = 3
+
+# 퇴점, 입점거절 상태 id ( 변경되면 소프트 딜리트 처리 )
+CLOSED_STORE = 5
+REFUSED_STORE = 6
+
+ALL_STATUS = {status['STORE_WAIT'], status['STORE'], status['TEMP_CLOSED'], status['CLOSED_WAIT'],
+              CLOSED_STORE, REFUSED_STORE}
+
+# 버튼별 상태 변경 규칙 - status : 변경될 상태, from_status : 버튼을 누를 수 있는 셀러의 상태, is_delete : 소프트 딜리트 여부
+_STORE = {'status': status['STORE'], 'from_status': ALL_STATUS - {status['STORE']}, 'is_delete': False}
+
+STATUS_TRANSITIONS = {
+    # 입점승인, 퇴점철회, 휴점해제 버튼은 입점 상태가 아닐 때 입점으로 변경
+    action_button['STORE_BUTTON']:                  _STORE,
+    action_button['CANCELED_CLOSED_BUTTON']:        _STORE,
+    action_button['CANCELED_TEMP_CLOSED_BUTTON']:   _STORE,
+
+    # 퇴점대기 버튼은 입점대기, 퇴점대기 상태가 아닐 때 퇴점대기로 변경
+    action_button['CLOSED_WAIT_BUTTON']: {
+        'status':       status['CLOSED_WAIT'],
+        'from_status':  ALL_STATUS - {status['STORE_WAIT'], status['CLOSED_WAIT']},
+        'is_delete':    False
+    },
+
+    # 휴점처리 버튼은 입점대기, 휴점 상태가 아닐 때 휴점으로 변경
+    action_button['TEMP_CLOSED_BUTTON']: {
+        'status':       status['TEMP_CLOSED'],
+        'from_status':  ALL_STATUS - {status['STORE_WAIT'], status['TEMP_CLOSED']},
+        'is_delete':    False
+    },
+
+    # 입점거절 버튼은 입점대기 상태일 때만 입점거절로 변경
+    action_button['REFUSE_STORE_BUTTON']: {
+        'status':       REFUSED_STORE,
+        'from_status':  {status['STORE_WAIT']},
+        'is_delete':    True
+    },
+
+    # 퇴점확정 버튼은 퇴점대기 상태일 때만 퇴점으로 변경
+    action_button['CONFIRM_CLOSED_BUTTON']: {
+        'status':       CLOSED_STORE,
+        'from_status':  {status['CLOSED_WAIT']},
+        'is_delete':    True
+    }
+}
 
 
 class SellerService:
-    def __init__(self, seller_dao, config):
+    def __init__(self, seller_dao, config, result_cache=None, fan_out=None):
         self.seller_dao = seller_dao
         self.config = config
+        self.result_cache = result_cache or ResultCache(max_entries=0)
+        self.fan_out = fan_out or QueryFanOut()
 
     def create_new_seller(self, new_seller, session):
         """ 셀러 회원가입
@@ -43,7 +100,7 @@ class SellerService:
             session: db 연결
 
         Returns:
-            access token    : 로그인 성공시 발행
+            tokens          : 로그인 성공시 access token, refresh token 발행
             not exist       : 계정이 존재하지 않을 때
             not authorized  : 셀러의 상태가 입점 대기 상태 일 때
             wrong password  : 비밀번호가 틀렸을 때
@@ -69,11 +126,72 @@ class SellerService:
         if seller_data['is_delete'] == 1:
             return 'deleted account'
 
-        expire = datetime.utcnow() + timedelta(hours=24)
-        access_token = jwt.encode({'seller_id': seller_data['id'], 'exp': expire},
+        return self.issue_tokens(seller_data['id'], session)
+
+    def issue_tokens(self, seller_id, session):
+        """ access token 과 refresh token 발행하기
+
+        refresh token 은 원문을 한 번만 내려주고 데이터베이스에는 sha256 해시값만 저장함
+
+        Args:
+            seller_id : 셀러 id
+            session   : db 연결
+
+        Returns:
+            tokens : access token, refresh token
+
+        """
+        expire = datetime.utcnow() + timedelta(hours=current_app.config.get('ACCESS_TOKEN_EXPIRE_HOURS', 24))
+        access_token = jwt.encode({'seller_id': seller_id, 'exp': expire},
                                   current_app.config['JWT_SECRET_KEY'], current_app.config['ALGORITHM'])
-        
-        return access_token.decode('utf-8')
+
+        refresh_token = secrets.token_urlsafe(32)
+        self.seller_dao.insert_refresh_token({
+            'seller_id':    seller_id,
+            'token_hash':   hashlib.sha256(refresh_token.encode('utf-8')).hexdigest(),
+            'expire_time':  datetime.utcnow() + timedelta(days=current_app.config.get('REFRESH_TOKEN_EXPIRE_DAYS', 14))
+        }, session)
+
+        return {'access_token': access_token.decode('utf-8'), 'refresh_token': refresh_token}
+
+    def refresh_login(self, refresh_token, session):
+        """ refresh token 으로 access token 재발행하기
+
+        bcrypt 비밀번호 확인 없이 해시값 조회만으로 재발행함
+        사용된 refresh token 은 폐기하고 새로운 refresh token 을 같이 발행함 ( rotation )
+
+        Args:
+            refresh_token : 로그인 또는 재발행 때 받은 refresh token
+            session       : db 연결
+
+        Returns:
+            tokens          : 재발행 성공시 access token, refresh token
+            invalid token   : 존재하지 않거나 폐기된 토큰일 때
+            expired token   : 만료된 토큰일 때
+            not authorized  : 셀러의 상태가 입점 대기 상태 일 때
+            deleted account : 소프트 딜리트 된 계정일 때
+
+        """
+        token_hash = hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+        token_data = self.seller_dao.get_refresh_token(token_hash, session)
+
+        if token_data is None or token_data['is_revoked'] == 1:
+            return 'invalid token'
+
+        if token_data['expire_time'] < datetime.utcnow():
+            return 'expired token'
+
+        if token_data['seller_status_id'] == status['STORE_WAIT']:
+            return 'not authorized'
+
+        if token_data['is_delete'] == 1:
+            return 'deleted account'
+
+        # 동시에 같은 토큰으로 재발행 요청이 들어왔을 때 하나만 성공하도록 폐기된 row 수 확인
+        if self.seller_dao.revoke_refresh_token(token_data['id'], session) == 0:
+            return 'invalid token'
+
+        return self.issue_tokens(token_data['seller_id'], session)
 
     def get_my_page(self, seller_id, session):
         """ 셀러 정보 관리 데이터 불러오기
@@ -86,10 +204,12 @@ class SellerService:
             seller_data : 데이터베이스에 저장된 셀러의 정보
 
         """
-        # 셀러상세페이지에 등록된 셀러 데이터 불러오기
-        seller = self.seller_dao.get_seller_information(seller_id, session)
-        manager = self.seller_dao.get_manager_information(seller_id, session)
-        seller_status_histories = self.seller_dao.get_seller_status_histories(seller_id, session)
+        # 셀러상세페이지에 등록된 셀러 데이터 불러오기 ( 세 쿼리를 동시에 실행 )
+        seller, manager, seller_status_histories = self.fan_out.run(
+            session,
+            (self.seller_dao.get_seller_information, seller_id),
+            (self.seller_dao.get_manager_information, seller_id),
+            (self.seller_dao.get_seller_status_histories, seller_id))
 
         seller_data = {
             'id':                           seller['id'],
@@ -135,20 +255,26 @@ class SellerService:
             session     : db 연결
 
         Returns:
+            invalid status : 존재하지 않는 셀러 상태일 때
 
         """
         # 셀러상세페이지 셀러의 정보 데이터베이스에 넣기
         manager_information = seller_data['manager_information']
 
+        if self.change_status(seller_data['id'], seller_data['seller_status_id'], session) == 'invalid status':
+            return 'invalid status'
+
         self.seller_dao.update_seller_information(seller_data, session)
 
         ordering = 1
         for manager in manager_information:
             manager['ordering'] = ordering
             manager['seller_id'] = seller_data['id']
-            self.seller_dao.update_manager_information(manager, session)
             ordering += 1
 
+        # 담당자 정보 업데이트 하기
+        self.seller_dao.update_manager_information(manager_information, seller_data['id'], session)
+
     def get_seller_list(self, query_string_list, seller_id, session):
         """ 마스터가 셀러 리스트 불러오기
 
@@ -169,6 +295,12 @@ class SellerService:
         if is_master['is_master'] == 0:
             return 'not authorized'
 
+        # 같은 마스터가 같은 필터로 다시 조회하면 저장된 결과 사용
+        return self.result_cache.get_or_load(
+            session, 'seller_list', seller_id, query_string_list, SELLER_LIST_TABLES,
+            lambda: self.load_seller_list(query_string_list, session))
+
+    def load_seller_list(self, query_string_list, session):
         seller_list = self.seller_dao.select_seller_list(query_string_list, session)
 
         seller = seller_list['seller_list']
@@ -187,98 +319,128 @@ class SellerService:
             session   : db 연결
 
         Returns:
-            invalid request : 버튼과 버튼이 눌리는 셀러의 상태가 맞지 않을 때
-            message fail    : 슬랙봇 메세지 전송이 실패되었을 때
-
+            invalid request : 버튼과 버튼이 눌리는 셀러의 상태가 맞지 않을 때, 존재하지 않는 버튼이나 셀러일 때
 
         status - 입점대기:1 입점:2 휴점:3 퇴점대기:4 퇴점:5 입점거절:6
         button - 입점거절:1 입점승인:2 휴점처리:3 휴점해제:4 퇴점대기:5 퇴점철회:6 퇴점확정:7
         """
 
-        # 셀러의 상태 체크하기
-        seller_status = self.seller_dao.get_status_id(seller_id, session)
-
-        # 슬랙 api 토큰을 실행할 웹클라이언트를 변수에 저장
-        client = WebClient(token=current_app.config['SLACK_API_TOKEN'])
-
-        # 입점승인, 퇴점철회, 휴점해제 버튼이 눌린 셀러의 상태가 입점이면 에러 발생
-        if button == action_button['STORE_BUTTON'] or \
-                button == action_button['CANCELED_CLOSED_BUTTON'] or \
-                button == action_button['CANCELED_TEMP_CLOSED_BUTTON']:
-            if seller_status['seller_status_id'] == status['STORE']:
-                return 'invalid request'
-
-            self.seller_dao.status_change_store(seller_id, session)
-
-            # try:
-            #     client.chat_postMessage(
-            #         channel=slack_channel['CHANNEL'],
-            #         text=f'id {seller_id}번 셀러의 상태가 입점으로 변경되었습니다.'
-            #     )
-            # except SlackApiError:
-            #     return 'message fail'
-
-        # 퇴점대기 버튼이 눌린 셀러의 상태가  입점대기, 퇴점대기이면 에러 발생
-        if button == action_button['CLOSED_WAIT_BUTTON']:
-            if seller_status['seller_status_id'] == status['STORE_WAIT'] or\
-                    seller_status['seller_status_id'] == status['CLOSED_WAIT']:
-                return 'invalid request'
-
-            self.seller_dao.status_change_closed_wait(seller_id, session)
-
-            # try:
-            #     client.chat_postMessage(
-            #         channel=slack_channel['CHANNEL'],
-            #         text=f'id {seller_id}번 셀러의 상태가 퇴점대기로 변경되었습니다.'
-            #     )
-            # except SlackApiError:
-            #     return 'message fail'
-
-        # 휴점처리 버튼이 눌린 셀러의 상태가 입점대기, 휴점이면 에러 발생
-        if button == action_button['TEMP_CLOSED_BUTTON']:
-            if seller_status['seller_status_id'] == status['STORE_WAIT'] or \
-                    seller_status['seller_status_id'] == status['TEMP_CLOSED']:
-                return 'invalid request'
-
-            self.seller_dao.status_change_temporarily_closed(seller_id, session)
-
-            # try:
-            #     client.chat_postMessage(
-            #         channel=slack_channel['CHANNEL'],
-            #         text=f'id {seller_id}번 셀러의 상태가 휴점으로 변경되었습니다.'
-            #     )
-            # except SlackApiError:
-            #     return 'message fail'
-
-        # 입점거절 버튼이 눌린 셀러의 상태가 입점대기가 아니면 에러 발생
-        if button == action_button['REFUSE_STORE_BUTTON']:
-            if seller_status['seller_status_id'] != status['STORE_WAIT']:
-                return 'invalid request'
-
-            self.seller_dao.status_change_refused_store(seller_id, session)
-
-            # try:
-            #     client.chat_postMessage(
-            #         channel=slack_channel['CHANNEL'],
-            #         text=f'id {seller_id}번 셀러의 상태가 입점거절로 변경되었습니다.'
-            #     )
-            # except SlackApiError:
-            #     return 'message fail'
-
-        # 퇴점확정 버튼이 눌린 셀러의 상태가 퇴점대기가 아니라면 에러 발생
-        if button == action_button['CONFIRM_CLOSED_BUTTON']:
-            if seller_status['seller_status_id'] != status['CLOSED_WAIT']:
-                return 'invalid request'
-
-            self.seller_dao.status_change_closed_store(seller_id, session)
-
-            # try:
-            #     client.chat_postMessage(
-            #         channel=slack_channel['CHANNEL'],
-            #         text=f'id {seller_id}번 셀러의 상태가 퇴점으로 변경되었습니다.'
-            #     )
-            # except SlackApiError:
-            #     return 'message fail'
+        # 버튼에 해당하는 상태 변경 규칙 가져오기
+        transition = STATUS_TRANSITIONS.get(button)
+
+        if transition is None:
+            return 'invalid request'
+
+        # 버튼과 셀러의 상태가 맞지 않거나 셀러가 없으면 변경된 row 가 없음
+        if self.seller_dao.status_change([seller_id], transition, session) == 0:
+            return 'invalid request'
+
+        self.after_status_change([seller_id], session)
+
+    def post_seller_status_bulk(self, seller_id_list, button, account_id, session):
+        """ 마스터의 셀러 계정관리 - 여러 셀러의 status 한 번에 변경
+
+        셀러들의 현재 상태를 한 번에 조회해서 변경 규칙에 맞는 셀러만 한 번의 UPDATE 로 변경하고
+        상태 히스토리도 한 번에 등록함
+
+        Args:
+            seller_id_list : 셀러 id 리스트
+            button         : 셀러의 상태를 변경하는 버튼
+            account_id     : 계정의 id
+            session        : db 연결
+
+        Returns:
+            results        : 셀러별 결과 ( success / invalid request / not exist )
+            not authorized : 마스터 계정이 아닐 때
+            invalid button : 존재하지 않는 버튼일 때
+
+        """
+        # 마스터 계정이 아닐 때 에러 발생
+        is_master = self.seller_dao.is_master(account_id, session)
+
+        if is_master['is_master'] == 0:
+            return 'not authorized'
+
+        transition = STATUS_TRANSITIONS.get(button)
+
+        if transition is None:
+            return 'invalid button'
+
+        # 중복된 셀러 id 제거 ( 순서는 유지 )
+        seller_id_list = list(dict.fromkeys(seller_id_list))
+
+        seller_status = {row['id']: row['seller_status_id']
+                         for row in self.seller_dao.get_status_id_list(seller_id_list, session)}
+
+        results = []
+        change_list = []
+
+        for seller_id in seller_id_list:
+            if seller_id not in seller_status:
+                result = 'not exist'
+            elif seller_status[seller_id] not in transition['from_status']:
+                result = 'invalid request'
+            else:
+                result = 'success'
+                change_list.append(seller_id)
+
+            results.append({'seller_id': seller_id, 'result': result})
+
+        # 조회 후 다른 요청이 상태를 바꿨을 때 일부 셀러만 바뀌었으면 status_change 에서,
+        # 모든 셀러가 바뀌어서 변경된 row 가 없으면 여기서 에러 발생 ( 토큰 폐기, 알림 저장을 하지 않음 )
+        if change_list:
+            update_row = self.seller_dao.status_change(change_list, transition, session)
+
+            if update_row == 0:
+                raise NoAffectedRowException(500, 'status_change update error')
+
+            self.after_status_change(change_list, session)
+
+        return {'results': results, 'success_count': len(change_list)}
+
+    def change_status(self, seller_id, seller_status_id, session):
+        """ 셀러 정보 수정 ( 셀러정보관리, 셀러계정관리 ) 으로 들어온 상태가 지금 상태와 다르면 변경하기
+
+        버튼으로 변경할 때와 같이 status_change 로 변경해서 히스토리를 저장하고 after_status_change 를 실행함
+        퇴점, 입점거절로 변경되면 소프트 딜리트
+
+        Args:
+            seller_id        : 셀러 id
+            seller_status_id : 변경할 셀러 상태 id
+            session          : db 연결
+
+        Returns:
+            invalid status : 존재하지 않는 셀러 상태일 때
+
+        """
+        if seller_status_id not in ALL_STATUS:
+            return 'invalid status'
+
+        transition = {
+            'status':       seller_status_id,
+            'from_status':  ALL_STATUS - {seller_status_id},
+            'is_delete':    seller_status_id in (CLOSED_STORE, REFUSED_STORE)
+        }
+
+        # 지금 상태와 같으면 변경된 row 가 없음
+        if self.seller_dao.status_change([seller_id], transition, session) == 0:
+            return
+
+        self.after_status_change([seller_id], session)
+
+    def after_status_change(self, seller_id_list, session):
+        """ 셀러 상태가 변경된 뒤 같은 트랜잭션에서 처리할 일
+
+        발행된 refresh token 을 모두 폐기하고, 슬랙 알림은 outbox 에 저장만 함
+        슬랙 전송은 worker.StatusNotifier 가 트랜잭션 밖에서 처리
+
+        Args:
+            seller_id_list : 상태가 변경된 셀러 id 리스트
+            session        : db 연결
+
+        """
+        self.seller_dao.revoke_seller_refresh_tokens(seller_id_list, session)
+        self.seller_dao.insert_status_events(seller_id_list, datetime.now(), session)
 
     def get_home_data(self, session):
         """ 홈 데이터 가져오기
@@ -290,8 +452,22 @@ class SellerService:
             home_data : 홈 데이터 정보
 
         """
-
-        home_data = self.seller_dao.select_home_data(session)
+        # 서로 관계없는 집계 쿼리 다섯 개를 동시에 실행 ( 가장 오래 걸리는 최근 30 일 주문 집계를 요청 쓰레드에서 실행 )
+        count_and_price, total_count, display_count, prepare_count, complete_count = self.fan_out.run(
+            session,
+            (self.seller_dao.select_daily_orders, 30),
+            (self.seller_dao.count_products,),
+            (self.seller_dao.count_display_products,),
+            (self.seller_dao.count_order_details, PREPARE_PRODUCT),
+            (self.seller_dao.count_order_details, COMPLETE_SHIPMENT))
+
+        home_data = {
+            'total_count':      total_count,
+            'display_count':    display_count,
+            'prepare_count':    prepare_count,
+            'complete_count':   complete_count,
+            'count_and_price':  count_and_price
+        }
 
         return home_data
 
@@ -314,9 +490,11 @@ class SellerService:
         if is_master['is_master'] == 0:
             return 'not authorized'
 
-        seller = self.seller_dao.get_seller_information(seller_id, session)
-        manager = self.seller_dao.get_manager_information(seller_id, session)
-        seller_status_histories = self.seller_dao.get_seller_status_histories(seller_id, session)
+        seller, manager, seller_status_histories = self.fan_out.run(
+            session,
+            (self.seller_dao.get_seller_information, seller_id),
+            (self.seller_dao.get_manager_information, seller_id),
+            (self.seller_dao.get_seller_status_histories, seller_id))
 
         seller_data = {
             'id':                           seller['id'],
@@ -364,10 +542,14 @@ class SellerService:
             session     : db 연결
 
         Returns:
+            invalid status : 존재하지 않는 셀러 상태일 때
 
         """
         manager_information = seller_data['manager_information']
 
+        if self.change_status(seller_data['id'], seller_data['seller_status_id'], session) == 'invalid status':
+            return 'invalid status'
+
         # 셀러 정보 업데이트 하기
         self.seller_dao.update_seller_information_master(seller_data, session)
 
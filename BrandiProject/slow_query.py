@@ -0,0 +1,152 @@
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger('slow_query')
+
+# 지문 ( fingerprint ) 을 만들 때 값이 들어가는 자리를 ? 로 바꾸기 위한 패턴
+COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.S)
+PLACEHOLDER_PATTERN = re.compile(r"%\(\w+\)s|%s|\?|:\w+|'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+IN_LIST_PATTERN = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+SPACE_PATTERN = re.compile(r'\s+')
+
+# 펼쳐진 IN 리스트의 바인드 이름 ( product_id_list_1, product_id_list_2 ... ) 을 원래 이름으로 묶기
+EXPANDED_NAME_PATTERN = re.compile(r'_\d+$')
+
+
+def fingerprint(statement):
+    """ 값과 주석을 지우고 공백을 정리해서 같은 형태의 sql 끼리 같은 문자열로 만들기
+
+    IN 리스트는 길이에 상관없이 IN (?+) 로 묶음
+    """
+    statement = COMMENT_PATTERN.sub(' ', statement)
+    statement = PLACEHOLDER_PATTERN.sub('?', statement)
+    statement = IN_LIST_PATTERN.sub('(?+)', statement)
+
+    return SPACE_PATTERN.sub(' ', statement).strip()
+
+
+def bind_summary(parameters):
+    """ 바인드 파라미터 개수와 값이 있는 파라미터의 bitmask
+
+    동적 필터 쿼리는 필터 딕셔너리 전체를 파라미터로 넘기기 때문에, 이름순으로 정렬한 파라미터 중
+    값이 None 이 아닌 것의 bit 를 켜면 어떤 필터 조합으로 실행됐는지 알 수 있음
+
+    Returns:
+        bind_count : 바인드 파라미터 개수 ( executemany 는 모든 줄의 합 )
+        names      : bitmask 의 bit 순서 ( 파라미터 이름순 )
+        bitmask    : 값이 있는 파라미터의 bit
+    """
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], (dict, list, tuple)):
+        bind_count = sum(len(row) for row in parameters)
+        parameters = parameters[0]
+    else:
+        bind_count = len(parameters or ())
+
+    if not isinstance(parameters, dict):
+        return bind_count, [], 0
+
+    values = {}
+    for name, value in parameters.items():
+        name = EXPANDED_NAME_PATTERN.sub('', name)
+        values[name] = values.get(name) or value is not None
+
+    names = sorted(values)
+    bitmask = 0
+    for idx, name in enumerate(names):
+        if values[name]:
+            bitmask |= 1 << idx
+
+    return bind_count, names, bitmask
+
+
+def sql_comment(route, dao):
+    # 주석이 끝나거나 pymysql 의 % 포맷을 깨지 않도록 정리
+    tag = 'route:{} dao:{}'.format(route, dao)
+    for token in ('*/', '/*', '%', '\n', '\r'):
+        tag = tag.replace(token, '')
+
+    return ' /* {} */'.format(tag)
+
+
+class SlowQueryLog:
+    """
+    threshold_ms 보다 오래 걸린 sql 을 로그로 남기고 ( 라우트, DAO 메소드, 지문 ) 별로 모아서 보여줌
+    """
+    def __init__(self, threshold_ms, max_fingerprints):
+        self.threshold = threshold_ms / 1000
+        self.max_fingerprints = max_fingerprints
+        self.entries = {}
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('SLOW_QUERY_THRESHOLD_MS', 200), config.get('SLOW_QUERY_MAX_FINGERPRINTS', 500))
+
+    def record(self, route, dao, statement, parameters, elapsed):
+        """ 오래 걸린 sql 한 번 기록하기
+
+        Args:
+            route      : 요청 라우트 ( 요청 밖이면 쓰레드 이름 )
+            dao        : DAO 메소드 이름
+            statement  : 실행한 sql
+            parameters : 바인드 파라미터
+            elapsed    : 실행 시간 ( 초 )
+
+        """
+        query_fingerprint = fingerprint(statement)
+        bind_count, names, bitmask = bind_summary(parameters)
+        elapsed_ms = round(elapsed * 1000, 3)
+
+        logger.warning(json.dumps({
+            'route':        route,
+            'dao':          dao,
+            'fingerprint':  query_fingerprint,
+            'bitmask':      bitmask,
+            'bind_names':   names,
+            'bind_count':   bind_count,
+            'elapsed_ms':   elapsed_ms
+        }, ensure_ascii=False))
+
+        key = (route, dao, query_fingerprint)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_fingerprints:
+                    self.dropped += 1
+                    return
+
+                entry = self.entries[key] = {
+                    'route':        route,
+                    'dao':          dao,
+                    'fingerprint':  query_fingerprint,
+                    'bind_names':   names,
+                    'bitmasks':     set(),
+                    'count':        0,
+                    'total_ms':     0.0,
+                    'max_ms':       0.0,
+                    'max_bind_count': 0,
+                    'last_seen':    None
+                }
+
+            entry['bitmasks'].add(bitmask)
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['max_bind_count'] = max(entry['max_bind_count'], bind_count)
+            entry['last_seen'] = time.time()
+
+    def top(self, order_by='total_ms', limit=20):
+        """ 오래 걸린 sql 을 order_by ( total_ms, max_ms, count ) 순서로 limit 개 가져오기 """
+        with self.lock:
+            entries = [dict(entry, bitmasks=sorted(entry['bitmasks']),
+                            avg_ms=round(entry['total_ms'] / entry['count'], 3),
+                            total_ms=round(entry['total_ms'], 3))
+                       for entry in self.entries.values()]
+
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+
+        return {'slow_queries': entries[:limit], 'fingerprint_count': len(entries), 'dropped': self.dropped}
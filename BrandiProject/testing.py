@@ -0,0 +1,104 @@
+"""
+테스트에서 API 1번이 실행하는 sql 구문 수 ( round trip ) 가 예산 안인지 확인하는 도우미
+
+앱을 DB_STATS_HEADERS = True 로 만들면 응답 헤더 X-DB-Statements, X-DB-Rows 로 요청 1번의 sql 구문 수와
+결과에서 실제로 가져온 row 수를 알 수 있음. 새로 생긴 N+1 반복문처럼 구문 수가 늘어나거나
+필요 없는 row 를 더 가져오면 테스트가 바로 실패함
+
+    app = create_app({..., 'DB_STATS_HEADERS': True})
+    assert_round_trips(app.test_client(), 'GET', '/product/update/1', headers={'Authorization': token})
+"""
+
+# ( method, 라우트 ) 별 ( sql 구문 수, 가져온 row 수 ) 예산, row 수는 tests/test_round_trips.py 의 데이터 기준
+# tests/test_round_trips.py 가 모든 라우트의 구문 수가 예산과 같은지 확인하기 때문에 구문 수를 줄이면 예산도 같이 줄여야 함
+ROUND_TRIP_BUDGETS = {
+    ('GET', '/product/update/<int:product_id>'):            (1, 1),
+    ('GET', '/product/update/<int:product_id>/detail'):     (1, 1),
+    ('POST', '/product/batch'):                             (3, 3),
+    ('GET', '/mypage'):                                     (3, 2),
+    ('GET', '/home'):                                       (5, 5),
+    ('GET', '/order/<int:order_id>'):                       (2, 2),
+    ('POST', '/order/batch'):                               (2, 2),
+    ('GET', '/product/register'):                           (3, 23),
+    # 주문 1개당 상태 조회, 변경, 이력 저장
+    ('POST', '/order/shipment'):                            (3, 1)
+}
+
+
+# 테스트 앱 설정, SQLite 메모리 데이터베이스에 migrations/ 스키마를 만들고 백그라운드 worker 는 실행하지 않음
+TEST_CONFIG = {
+    'DB_URL':                       'sqlite://',
+    'DB_BOOTSTRAP_SCHEMA':          True,
+    'JWT_SECRET_KEY':               'test-secret',
+    'ALGORITHM':                    'HS256',
+    'DB_STATS_HEADERS':             True,
+    'STATUS_NOTIFIER_ENABLED':      False,
+    'DISCOUNT_SCHEDULER_ENABLED':   False,
+    'IDEMPOTENCY_SWEEPER_ENABLED':  False
+}
+
+
+def create_test_app(**config):
+    # TEST_CONFIG 에 config 를 덮어써서 앱 만들기
+    from app import create_app
+    return create_app(dict(TEST_CONFIG, **config))
+
+
+def create_test_session_factory():
+    # 앱 없이 DAO, 서비스를 테스트할 때 쓰는 스키마를 만든 SQLite 메모리 데이터베이스의 sessionmaker
+    from sqlalchemy.orm import sessionmaker
+    from model.dialect import create_database_engine
+    from tools.migrate import upgrade
+
+    engine = create_database_engine(TEST_CONFIG['DB_URL'])
+    upgrade(engine, log=lambda message: None)
+    return sessionmaker(bind=engine, autocommit=False)
+
+
+class RoundTripBudgetExceeded(AssertionError):
+    pass
+
+
+def route_of(app, method, path):
+    # 요청 경로를 라우트 형태 ( /order/<int:order_id> ) 로 바꾸기
+    rule, _ = app.url_map.bind('localhost').match(path.split('?')[0], method, return_rule=True)
+    return rule.rule
+
+
+def assert_round_trips(client, method, path, statements=None, rows=None, **kwargs):
+    """ API 를 호출하고 sql 구문 수, 가져온 row 수가 예산 안인지 확인하기
+
+    Args:
+        client     : app.test_client()
+        method     : HTTP method
+        path       : 요청 경로
+        statements : sql 구문 수 예산, statements, rows 둘 다 없으면 ROUND_TRIP_BUDGETS 의 값
+        rows       : 가져온 row 수 예산, statements 만 주면 확인하지 않음
+        **kwargs   : client.open 에 넘길 값 ( headers, json 등 )
+
+    Returns:
+        response : 응답
+
+    """
+    if statements is None and rows is None:
+        key = (method, route_of(client.application, method, path))
+        if key not in ROUND_TRIP_BUDGETS:
+            raise KeyError('no round trip budget for {} {}'.format(*key))
+        statements, rows = ROUND_TRIP_BUDGETS[key]
+
+    response = client.open(path, method=method, **kwargs)
+
+    if 'X-DB-Statements' not in response.headers:
+        raise RuntimeError('X-DB-Statements header missing, create the app with DB_STATS_HEADERS = True')
+
+    used_statements = int(response.headers['X-DB-Statements'])
+    used_rows = int(response.headers['X-DB-Rows'])
+
+    if statements is not None and used_statements > statements:
+        raise RoundTripBudgetExceeded('{} {} issued {} statements, budget {}'.format(
+            method, path, used_statements, statements))
+
+    if rows is not None and used_rows > rows:
+        raise RoundTripBudgetExceeded('{} {} fetched {} rows, budget {}'.format(method, path, used_rows, rows))
+
+    return response
@@ -0,0 +1,127 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from model import ProductDao, WorkerLeaseDao
+from service import ProductService, PricingEngine
+from testing import create_test_session_factory
+from worker import DiscountScheduler
+
+
+class DiscountSchedulerTest(unittest.TestCase):
+    """
+    DiscountScheduler 가 할인 기간에 맞게 할인 여부를 바꾸고, 실행 권한을 가진 scheduler 하나만 처리하는지 확인
+    """
+    def setUp(self):
+        self.session_factory = create_test_session_factory()
+        self.product_service = ProductService(ProductDao(), PricingEngine())
+
+        now = datetime.now()
+        past, future = now - timedelta(days=1), now + timedelta(days=1)
+
+        # id : ( 할인 시작, 할인 끝, 할인 여부 )
+        self.products = {
+            1: (None, future, 0),       # 시작 날짜가 없으면 이미 시작된 할인
+            2: (past, None, 0),
+            3: (future, None, 0),       # 아직 시작 전
+            4: (None, past, 1),         # 끝난 할인
+            5: (None, past, 0)
+        }
+
+        session = self.session_factory()
+        try:
+            for product_id, (start_date, end_date, is_discount) in self.products.items():
+                session.execute(text("""
+                    INSERT INTO products (
+                        id,
+                        name,
+                        seller_id,
+                        sub_categories_id,
+                        price,
+                        discount_rate,
+                        discount_price,
+                        discount_start_date,
+                        discount_end_date,
+                        is_discount,
+                        main_image,
+                        detail
+                    ) VALUES (
+                        :id,
+                        'product',
+                        1,
+                        1,
+                        10000,
+                        10,
+                        :discount_price,
+                        :discount_start_date,
+                        :discount_end_date,
+                        :is_discount,
+                        'main.jpg',
+                        'detail'
+                    )
+                """), {'id': product_id, 'discount_price': 9000 if is_discount else 10000,
+                       'discount_start_date': start_date, 'discount_end_date': end_date, 'is_discount': is_discount})
+            session.commit()
+
+        finally:
+            session.close()
+
+    def scheduler(self):
+        return DiscountScheduler(self.product_service, WorkerLeaseDao(), self.session_factory, {})
+
+    def query(self, sql):
+        session = self.session_factory()
+        try:
+            return session.execute(text(sql)).fetchall()
+
+        finally:
+            session.close()
+
+    def execute(self, sql):
+        session = self.session_factory()
+        try:
+            session.execute(text(sql))
+            session.commit()
+
+        finally:
+            session.close()
+
+    def test_activates_and_expires_discounts(self):
+        scheduler = self.scheduler()
+
+        self.assertEqual(scheduler.run_once(), 3)
+        self.assertEqual(scheduler.run_once(), 0)
+
+        products = {row['id']: (row['is_discount'], row['discount_price'])
+                    for row in self.query('SELECT id, is_discount, discount_price FROM products')}
+        self.assertEqual(products, {1: (1, 9000), 2: (1, 9000), 3: (0, 10000), 4: (0, 10000), 5: (0, 10000)})
+
+        records = self.query('SELECT product_id FROM product_records ORDER BY product_id')
+        self.assertEqual([row['product_id'] for row in records], [1, 2, 4])
+        self.assertEqual((scheduler.stats['activated'], scheduler.stats['expired']), (2, 1))
+
+    def test_only_lease_owner_runs(self):
+        first, second = self.scheduler(), self.scheduler()
+
+        self.assertEqual(first.run_once(), 3)
+
+        # 다른 프로세스의 scheduler 는 실행 권한이 끝나기 전에는 처리하지 않음
+        self.execute("UPDATE products SET is_discount = 0, discount_price = 10000 WHERE id = 1")
+        self.assertEqual(second.run_once(), 0)
+        self.assertEqual(second.stats['skipped'], 1)
+
+        # 실행 권한을 가진 scheduler 는 계속 처리함
+        self.assertEqual(first.run_once(), 1)
+        self.assertEqual(first.stats['skipped'], 0)
+
+        # 실행 권한을 가진 scheduler 가 멈춰서 lease_time 이 지나면 다른 scheduler 가 이어서 처리
+        self.execute("UPDATE products SET is_discount = 0, discount_price = 10000 WHERE id = 1")
+        self.execute("UPDATE worker_leases SET lease_time = '2000-01-01 00:00:00'")
+        self.assertEqual(second.run_once(), 1)
+        self.assertEqual(first.run_once(), 0)
+        self.assertEqual(first.stats['skipped'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+from model.dialect import create_database_engine
+from service import QueryFanOut
+
+
+def query(value, session):
+    # 실행한 쓰레드 이름과 값을 돌려주는 DAO 메소드 대신 쓰는 함수
+    return threading.current_thread().name, value
+
+
+class QueryFanOutTest(unittest.TestCase):
+    """
+    QueryFanOut 이 요청 1번에 쓰레드를 per_request 개까지만 쓰고, 쓰레드가 없으면 기다리지 않고 요청 쓰레드에서 실행하는지 확인
+    """
+    def setUp(self):
+        self.engine = create_database_engine('sqlite://')
+
+    def fan_out(self, workers, per_request):
+        fan_out = QueryFanOut(self.engine, workers, per_request)
+        self.addCleanup(fan_out.executor.shutdown)
+        return fan_out
+
+    def test_limits_threads_per_request(self):
+        fan_out = self.fan_out(workers=4, per_request=2)
+        results = fan_out.run(None, *[(query, value) for value in range(5)])
+
+        # 결과는 같은 순서, 첫 번째 쿼리는 요청 쓰레드, 나머지 4개는 2개씩 묶어서 풀의 쓰레드에서 실행
+        self.assertEqual([value for _, value in results], [0, 1, 2, 3, 4])
+        self.assertEqual(results[0][0], threading.current_thread().name)
+        self.assertTrue(all(thread.startswith('fan-out') for thread, _ in results[1:]))
+        self.assertEqual((results[1][0], results[2][0]), (results[3][0], results[4][0]))
+        self.assertEqual(fan_out.stats, {'fan_outs': 1, 'parallel_queries': 4, 'sequential_queries': 0,
+                                         'saturated': 0})
+
+    def test_runs_inline_when_workers_are_busy(self):
+        fan_out = self.fan_out(workers=1, per_request=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_query(session):
+            started.set()
+            release.wait(5)
+
+        # 다른 요청이 하나뿐인 쓰레드를 사용 중
+        other_request = threading.Thread(target=fan_out.run, args=(None, (query, 0), (slow_query,)))
+        other_request.start()
+        self.addCleanup(other_request.join)
+        self.addCleanup(release.set)
+        self.assertTrue(started.wait(5))
+
+        results = fan_out.run(None, (query, 1), (query, 2))
+        self.assertEqual(results, [(threading.current_thread().name, 1), (threading.current_thread().name, 2)])
+        self.assertEqual(fan_out.stats['saturated'], 1)
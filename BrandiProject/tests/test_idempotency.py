@@ -0,0 +1,75 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from model import IdempotencyDao
+from service import IdempotencyService
+from testing import create_test_session_factory
+
+REQUEST_HASH = IdempotencyService.request_hash('POST', '/order', b'{"count": 1}')
+
+
+class IdempotencyClaimTest(unittest.TestCase):
+    """
+    처리 중으로 등록된 Idempotency-Key 가 claim lease 안에서는 409 ( in progress ),
+    lease 가 지나면 같은 요청의 재시도가 다시 등록하는지 확인
+    """
+    def setUp(self):
+        self.session_factory = create_test_session_factory()
+        self.idempotency_service = IdempotencyService(IdempotencyDao(), {'IDEMPOTENCY_CLAIM_LEASE_SECONDS': 60})
+
+    def begin(self, request_hash=REQUEST_HASH):
+        session = self.session_factory()
+        try:
+            stored = self.idempotency_service.begin(1, 'key-1', request_hash, session)
+            session.commit()
+            return stored
+
+        finally:
+            session.close()
+
+    def age_claim(self, seconds):
+        # 키를 등록한 요청이 seconds 초 전에 처리를 시작한 것으로 만들기
+        session = self.session_factory()
+        try:
+            session.execute(text("""
+                UPDATE idempotency_keys SET claim_time = :claim_time
+            """), {'claim_time': datetime.now() - timedelta(seconds=seconds)})
+            session.commit()
+
+        finally:
+            session.close()
+
+    def test_claim_within_lease_is_in_progress(self):
+        self.assertIsNone(self.begin())
+        self.age_claim(30)
+        self.assertEqual(self.begin(), 'in progress')
+
+    def test_stale_claim_is_reclaimed_once(self):
+        self.assertIsNone(self.begin())
+        self.age_claim(61)
+
+        # 다른 요청은 lease 가 지나도 같은 키를 쓸 수 없음
+        self.assertEqual(self.begin(IdempotencyService.request_hash('POST', '/order', b'{}')), 'key reused')
+
+        # 같은 요청의 재시도는 다시 등록하고, 그 다음 재시도는 새 claim 의 lease 안이라서 처리 중
+        self.assertIsNone(self.begin())
+        self.assertEqual(self.begin(), 'in progress')
+        self.assertEqual(self.idempotency_service.stats['reclaimed'], 1)
+
+    def test_completed_key_is_replayed_after_lease(self):
+        self.assertIsNone(self.begin())
+
+        session = self.session_factory()
+        try:
+            self.idempotency_service.complete(1, 'key-1', REQUEST_HASH, 200, '{"message": "success"}', session)
+            session.commit()
+
+        finally:
+            session.close()
+
+        # 메모리 캐시 없이 데이터베이스에 저장된 응답을 돌려주는지 확인
+        self.idempotency_service.cache.clear()
+        self.age_claim(61)
+        self.assertEqual(self.begin(), (200, '{"message": "success"}'))
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import bcrypt
+from sqlalchemy import text
+
+from testing import create_test_app
+
+
+class LoginThrottleTest(unittest.TestCase):
+    """
+    로그인 시도 제한이 계정 버킷은 실패한 시도만, IP 버킷은 모든 시도를 세는지 확인
+    """
+    def create_app(self, **config):
+        limits = dict(LOGIN_ACCOUNT_BURST=2, LOGIN_ACCOUNT_PER_MINUTE=0, LOGIN_IP_BURST=100, LOGIN_IP_PER_MINUTE=0)
+        app = create_test_app(**dict(limits, **config))
+
+        session = app.extensions['status_notifier'].session_factory()
+        try:
+            session.execute(text("""
+                INSERT INTO sellers (
+                    id,
+                    account,
+                    password,
+                    brand_name_korean,
+                    brand_name_english,
+                    brand_crm_number,
+                    seller_property_id,
+                    seller_status_id
+                ) VALUES (
+                    1,
+                    'seller1',
+                    :password,
+                    '브랜드',
+                    'brand',
+                    '02-000-0000',
+                    1,
+                    2
+                )
+            """), {'password': bcrypt.hashpw(b'password1!', bcrypt.gensalt(4)).decode('utf-8')})
+            session.commit()
+
+        finally:
+            session.close()
+
+        return app.test_client()
+
+    def log_in(self, client, password, ip='10.0.0.1'):
+        return client.post('/login', json={'account': 'seller1', 'password': password},
+                           environ_base={'REMOTE_ADDR': ip}).status_code
+
+    def test_successful_logins_do_not_lock_account(self):
+        client = self.create_app()
+
+        # 성공한 로그인은 계정 버킷을 비우지 않음
+        self.assertEqual([self.log_in(client, 'password1!') for _ in range(5)], [200] * 5)
+
+        # 실패한 시도는 계정 버킷을 비우고, 비워지면 맞는 비밀번호도 막힘
+        self.assertEqual([self.log_in(client, 'wrong') for _ in range(2)], [400, 400])
+        self.assertEqual(self.log_in(client, 'password1!', ip='10.0.0.2'), 429)
+
+    def test_ip_limit_counts_every_attempt(self):
+        client = self.create_app(LOGIN_IP_BURST=3)
+
+        self.assertEqual([self.log_in(client, 'password1!') for _ in range(4)], [200, 200, 200, 429])
+        self.assertEqual(self.log_in(client, 'password1!', ip='10.0.0.2'), 200)
+
+    def test_sqlite_store_gives_back_on_success(self):
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        client = self.create_app(LOGIN_RATE_LIMIT_STORE=path)
+
+        self.assertEqual([self.log_in(client, 'password1!') for _ in range(3)], [200] * 3)
+        self.assertEqual([self.log_in(client, 'wrong') for _ in range(3)], [400, 400, 429])
@@ -0,0 +1,57 @@
+import unittest
+
+from flask import Flask
+from sqlalchemy import text
+
+from metrics import Metrics, current_dao_method
+from model import SellerDao
+from testing import create_test_session_factory
+
+
+class MetricsDaoLabelTest(unittest.TestCase):
+    """
+    init_daos 로 감싼 DAO 메소드의 sql 이 DAO 메소드 라벨로, DAO 밖의 sql 은 other 로 측정되는지 확인
+    """
+    def setUp(self):
+        self.session_factory = create_test_session_factory()
+        self.metrics = Metrics()
+        self.metrics.init_app(Flask(__name__), self.session_factory.kw['bind'])
+
+        self.seller_dao = SellerDao()
+        self.metrics.init_daos(self.seller_dao)
+
+    def counts(self):
+        return {label: histogram.count for label, histogram in self.metrics.queries.items()}
+
+    def test_labels_statements_by_dao_method(self):
+        session = self.session_factory()
+        try:
+            self.seller_dao.count_products(session)
+            self.seller_dao.count_products(session)
+            self.seller_dao.get_status_id_list([1, 2], session)
+            session.execute(text('SELECT 1'))
+
+        finally:
+            session.close()
+
+        self.assertEqual(self.counts(), {
+            'seller_dao.count_products':        2,
+            'seller_dao.get_status_id_list':    1,
+            'other':                            1
+        })
+        self.assertIn('db_query_duration_seconds_count{dao="seller_dao.count_products"} 2', self.metrics.render())
+
+    def test_resets_label_after_error(self):
+        session = self.session_factory()
+        try:
+            with self.assertRaises(Exception):
+                self.seller_dao.get_status_id_list([1], None)
+
+            self.assertIsNone(current_dao_method.get())
+
+        finally:
+            session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import text
+
+from model.dialect import create_database_engine
+from tools.migrate import load_migrations, stamp, upgrade, verify
+
+
+class MigrateTest(unittest.TestCase):
+    """
+    이미 적용된 데이터베이스에 새 버전 migration 이 기존 데이터를 유지하면서 적용되는지 확인 ( SQLite )
+    """
+    def setUp(self):
+        self.engine = create_database_engine('sqlite://')
+
+    def columns(self, table):
+        with self.engine.connect() as connection:
+            return {row['name']: row for row in connection.execute(text('PRAGMA table_info({})'.format(table)))}
+
+    def test_modify_column_keeps_data(self):
+        # 0007 까지 적용된 데이터베이스에 문자열로 저장된 제조일 ( 날짜 형식, 자유 입력 )
+        self.assertEqual(upgrade(self.engine, target=7, log=lambda message: None), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.columns('products')['manufacture_date']['type'], 'VARCHAR(20)')
+
+        with self.engine.begin() as connection:
+            for manufacture_date in ('2020-10-01 12:00:00', '2020년 10월'):
+                connection.execute(text("""
+                    INSERT INTO products (
+                        name,
+                        seller_id,
+                        sub_categories_id,
+                        price,
+                        discount_price,
+                        main_image,
+                        detail,
+                        manufacture_date
+                    ) VALUES (
+                        'product',
+                        1,
+                        1,
+                        10000,
+                        10000,
+                        'main.jpg',
+                        'detail',
+                        :manufacture_date
+                    )
+                """), {'manufacture_date': manufacture_date})
+
+        applied = upgrade(self.engine, log=lambda message: None)
+        self.assertEqual(applied[0], 8)
+        self.assertEqual(self.columns('products')['manufacture_date']['type'], 'DATETIME')
+        self.assertEqual(self.columns('products')['discount_rate']['notnull'], 0)
+        self.assertEqual(self.columns('product_records')['discount_rate']['notnull'], 0)
+
+        with self.engine.connect() as connection:
+            products = connection.execute(text('SELECT name, manufacture_date FROM products ORDER BY id')).fetchall()
+            self.assertEqual(verify(connection, load_migrations()), [])
+
+        # 날짜 형식이 아닌 제조일은 NULL
+        self.assertEqual([product['name'] for product in products], ['product', 'product'])
+        self.assertEqual([product['manufacture_date'] for product in products], [datetime(2020, 10, 1, 12, 0), None])
+
+    def test_stamp_existing_database(self):
+        # migrations/ 를 쓰기 전부터 있던 데이터베이스 ( 0001, 0002 의 스키마와 데이터는 있고 schema_migrations 는 없음 )
+        upgrade(self.engine, target=2, log=lambda message: None)
+        with self.engine.begin() as connection:
+            connection.execute(text('DROP TABLE schema_migrations'))
+            for price, discount_rate in ((10000, 10), (12345, 0)):
+                connection.execute(text("""
+                    INSERT INTO products (
+                        name,
+                        seller_id,
+                        sub_categories_id,
+                        price,
+                        discount_rate,
+                        main_image,
+                        detail
+                    ) VALUES (
+                        'product',
+                        1,
+                        1,
+                        :price,
+                        :discount_rate,
+                        'main.jpg',
+                        'detail'
+                    )
+                """), {'price': price, 'discount_rate': discount_rate})
+
+        # 기록이 없으면 0001 부터 다시 실행해서 실패
+        with self.assertRaises(RuntimeError):
+            upgrade(self.engine, log=lambda message: None)
+
+        with self.assertRaises(ValueError):
+            stamp(self.engine, 999, log=lambda message: None)
+
+        self.assertEqual(stamp(self.engine, 2, log=lambda message: None), [1, 2])
+        self.assertEqual(stamp(self.engine, 2, log=lambda message: None), [])
+        self.assertEqual(upgrade(self.engine, log=lambda message: None)[0], 3)
+
+        # 0005 가 추가한 할인가는 기존 상품의 할인율로 채워짐
+        with self.engine.connect() as connection:
+            products = connection.execute(text('SELECT price, discount_price FROM products ORDER BY id')).fetchall()
+            self.assertEqual(verify(connection, load_migrations()), [])
+
+        self.assertEqual([tuple(product) for product in products], [(10000, 9000), (12345, 12345)])
+
+
+if __name__ == '__main__':
+    unittest.main()
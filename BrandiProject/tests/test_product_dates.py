@@ -0,0 +1,47 @@
+import unittest
+
+import jwt
+
+from testing import create_test_app
+
+PRODUCT = {
+    'sub_categories_id':    1,
+    'name':                 '상품',
+    'main_image':           'main.jpg',
+    'is_sell':              1,
+    'is_display':           1,
+    'is_discount':          1,
+    'price':                10000,
+    'detail':               '상세',
+    'maximum_sell_count':   10,
+    'minimum_sell_count':   1,
+    'options':              [{'color_id': 1, 'size_id': 1, 'is_inventory_manage': 0}],
+    'discount_rate':        10,
+    'discount_start_date':  '2020-10-01',
+    'discount_end_date':    '2020년 10월 31일'
+}
+
+
+class ProductDateTest(unittest.TestCase):
+    """
+    할인 날짜 형식이 맞지 않으면 상품 등록, 수정, 일괄 수정이 500 이 아니라 400 을 반환하는지 확인
+    """
+    def setUp(self):
+        self.client = create_test_app().test_client()
+        access_token = jwt.encode({'seller_id': 1}, 'test-secret', 'HS256')
+        access_token = access_token.decode('utf-8') if isinstance(access_token, bytes) else access_token
+        self.headers = {'Authorization': access_token}
+
+    def assert_invalid_date(self, response):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'message': 'invalid date'})
+
+    def test_register(self):
+        self.assert_invalid_date(self.client.post('/product/register', json=PRODUCT, headers=self.headers))
+
+    def test_update(self):
+        self.assert_invalid_date(self.client.put('/product/update/1', json=PRODUCT, headers=self.headers))
+
+    def test_bulk_update(self):
+        body = {'product_id_list': [1], 'discount_start_date': '10/01/2020'}
+        self.assert_invalid_date(self.client.patch('/product/bulk', json=body, headers=self.headers))
@@ -0,0 +1,202 @@
+import unittest
+
+import jwt
+from sqlalchemy import text
+
+from testing import ROUND_TRIP_BUDGETS, RoundTripBudgetExceeded, assert_round_trips, create_test_app, route_of
+
+# 셀러 1 의 상품 1 ( 옵션, 서브 이미지 ), 상품 1 을 주문한 주문 1
+SEED_SQL = (
+    """
+    INSERT INTO sellers (
+        id,
+        account,
+        password,
+        brand_name_korean,
+        brand_name_english,
+        brand_crm_number,
+        seller_property_id,
+        seller_status_id
+    ) VALUES (
+        1,
+        'seller1',
+        'password',
+        '브랜드',
+        'brand',
+        '02-000-0000',
+        1,
+        2
+    )
+    """,
+    """
+    INSERT INTO manager_informations (
+        name,
+        phone_number,
+        email,
+        seller_id,
+        ordering
+    ) VALUES (
+        'manager',
+        '010-0000-0000',
+        'manager@brandi.com',
+        1,
+        1
+    )
+    """,
+    """
+    INSERT INTO products (
+        id,
+        name,
+        seller_id,
+        sub_categories_id,
+        price,
+        discount_price,
+        main_image,
+        detail
+    ) VALUES (
+        1,
+        'product',
+        1,
+        1,
+        10000,
+        10000,
+        'main.jpg',
+        'detail'
+    )
+    """,
+    """
+    INSERT INTO sub_images (
+        image,
+        product_id
+    ) VALUES (
+        'sub.jpg',
+        1
+    )
+    """,
+    """
+    INSERT INTO options (
+        id,
+        product_id,
+        color_id,
+        size_id,
+        ordering
+    ) VALUES (
+        1,
+        1,
+        1,
+        1,
+        1
+    )
+    """,
+    """
+    INSERT INTO orders (
+        id,
+        user_name,
+        phone_number,
+        zip_code,
+        address,
+        detail_address,
+        number
+    ) VALUES (
+        1,
+        'user',
+        '010-0000-0000',
+        12345,
+        'address',
+        'detail address',
+        '20201001000001'
+    )
+    """,
+    """
+    INSERT INTO order_details (
+        order_id,
+        product_id,
+        detail_number,
+        count,
+        option_id,
+        total_price,
+        seller_id
+    ) VALUES (
+        1,
+        1,
+        '20201001000001',
+        1,
+        1,
+        10000,
+        1
+    )
+    """,
+    """
+    INSERT INTO order_status_histories (
+        update_time,
+        order_status_id,
+        order_id
+    ) VALUES (
+        '2020-10-01 00:00:00',
+        1,
+        1
+    )
+    """
+)
+
+# ROUND_TRIP_BUDGETS 의 라우트마다 실행할 요청 ( method, 경로, client.open 에 넘길 값 )
+REQUESTS = (
+    ('GET', '/product/update/1', {}),
+    ('GET', '/product/update/1?with_detail=1', {}),
+    ('GET', '/product/update/1/detail', {}),
+    ('POST', '/product/batch', {'json': {'product_id_list': [1, 2]}}),
+    ('GET', '/mypage', {}),
+    ('GET', '/home', {}),
+    ('GET', '/order/1', {}),
+    ('POST', '/order/batch', {'json': {'order_id_list': [1, 2]}}),
+    ('GET', '/product/register', {}),
+    ('POST', '/order/shipment', {'json': {'order_id_list': [1], 'shipment_button': 1}})
+)
+
+
+class RoundTripBudgetTest(unittest.TestCase):
+    """
+    ROUND_TRIP_BUDGETS 의 모든 라우트를 test client 로 호출해서 sql 구문 수, 가져온 row 수가 예산 안인지 확인 ( SQLite )
+    """
+    def setUp(self):
+        self.app = create_test_app()
+        self.client = self.app.test_client()
+
+        session = self.app.extensions['status_notifier'].session_factory()
+        try:
+            for sql in SEED_SQL:
+                session.execute(text(sql))
+            session.commit()
+
+        finally:
+            session.close()
+
+        token = jwt.encode({'seller_id': 1}, self.app.config['JWT_SECRET_KEY'], self.app.config['ALGORITHM'])
+        self.headers = {'Authorization': token.decode('utf-8') if isinstance(token, bytes) else token}
+
+    def test_every_budgeted_route_is_requested(self):
+        requested = {(method, route_of(self.app, method, path)) for method, path, _ in REQUESTS}
+        self.assertEqual(requested, set(ROUND_TRIP_BUDGETS))
+
+    def test_routes_within_budget(self):
+        for method, path, kwargs in REQUESTS:
+            with self.subTest(method=method, path=path):
+                response = assert_round_trips(self.client, method, path, headers=self.headers, **kwargs)
+                self.assertEqual(response.status_code, 200, response.get_data(as_text=True))
+
+                # 구문 수, row 수를 줄였는데 예산이 그대로면 다시 늘어나도 알 수 없어서 예산과 같아야 함
+                statements, rows = ROUND_TRIP_BUDGETS[(method, route_of(self.app, method, path))]
+                self.assertEqual(int(response.headers['X-DB-Statements']), statements)
+                self.assertEqual(int(response.headers['X-DB-Rows']), rows)
+
+    def test_exceeded_budget_fails(self):
+        with self.assertRaises(RoundTripBudgetExceeded):
+            assert_round_trips(self.client, 'GET', '/home', statements=4, headers=self.headers)
+
+    def test_exceeded_row_budget_fails(self):
+        with self.assertRaises(RoundTripBudgetExceeded):
+            assert_round_trips(self.client, 'GET', '/product/register', statements=3, rows=22, headers=self.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+from sqlalchemy import text
+
+from exceptions import NoAffectedRowException
+from model import SellerDao
+from service import SellerService
+from service.seller_service import STATUS_TRANSITIONS
+from testing import create_test_session_factory
+
+# 입점승인 버튼, 입점 ( 2 ) 상태가 아닌 셀러를 입점으로 바꿈
+STORE_BUTTON = 2
+
+
+class SellerStatusBulkTest(unittest.TestCase):
+    """
+    여러 셀러 상태 변경 ( post_seller_status_bulk ) 이 조회와 변경 사이에 다른 요청이 상태를 바꾼 경우를 처리하는지 확인
+    """
+    def setUp(self):
+        self.session_factory = create_test_session_factory()
+        self.seller_service = SellerService(SellerDao(), {})
+
+        session = self.session_factory()
+        try:
+            # 1 : 마스터, 2, 3 : 입점대기 셀러
+            for seller_id, is_master in ((1, True), (2, False), (3, False)):
+                session.execute(text("""
+                    INSERT INTO sellers (
+                        id,
+                        account,
+                        password,
+                        brand_name_korean,
+                        brand_name_english,
+                        brand_crm_number,
+                        seller_property_id,
+                        seller_status_id,
+                        is_master
+                    ) VALUES (
+                        :id,
+                        :account,
+                        'password',
+                        '브랜드',
+                        'brand',
+                        '02-000-0000',
+                        1,
+                        1,
+                        :is_master
+                    )
+                """), {'id': seller_id, 'account': 'seller{}'.format(seller_id), 'is_master': is_master})
+            session.commit()
+
+        finally:
+            session.close()
+
+        self.assertIn(1, STATUS_TRANSITIONS[STORE_BUTTON]['from_status'])
+        self.assertNotIn(2, STATUS_TRANSITIONS[STORE_BUTTON]['from_status'])
+
+    def count(self, table, session=None):
+        if session is not None:
+            return session.execute(text('SELECT COUNT(*) FROM {}'.format(table))).scalar()
+
+        session = self.session_factory()
+        try:
+            return self.count(table, session)
+
+        finally:
+            session.close()
+
+    def test_changes_sellers_in_one_update(self):
+        session = self.session_factory()
+        try:
+            results = self.seller_service.post_seller_status_bulk([2, 3, 2, 99], STORE_BUTTON, 1, session)
+            session.commit()
+
+        finally:
+            session.close()
+
+        self.assertEqual(results, {'results': [
+            {'seller_id': 2, 'result': 'success'},
+            {'seller_id': 3, 'result': 'success'},
+            {'seller_id': 99, 'result': 'not exist'}
+        ], 'success_count': 2})
+        self.assertEqual(self.count('seller_status_histories'), 2)
+        self.assertEqual(self.count('seller_status_events'), 2)
+
+    def test_fails_when_every_seller_changed_after_lookup(self):
+        seller_dao = self.seller_service.seller_dao
+        get_status_id_list = seller_dao.get_status_id_list
+
+        def get_status_id_list_then_change(seller_id_list, session):
+            # 상태를 조회한 직후 다른 요청이 모든 셀러를 먼저 입점 ( 2 ) 으로 바꾼 상황
+            seller_status = get_status_id_list(seller_id_list, session)
+            session.execute(text('UPDATE sellers SET seller_status_id = 2 WHERE id IN (2, 3)'))
+            return seller_status
+
+        seller_dao.get_status_id_list = get_status_id_list_then_change
+        self.addCleanup(delattr, seller_dao, 'get_status_id_list')
+
+        session = self.session_factory()
+        try:
+            with self.assertRaises(NoAffectedRowException) as context:
+                self.seller_service.post_seller_status_bulk([2, 3], STORE_BUTTON, 1, session)
+
+            # 롤백하기 전에도 상태 히스토리, 알림이 저장되지 않았어야 함
+            self.assertEqual(self.count('seller_status_histories', session), 0)
+            self.assertEqual(self.count('seller_status_events', session), 0)
+            session.rollback()
+
+        finally:
+            session.close()
+
+        self.assertEqual(context.exception.message, 'status_change update error')
+
+
+if __name__ == '__main__':
+    unittest.main()
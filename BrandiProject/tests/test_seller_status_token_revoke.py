@@ -0,0 +1,158 @@
+import unittest
+
+import jwt
+from sqlalchemy import text
+
+from model import SellerDao
+from service import SellerService
+from testing import create_test_app
+
+# 입점 ( 2 ) 셀러를 휴점 ( 3 ) 으로 바꿈, 휴점은 refresh 를 막는 상태가 아니라서 폐기된 토큰만 거절됨
+STORE = 2
+CLOSED_TEMPORARILY = 3
+
+
+class SellerStatusTokenRevokeTest(unittest.TestCase):
+    """
+    셀러 정보 수정 API ( PUT /mypage, PUT /master/management-seller/<id> ) 로 상태가 바뀌어도
+    refresh token 이 폐기되는지 확인
+    """
+    def setUp(self):
+        self.app = create_test_app()
+        self.client = self.app.test_client()
+        self.session_factory = self.app.extensions['status_notifier'].session_factory
+
+        session = self.session_factory()
+        try:
+            # 1 : 마스터, 2 : 입점 셀러
+            for seller_id, is_master in ((1, True), (2, False)):
+                session.execute(text("""
+                    INSERT INTO sellers (
+                        id,
+                        account,
+                        password,
+                        brand_name_korean,
+                        brand_name_english,
+                        brand_crm_number,
+                        seller_property_id,
+                        seller_status_id,
+                        is_master
+                    ) VALUES (
+                        :id,
+                        :account,
+                        'password',
+                        '브랜드',
+                        'brand',
+                        '02-000-0000',
+                        1,
+                        :seller_status_id,
+                        :is_master
+                    )
+                """), {'id': seller_id, 'account': 'seller{}'.format(seller_id), 'seller_status_id': STORE,
+                       'is_master': is_master})
+
+                session.execute(text("""
+                    INSERT INTO manager_informations (
+                        name,
+                        phone_number,
+                        email,
+                        seller_id,
+                        ordering
+                    ) VALUES (
+                        '담당자',
+                        '010-0000-0000',
+                        'manager@brandi.com',
+                        :seller_id,
+                        1
+                    )
+                """), {'seller_id': seller_id})
+
+            with self.app.app_context():
+                self.refresh_token = SellerService(SellerDao(), {}).issue_tokens(2, session)['refresh_token']
+            session.commit()
+
+        finally:
+            session.close()
+
+    def authorization(self, seller_id):
+        access_token = jwt.encode({'seller_id': seller_id}, 'test-secret', 'HS256')
+        return {'Authorization': access_token.decode('utf-8') if isinstance(access_token, bytes) else access_token}
+
+    def seller_page(self, seller_status_id):
+        return {
+            'image':                        'image.jpg',
+            'simple_introduce':             '한줄 소개',
+            'brand_crm_number':             '02-000-0000',
+            'zip_code':                     12345,
+            'address':                      '주소',
+            'detail_address':               '상세 주소',
+            'brand_crm_open':               '10:00',
+            'brand_crm_end':                '18:00',
+            'delivery_information':         '배송 정보',
+            'refund_exchange_information':  '교환/환불 정보',
+            'seller_status_id':             seller_status_id,
+            'is_brand_crm_holiday':         0,
+            'brand_name_korean':            '브랜드',
+            'brand_name_english':           'brand',
+            'manager_information':          [
+                {'name': '담당자', 'phone_number': '010-1234-5678', 'email': 'manager@brandi.com'}
+            ]
+        }
+
+    def seller_status(self):
+        session = self.session_factory()
+        try:
+            return session.execute(text("""
+                SELECT
+                    seller_status_id,
+                    (SELECT COUNT(*) FROM seller_status_histories WHERE seller_id = 2) AS history_count,
+                    (SELECT COUNT(*) FROM seller_status_events WHERE seller_id = 2) AS event_count
+                FROM sellers
+                WHERE id = 2
+            """)).fetchone()
+
+        finally:
+            session.close()
+
+    def assert_refresh_rejected(self):
+        response = self.client.post('/login/refresh', json={'refresh_token': self.refresh_token})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {'message': 'invalid refresh token'})
+
+    def test_refresh_works_before_status_change(self):
+        response = self.client.post('/login/refresh', json={'refresh_token': self.refresh_token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_my_page_status_change_revokes_refresh_token(self):
+        response = self.client.put('/mypage', json=self.seller_page(CLOSED_TEMPORARILY),
+                                   headers=self.authorization(2))
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+        status = self.seller_status()
+        self.assertEqual(status['seller_status_id'], CLOSED_TEMPORARILY)
+        self.assertEqual((status['history_count'], status['event_count']), (1, 1))
+        self.assert_refresh_rejected()
+
+    def test_master_page_status_change_revokes_refresh_token(self):
+        page = dict(self.seller_page(CLOSED_TEMPORARILY), seller_property_id=1)
+        response = self.client.put('/master/management-seller/2', json=page, headers=self.authorization(1))
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+        status = self.seller_status()
+        self.assertEqual(status['seller_status_id'], CLOSED_TEMPORARILY)
+        self.assertEqual((status['history_count'], status['event_count']), (1, 1))
+        self.assert_refresh_rejected()
+
+    def test_same_status_keeps_refresh_token(self):
+        response = self.client.put('/mypage', json=self.seller_page(STORE), headers=self.authorization(2))
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+        status = self.seller_status()
+        self.assertEqual((status['history_count'], status['event_count']), (0, 0))
+        response = self.client.post('/login/refresh', json={'refresh_token': self.refresh_token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_status_is_rejected(self):
+        response = self.client.put('/mypage', json=self.seller_page(99), headers=self.authorization(2))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.seller_status()['seller_status_id'], STORE)
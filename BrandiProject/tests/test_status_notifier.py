@@ -0,0 +1,149 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from testing import create_test_app
+from tools.slack_stub import SlackStub
+
+
+class StatusNotifierTest(unittest.TestCase):
+    """
+    StatusNotifier.run_once 가 outbox 알림을 로컬 슬랙 stand-in ( tools/slack_stub.py ) 으로 보내는지 확인
+    """
+    def setUp(self):
+        self.stub = SlackStub()
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+
+        app = create_test_app(SLACK_API_URL=self.stub.base_url, SLACK_API_TOKEN='xoxb-test',
+                              STATUS_NOTIFIER_BATCH_SIZE=2, STATUS_NOTIFIER_BASE_BACKOFF=5)
+        self.notifier = app.extensions['status_notifier']
+
+        session = self.notifier.session_factory()
+        try:
+            for seller_id, seller_status_id in ((1, 2), (2, 3), (3, 5)):
+                session.execute(text("""
+                    INSERT INTO sellers (
+                        id,
+                        account,
+                        password,
+                        brand_name_korean,
+                        brand_name_english,
+                        brand_crm_number,
+                        seller_property_id,
+                        seller_status_id
+                    ) VALUES (
+                        :id,
+                        :account,
+                        'password',
+                        '브랜드',
+                        'brand',
+                        '02-000-0000',
+                        1,
+                        :seller_status_id
+                    )
+                """), {'id': seller_id, 'account': 'seller{}'.format(seller_id), 'seller_status_id': seller_status_id})
+
+            self.notifier.seller_dao.insert_status_events([1, 2, 3], datetime.now(), session)
+            session.commit()
+
+        finally:
+            session.close()
+
+    def events(self):
+        session = self.notifier.session_factory()
+        try:
+            return session.execute(text("""
+                SELECT
+                    seller_id,
+                    attempts,
+                    next_attempt_time,
+                    claim_token,
+                    sent_time
+                FROM seller_status_events
+                ORDER BY id
+            """)).fetchall()
+
+        finally:
+            session.close()
+
+    def test_sends_events_in_batches(self):
+        self.assertEqual(self.notifier.run_once(), 2)
+        self.assertEqual(self.notifier.run_once(), 1)
+        self.assertEqual(self.notifier.run_once(), 0)
+
+        # 알림 여러 개는 한 메세지에 한 줄씩
+        self.assertEqual(len(self.stub.messages), 2)
+        self.assertEqual(self.stub.messages[0]['method'], 'chat.postMessage')
+        self.assertEqual(self.stub.messages[0]['text'].split('\n'), [
+            'id 1번 셀러의 상태가 입점으로 변경되었습니다.',
+            'id 2번 셀러의 상태가 휴점으로 변경되었습니다.'
+        ])
+        self.assertEqual(self.stub.messages[1]['text'], 'id 3번 셀러의 상태가 퇴점으로 변경되었습니다.')
+
+        self.assertTrue(all(event['sent_time'] is not None and event['claim_token'] is None
+                            for event in self.events()))
+        self.assertEqual(self.notifier.stats, {'sent': 3, 'failed': 0, 'batches': 2})
+
+    def test_retries_with_backoff_after_server_error(self):
+        self.stub.fail_count = 2
+
+        # 첫 번째 실패는 base_backoff ( 5 초 ) 뒤에 다시 보냄
+        before = datetime.now().replace(microsecond=0)
+        self.assertEqual(self.notifier.run_once(), 2)
+        after = datetime.now()
+
+        self.assertEqual(self.stub.failed_requests, 1)
+        self.assertEqual(self.stub.messages, [])
+        failed = self.events()[:2]
+        for event in failed:
+            self.assertEqual(event['attempts'], 1)
+            self.assertIsNone(event['sent_time'])
+            self.assertIsNone(event['claim_token'])
+            self.assertTrue(before + timedelta(seconds=5) <= event['next_attempt_time'] <= after + timedelta(seconds=5))
+
+        # 재시도 시간이 되지 않은 알림은 건너뛰고 남은 알림을 보냄 ( 두 번째 실패 )
+        self.assertEqual(self.notifier.run_once(), 1)
+        self.assertEqual(self.events()[2]['attempts'], 1)
+        self.assertEqual(self.stub.failed_requests, 2)
+
+        # 재시도 시간이 지나면 다시 보내고, 두 번째 실패는 두 배 ( 10 초 ) 뒤로 미룸
+        self.rewind_next_attempt_time()
+        self.stub.fail_count = 1
+        before = datetime.now().replace(microsecond=0)
+        self.assertEqual(self.notifier.run_once(), 2)
+        after = datetime.now()
+        for event in self.events()[:2]:
+            self.assertEqual(event['attempts'], 2)
+            self.assertTrue(before + timedelta(seconds=10) <= event['next_attempt_time']
+                            <= after + timedelta(seconds=10))
+
+        self.rewind_next_attempt_time()
+        self.assertEqual(self.notifier.run_once(), 2)
+        self.assertEqual(self.notifier.run_once(), 1)
+
+        self.assertEqual(len(self.stub.messages), 2)
+        self.assertTrue(all(event['sent_time'] is not None for event in self.events()))
+        self.assertEqual(self.notifier.stats, {'sent': 3, 'failed': 5, 'batches': 2})
+
+    def rewind_next_attempt_time(self):
+        # 기다리지 않고 재시도하도록 다음 전송 시간을 과거로 바꾸기
+        session = self.notifier.session_factory()
+        try:
+            session.execute(text("""
+                UPDATE
+                    seller_status_events
+                SET
+                    next_attempt_time = :past
+                WHERE
+                    sent_time IS NULL
+            """), {'past': datetime.now() - timedelta(seconds=1)})
+            session.commit()
+
+        finally:
+            session.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
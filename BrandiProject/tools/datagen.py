@@ -0,0 +1,532 @@
+"""
+운영 데이터와 비슷한 모양의 셀러, 상품, 옵션, 주문 데이터 생성기
+
+- 소수의 브랜드가 대부분의 상품을 가짐 ( --seller-skew )
+- 상품마다 컬러 x 사이즈 옵션, 가격 변경 이력 ( product_records ) 이 길게 이어짐
+- 주문 시간은 하루 중 시간대별 차이와 세일 이벤트 같은 몰림 구간이 있음
+- 주문 상태 이력 ( order_status_histories ) 은 주문 시간이 오래될수록 배송완료, 구매확정까지 이어짐
+
+id 구간을 나눠서 여러 프로세스가 동시에 bulk insert ( multi-row INSERT 또는 LOAD DATA ) 함
+같은 --seed, --end-time 이면 프로세스 수와 상관없이 같은 데이터가 만들어짐
+
+    python -m tools.datagen --db-url mysql+pymysql://... --sellers 10000 --products 1000000 --orders 5000000
+    python -m tools.datagen --db-url mysql+pymysql://... --products 3000000 --method load-data --workers 8
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+import bcrypt
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+MASK = (1 << 64) - 1
+
+# 해시 스트림 번호 ( 상품 속성마다 다른 값을 쓰기 위해 )
+STREAM_SELLER, STREAM_PRICE, STREAM_COLORS, STREAM_SIZES, STREAM_COLOR_OFFSET, STREAM_SIZE_OFFSET, \
+    STREAM_DISCOUNT, STREAM_DISCOUNT_RATE, STREAM_INVENTORY, STREAM_MAX_SELL = range(1, 11)
+
+# 셀러 상태 ( 입점대기, 입점, 휴점, 퇴점대기, 퇴점 ) 와 비율
+SELLER_STATUS_WEIGHTS = ((1, 5), (2, 80), (3, 8), (4, 4), (5, 3))
+
+# 셀러 속성 ( 쇼핑몰, 마켓, 로드샵, 디자이너브랜드, 제너럴브랜드, 내셔널브랜드, 뷰티 )
+SELLER_PROPERTY_IDS = (1, 2, 3, 4, 5, 6, 7)
+
+# 상품 하나의 최대 컬러 수, 사이즈 수 ( 옵션 id 는 상품마다 MAX_COLORS x MAX_SIZES 칸을 미리 잡아둠 )
+MAX_COLORS = 4
+MAX_SIZES = 5
+
+# 시간대별 주문 비율 ( 0시 ~ 23시 )
+HOURLY_WEIGHTS = (6, 4, 2, 1, 1, 1, 2, 4, 6, 7, 8, 9, 11, 10, 9, 9, 9, 10, 11, 12, 14, 16, 15, 10)
+
+# 주문 한 건의 상품 수와 비율
+ORDER_LINE_WEIGHTS = ((1, 70), (2, 20), (3, 10))
+
+CLOSE_TIME = '9999-12-31 23:59:59'
+
+TABLE_COLUMNS = {
+    'sellers': ('id', 'account', 'password', 'brand_name_korean', 'brand_name_english', 'brand_crm_number',
+                'seller_property_id', 'seller_status_id', 'is_master', 'is_delete', 'created_at'),
+    'manager_informations': ('name', 'phone_number', 'email', 'seller_id', 'ordering'),
+    'seller_status_histories': ('update_time', 'seller_status_id', 'seller_id'),
+    'products': ('id', 'name', 'seller_id', 'is_sell', 'is_display', 'is_discount', 'sub_categories_id', 'price',
+                 'discount_rate', 'discount_price', 'discount_start_date', 'discount_end_date', 'simple_information',
+                 'main_image', 'detail', 'minimum_sell_count', 'maximum_sell_count', 'code_number', 'created_at'),
+    'product_records': ('seller_id', 'product_id', 'product_name', 'price', 'discount_rate', 'start_time',
+                        'close_time', 'main_image'),
+    'options': ('id', 'product_id', 'color_id', 'size_id', 'is_inventory_manage', 'count', 'ordering'),
+    'orders': ('id', 'user_name', 'phone_number', 'zip_code', 'address', 'detail_address', 'number', 'created_at'),
+    'order_details': ('order_id', 'product_id', 'detail_number', 'count', 'order_status_id', 'option_id',
+                      'total_price', 'seller_id'),
+    'order_status_histories': ('update_time', 'order_status_id', 'order_id')
+}
+
+
+def unit(seed, stream, idx):
+    """ ( seed, stream, idx ) 로 정해지는 0 이상 1 미만의 값 ( splitmix64 )
+
+    상품 속성을 상품 번호만으로 다시 계산할 수 있어서 주문을 만드는 프로세스가 상품 테이블을 조회하지 않아도 됨
+    """
+    z = (seed * 0x9E3779B97F4A7C15 + stream * 0xBF58476D1CE4E5B9 + idx * 0x94D049BB133111EB) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return ((z ^ (z >> 31)) >> 11) / float(1 << 53)
+
+
+def skewed_rank(count, value, skew):
+    """ 0 이상 count 미만의 순위, 앞 순위일수록 자주 나옴
+
+    skew 가 1 이면 로그 균등 분포 ( Zipf ) 로 1만 개 중 상위 1% 가 절반을 차지하고, 클수록 더 앞 순위에 몰림
+    """
+    return min(int(count ** (value ** skew)) - 1, count - 1)
+
+
+def weighted_choice(rng, weights):
+    value = rng.random() * sum(weight for _, weight in weights)
+    for item, weight in weights:
+        value -= weight
+        if value < 0:
+            return item
+    return weights[-1][0]
+
+
+class ProductShape:
+    """
+    상품 번호 ( 0 부터 ) 로 셀러, 가격, 할인, 옵션 구성을 계산
+    """
+    def __init__(self, plan):
+        self.seed = plan['seed']
+        self.plan = plan
+
+    def seller_id(self, idx):
+        # 순위가 앞인 셀러일수록 상품이 많음 ( 첫 번째 셀러는 마스터라 제외 )
+        plan = self.plan
+        if plan['sellers'] == 1:
+            return plan['seller_start']
+        return plan['seller_start'] + 1 + skewed_rank(plan['sellers'] - 1, unit(self.seed, STREAM_SELLER, idx),
+                                                      plan['seller_skew'])
+
+    def price(self, idx):
+        return 5000 + 100 * int(unit(self.seed, STREAM_PRICE, idx) * 1950)
+
+    def discount_rate(self, idx):
+        # 20% 의 상품이 지금 할인 중
+        if unit(self.seed, STREAM_DISCOUNT, idx) >= 0.2:
+            return 0
+        return 10 + 5 * int(unit(self.seed, STREAM_DISCOUNT_RATE, idx) * 9)
+
+    def discount_price(self, idx):
+        # PricingEngine.discount_price 와 같은 계산
+        return round(int(self.price(idx) * (100 - self.discount_rate(idx)) / 100), -1)
+
+    def option_shape(self, idx):
+        # 컬러는 1 ~ 2개가 대부분, 사이즈는 연속된 1 ~ 5개
+        plan = self.plan
+        colors = 1 + int(unit(self.seed, STREAM_COLORS, idx) ** 2 * MAX_COLORS)
+        sizes = 1 + int(unit(self.seed, STREAM_SIZES, idx) * MAX_SIZES)
+        color_offset = int(unit(self.seed, STREAM_COLOR_OFFSET, idx) * len(plan['color_ids']))
+        size_offset = int(unit(self.seed, STREAM_SIZE_OFFSET, idx) * len(plan['size_ids']))
+        return colors, sizes, color_offset, size_offset
+
+    def option(self, idx, slot):
+        # 옵션 칸 번호로 ( 옵션 id, 컬러 id, 사이즈 id )
+        plan = self.plan
+        colors, sizes, color_offset, size_offset = self.option_shape(idx)
+        color_id = plan['color_ids'][(color_offset + slot // sizes) % len(plan['color_ids'])]
+        size_id = plan['size_ids'][(size_offset + slot % sizes) % len(plan['size_ids'])]
+        return plan['option_start'] + idx * MAX_COLORS * MAX_SIZES + slot, color_id, size_id
+
+    def option_count(self, idx):
+        colors, sizes, _, _ = self.option_shape(idx)
+        return colors * sizes
+
+    def is_inventory_manage(self, idx):
+        return int(unit(self.seed, STREAM_INVENTORY, idx) < 0.3)
+
+    def maximum_sell_count(self, idx):
+        return 10 + int(unit(self.seed, STREAM_MAX_SELL, idx) * 10)
+
+
+def order_intensity(plan):
+    """ 분 단위 누적 주문 비율
+
+    시간대별 비율에 주말 가중치와 세일 이벤트 같은 몰림 구간 ( 5 ~ 20 배 ) 을 곱함
+    """
+    rng = random.Random('{}:bursts'.format(plan['seed']))
+    minutes = plan['days'] * 24 * 60
+    bursts = []
+    for _ in range(plan['bursts']):
+        start = rng.randrange(minutes)
+        bursts.append((start, start + rng.randint(60, 240), rng.uniform(5, 20)))
+
+    start_time = plan['end_time'] - timedelta(days=plan['days'])
+    cumulative = []
+    total = 0.0
+    for minute in range(minutes):
+        moment = start_time + timedelta(minutes=minute)
+        weight = HOURLY_WEIGHTS[moment.hour] * (1.3 if moment.weekday() >= 5 else 1.0)
+        for burst_start, burst_end, multiplier in bursts:
+            if burst_start <= minute < burst_end:
+                weight *= multiplier
+        total += weight
+        cumulative.append(total)
+
+    return cumulative
+
+
+class InsertWriter:
+    """
+    드라이버의 executemany 로 여러 줄을 한 번에 insert ( pymysql, mysqlclient 는 multi-row INSERT 로 바꿔서 실행 )
+    """
+    def __init__(self, engine):
+        self.connection = engine.raw_connection()
+        self.placeholder = '?' if engine.dialect.paramstyle == 'qmark' else '%s'
+        if engine.dialect.name == 'mysql':
+            cursor = self.connection.cursor()
+            cursor.execute('SET foreign_key_checks = 0, unique_checks = 0')
+            cursor.close()
+
+    def write(self, table, rows):
+        if not rows:
+            return
+        columns = TABLE_COLUMNS[table]
+        cursor = self.connection.cursor()
+        cursor.executemany('INSERT INTO {} ({}) VALUES ({})'.format(
+            table, ', '.join(columns), ', '.join([self.placeholder] * len(columns))), rows)
+        cursor.close()
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class LoadDataWriter(InsertWriter):
+    """
+    임시 파일에 탭 구분 텍스트로 쓰고 LOAD DATA LOCAL INFILE 로 넣기 ( mysql, local_infile 이 켜져 있어야 함 )
+    """
+    ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+    def write(self, table, rows):
+        if not rows:
+            return
+
+        handle, path = tempfile.mkstemp(suffix='.tsv')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as tsv:
+                for row in rows:
+                    tsv.write('\t'.join('\\N' if value is None else str(value).translate(self.ESCAPES)
+                                        for value in row))
+                    tsv.write('\n')
+
+            cursor = self.connection.cursor()
+            cursor.execute("LOAD DATA LOCAL INFILE '{}' INTO TABLE {} CHARACTER SET utf8mb4 "
+                           "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({})".format(
+                               path, table, ', '.join(TABLE_COLUMNS[table])))
+            cursor.close()
+        finally:
+            os.remove(path)
+
+
+WRITERS = {'insert': InsertWriter, 'load-data': LoadDataWriter}
+
+# 워커 프로세스마다 한 번 만드는 값
+worker_state = {}
+
+
+def init_worker(db_url, method, plan):
+    connect_args = {'local_infile': True} if method == 'load-data' else {}
+    engine = create_engine(db_url, poolclass=NullPool, connect_args=connect_args)
+    worker_state['writer'] = WRITERS[method](engine)
+    worker_state['plan'] = plan
+    worker_state['shape'] = ProductShape(plan)
+    worker_state['intensity'] = order_intensity(plan) if plan['orders'] else None
+
+
+def chunk_rng(plan, table, chunk):
+    # 같은 청크는 어느 프로세스에서 만들어도 같은 값
+    return random.Random('{}:{}:{}'.format(plan['seed'], table, chunk))
+
+
+def generate_sellers(chunk):
+    plan, writer = worker_state['plan'], worker_state['writer']
+    rng = chunk_rng(plan, 'sellers', chunk)
+    first = chunk * plan['chunk_size']
+    sellers, managers, histories = [], [], []
+
+    for idx in range(first, min(first + plan['chunk_size'], plan['sellers'])):
+        seller_id = plan['seller_start'] + idx
+        created_at = plan['end_time'] - timedelta(seconds=rng.randrange(3 * 365 * 24 * 3600))
+        status_id = 2 if idx == 0 else weighted_choice(rng, SELLER_STATUS_WEIGHTS)
+        sellers.append((seller_id, '{}{}'.format(plan['account_prefix'], seller_id), plan['password_hash'],
+                        '브랜드{}'.format(seller_id), 'brand{}'.format(seller_id),
+                        '02-{:03d}-{:04d}'.format(rng.randrange(1000), rng.randrange(10000)),
+                        rng.choice(SELLER_PROPERTY_IDS), status_id, int(idx == 0), int(status_id == 5), created_at))
+
+        for ordering in range(1, rng.choice((1, 1, 1, 2, 3)) + 1):
+            managers.append(('담당자{}'.format(ordering), '010-{:04d}-{:04d}'.format(rng.randrange(10000),
+                                                                                   rng.randrange(10000)),
+                             'manager{}_{}@brandi.com'.format(seller_id, ordering), seller_id, ordering))
+
+        # 입점대기 -> 입점 -> ( 휴점, 퇴점대기 -> 퇴점 )
+        chain = {1: (1,), 2: (1, 2), 3: (1, 2, 3), 4: (1, 2, 4), 5: (1, 2, 4, 5)}[status_id]
+        update_time = created_at
+        for chain_status_id in chain:
+            histories.append((update_time, chain_status_id, seller_id))
+            update_time += timedelta(days=rng.randint(1, 60))
+
+    writer.write('sellers', sellers)
+    writer.write('manager_informations', managers)
+    writer.write('seller_status_histories', histories)
+    writer.commit()
+
+    return {'sellers': len(sellers), 'manager_informations': len(managers),
+            'seller_status_histories': len(histories)}
+
+
+def generate_products(chunk):
+    plan, writer, shape = worker_state['plan'], worker_state['writer'], worker_state['shape']
+    rng = chunk_rng(plan, 'products', chunk)
+    first = chunk * plan['chunk_size']
+    products, records, options = [], [], []
+    end_time = plan['end_time']
+
+    for idx in range(first, min(first + plan['chunk_size'], plan['products'])):
+        product_id = plan['product_start'] + idx
+        seller_id = shape.seller_id(idx)
+        price, discount_rate = shape.price(idx), shape.discount_rate(idx)
+        name = 'product{}'.format(product_id)
+        main_image = 'https://image.brandi.com/product/{}.jpg'.format(product_id)
+        # 모든 상품은 주문 기간이 시작되기 전에 등록됨
+        created_at = end_time - timedelta(days=plan['days'], seconds=rng.randrange(365 * 24 * 3600))
+
+        if discount_rate:
+            discount_start = end_time - timedelta(days=rng.randint(1, 14))
+            discount_end = end_time + timedelta(days=rng.randint(1, 14))
+        else:
+            discount_start = discount_end = None
+
+        products.append((product_id, name, seller_id, int(rng.random() < 0.9), int(rng.random() < 0.9),
+                         int(bool(discount_rate)), rng.choice(plan['sub_category_ids']), price, discount_rate,
+                         shape.discount_price(idx), discount_start, discount_end, '간단 설명', main_image, '상세 설명',
+                         1, shape.maximum_sell_count(idx), product_id * 100, created_at))
+
+        # 가격 변경 이력, 마지막 이력이 지금 가격 ( 평균 5개, 긴 꼬리 )
+        record_count = min(1 + int(rng.expovariate(1 / 4)), plan['max_records'])
+        start_time = created_at
+        step = (end_time - created_at) / record_count
+        for record in range(record_count):
+            is_last = record == record_count - 1
+            close_time = CLOSE_TIME if is_last else start_time + step
+            records.append((seller_id, product_id, name, price if is_last else rng.randrange(5000, 200000, 100),
+                            discount_rate if is_last else rng.choice((0, 0, 10, 20, 30)), start_time, close_time,
+                            main_image))
+            start_time += step
+
+        is_inventory_manage = shape.is_inventory_manage(idx)
+        for slot in range(shape.option_count(idx)):
+            option_id, color_id, size_id = shape.option(idx, slot)
+            options.append((option_id, product_id, color_id, size_id, is_inventory_manage,
+                            rng.randint(10, 1000) if is_inventory_manage else None, slot + 1))
+
+    writer.write('products', products)
+    writer.write('product_records', records)
+    writer.write('options', options)
+    writer.commit()
+
+    return {'products': len(products), 'product_records': len(records), 'options': len(options)}
+
+
+def order_status_chain(rng, age_days):
+    # 주문한 지 오래될수록 배송중, 배송완료, 구매확정까지 진행됨
+    if age_days < 1:
+        final_status = weighted_choice(rng, ((1, 80), (2, 20)))
+    elif age_days < 3:
+        final_status = weighted_choice(rng, ((1, 20), (2, 60), (3, 20)))
+    elif age_days < 14:
+        final_status = weighted_choice(rng, ((2, 10), (3, 70), (4, 20)))
+    else:
+        final_status = weighted_choice(rng, ((3, 30), (4, 70)))
+
+    return range(1, final_status + 1)
+
+
+def generate_orders(chunk):
+    plan, writer, shape = worker_state['plan'], worker_state['writer'], worker_state['shape']
+    intensity = worker_state['intensity']
+    rng = chunk_rng(plan, 'orders', chunk)
+    first = chunk * plan['chunk_size']
+    orders, details, histories = [], [], []
+    start_time = plan['end_time'] - timedelta(days=plan['days'])
+
+    for idx in range(first, min(first + plan['chunk_size'], plan['orders'])):
+        order_id = plan['order_start'] + idx
+
+        # 주문 번호 순서대로 시간이 흐르고, 주문이 몰리는 구간에는 같은 시간 안에 주문이 많음
+        minute = bisect_left(intensity, (idx + 0.5) / plan['orders'] * intensity[-1])
+        created_at = start_time + timedelta(minutes=minute, seconds=int(unit(plan['seed'], 100, idx) * 60))
+        number = created_at.strftime('%Y%m%d') + '%06d' % order_id
+        orders.append((order_id, 'user{}'.format(rng.randrange(plan['orders'])),
+                       '010-{:04d}-{:04d}'.format(rng.randrange(10000), rng.randrange(10000)),
+                       rng.randrange(10000, 100000), '서울시 강남구', '{}호'.format(rng.randrange(1, 2000)),
+                       number, created_at))
+
+        chain = order_status_chain(rng, (plan['end_time'] - created_at).total_seconds() / 86400)
+        update_time = created_at
+        for status_id in chain:
+            histories.append((update_time, status_id, order_id))
+            update_time += timedelta(hours=rng.randint(6, 72))
+
+        # 인기 상품일수록 자주 주문됨
+        product_idx_list = {skewed_rank(plan['products'], rng.random(), plan['product_skew'])
+                            for _ in range(weighted_choice(rng, ORDER_LINE_WEIGHTS))}
+        for line, product_idx in enumerate(sorted(product_idx_list), 1):
+            count = rng.choice((1, 1, 1, 2, 3))
+            option_id = shape.option(product_idx, rng.randrange(shape.option_count(product_idx)))[0]
+            details.append((order_id, plan['product_start'] + product_idx, number + '%02d' % line, count,
+                            chain[-1], option_id, shape.discount_price(product_idx) * count,
+                            shape.seller_id(product_idx)))
+
+    writer.write('orders', orders)
+    writer.write('order_details', details)
+    writer.write('order_status_histories', histories)
+    writer.commit()
+
+    return {'orders': len(orders), 'order_details': len(details), 'order_status_histories': len(histories)}
+
+
+def next_id(connection, table):
+    return connection.execute(text('SELECT COALESCE(MAX(id), 0) + 1 FROM {}'.format(table))).scalar()
+
+
+def make_plan(db_url, sellers, products, orders, seed=42, end_time=None, days=180, bursts=12, seller_skew=1.0,
+              product_skew=0.8, max_records=50, chunk_size=10000, account_prefix='datagen',
+              password='Datagen!2345'):
+    """ 생성할 데이터의 id 구간과 참조할 컬러, 사이즈, 2차 카테고리 id 정하기 """
+    engine = create_engine(db_url, poolclass=NullPool)
+    with engine.connect() as connection:
+        plan = {
+            'color_ids':        [row[0] for row in connection.execute(text('SELECT id FROM colors ORDER BY id'))],
+            'size_ids':         [row[0] for row in connection.execute(text('SELECT id FROM sizes ORDER BY id'))],
+            'sub_category_ids': [row[0] for row in connection.execute(
+                text('SELECT id FROM sub_categories ORDER BY id'))],
+            'seller_start':     next_id(connection, 'sellers'),
+            'product_start':    next_id(connection, 'products'),
+            'option_start':     next_id(connection, 'options'),
+            'order_start':      next_id(connection, 'orders')
+        }
+    engine.dispose()
+
+    if not plan['color_ids'] or not plan['size_ids'] or not plan['sub_category_ids']:
+        raise SystemExit('colors, sizes and sub_categories must be loaded first')
+
+    if sellers < 1 and products:
+        raise SystemExit('products need at least one seller')
+
+    # bcrypt 는 느려서 모든 셀러가 같은 비밀번호 해시를 사용 ( salt 도 seed 로 고정 )
+    salt_rng = random.Random('{}:salt'.format(seed))
+    # salt 의 마지막 글자는 하위 4 bit 가 0 인 문자만 가능
+    salt = b'$2b$12$' + bytes(salt_rng.choice(b'./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789')
+                              for _ in range(21)) + bytes([salt_rng.choice(b'.Oeu')])
+
+    plan.update({
+        'seed':             seed,
+        'sellers':          sellers,
+        'products':         products,
+        'orders':           orders,
+        'end_time':         end_time or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+        'days':             days,
+        'bursts':           bursts,
+        'seller_skew':      seller_skew,
+        'product_skew':     product_skew,
+        'max_records':      max_records,
+        'chunk_size':       chunk_size,
+        'account_prefix':   account_prefix,
+        'password_hash':    bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    })
+
+    return plan
+
+
+def generate(db_url, sellers, products, orders, workers=None, method='insert', log=None, **kwargs):
+    """ 셀러 -> 상품 -> 주문 순서로 데이터 만들기
+
+    단계마다 청크를 워커 프로세스들이 나눠서 처리함
+
+    Args:
+        db_url   : 데이터베이스 주소
+        sellers  : 셀러 수
+        products : 상품 수
+        orders   : 주문 수
+        workers  : 프로세스 수 ( 기본값 cpu 수 )
+        method   : insert 또는 load-data
+        log      : 단계별 진행 상황을 받을 함수
+        **kwargs : make_plan 의 나머지 인자
+
+    Returns:
+        counts : 테이블별로 넣은 row 수
+
+    """
+    plan = make_plan(db_url, sellers, products, orders, **kwargs)
+    counts = {}
+
+    with multiprocessing.get_context('spawn').Pool(workers or os.cpu_count(), initializer=init_worker,
+                                                   initargs=(db_url, method, plan)) as pool:
+        for name, task, total in (('sellers', generate_sellers, sellers),
+                                  ('products', generate_products, products),
+                                  ('orders', generate_orders, orders)):
+            started = time.perf_counter()
+            phase_counts = {}
+            for chunk_counts in pool.imap_unordered(task, range(math.ceil(total / plan['chunk_size']))):
+                for table, count in chunk_counts.items():
+                    phase_counts[table] = phase_counts.get(table, 0) + count
+
+            elapsed = time.perf_counter() - started
+            if log is not None:
+                rows = sum(phase_counts.values())
+                log('{:8} {:>12,} rows in {:7.1f}s ( {:,.0f} rows/s ) {}'.format(
+                    name, rows, elapsed, rows / elapsed if elapsed else 0, phase_counts))
+            counts.update(phase_counts)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='synthetic seller, product and order data')
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--sellers', type=int, default=10000)
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--orders', type=int, default=5000000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-time', type=lambda value: datetime.strptime(value, '%Y-%m-%d %H:%M:%S'),
+                        help='마지막 주문 시간 ( 기본값 오늘 0시 ), 같은 값을 주면 같은 데이터')
+    parser.add_argument('--days', type=int, default=180, help='주문 기간')
+    parser.add_argument('--bursts', type=int, default=12, help='주문이 몰리는 구간 수')
+    parser.add_argument('--seller-skew', type=float, default=1.0, help='클수록 소수 셀러에 상품이 몰림')
+    parser.add_argument('--product-skew', type=float, default=0.8, help='클수록 소수 상품에 주문이 몰림')
+    parser.add_argument('--max-records', type=int, default=50, help='상품 하나의 최대 가격 변경 이력 수')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--method', choices=sorted(WRITERS), default='insert')
+    parser.add_argument('--account-prefix', default='datagen')
+    parser.add_argument('--password', default='Datagen!2345')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.db_url, args.sellers, args.products, args.orders, workers=args.workers,
+                      method=args.method, log=print, seed=args.seed, end_time=args.end_time, days=args.days,
+                      bursts=args.bursts, seller_skew=args.seller_skew, product_skew=args.product_skew,
+                      max_records=args.max_records, chunk_size=args.chunk_size,
+                      account_prefix=args.account_prefix, password=args.password)
+    print('total {:,} rows in {:.1f}s'.format(sum(counts.values()), time.perf_counter() - started))
+
+
+if __name__ == '__main__':
+    main()
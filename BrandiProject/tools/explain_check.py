@@ -0,0 +1,426 @@
+"""
+DAO 의 모든 sql 구문에 EXPLAIN 을 실행해서 full table scan, filesort, 임시 테이블을 찾는 도구
+
+DAO 메소드를 실행하지 않는 세션 ( ExplainSession ) 으로 호출해서 sql 구문만 모으기 때문에 데이터는 바뀌지 않음
+query_string_list 를 받는 동적 목록 쿼리는 필터 조합마다 다른 sql 이 만들어져서 모든 조합을 확인함
+데이터를 넣은 데이터베이스에서 실행해야 옵티마이저가 실제와 같은 실행 계획을 고름
+
+결과는 JSON 으로 저장하고, 문제가 있는 구문이 있으면 exit code 1
+--baseline 으로 이전 결과를 주면 이전에 없던 문제만 실패로 봄
+
+    python -m tools.explain_check --db-url mysql+pymysql://... --output explain.json
+    python -m tools.explain_check --db-url mysql+pymysql://... --baseline explain.json --max-rows 100000
+"""
+import argparse
+import copy
+import inspect
+import itertools
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+from model import SellerDao, ProductDao, OrderDao, IdempotencyDao
+from model.dialect import create_database_engine
+from slow_query import fingerprint
+
+DAOS = (SellerDao, ProductDao, OrderDao, IdempotencyDao)
+
+# 값이 여러 개인 필터 ( 정렬 기준 )
+FILTER_VARIANTS = {'order_by': (1, 2, 3, 4)}
+
+# 딕셔너리 리스트로 받는 인자
+DICT_LIST_ARGUMENTS = {'managers', 'options', 'image_list', 'product_list', 'option_list', 'order_details',
+                       'discount_prices', 'option_counts'}
+
+# 딕셔너리로 받는 인자
+DICT_ARGUMENTS = {'seller', 'refresh_token', 'product_data', 'option', 'image', 'order_data', 'data', 'idempotency',
+                  'transition'}
+
+# 이름으로 값을 정할 수 없는 인자
+ARGUMENTS = {
+    'update_products_bulk': {'columns': {'is_sell': 1, 'price': 10000}},
+}
+
+# 실행 계획에서 이 row 수보다 적은 테이블의 full scan 은 문제로 보지 않음 ( colors, sizes 같은 작은 테이블 )
+MIN_SCAN_ROWS = 1000
+
+# 데이터베이스에서 가져온 실제 id ( load_samples )
+SAMPLES = {}
+
+
+def sample_value(name):
+    """ 인자나 바인드 파라미터 이름으로 적당한 값 만들기 """
+    if name in SAMPLES:
+        return SAMPLES[name]
+    if name.endswith('_list') or name.endswith('_ids') or name == 'from_status':
+        return [1, 2, 3]
+    if name.endswith('_id') or name == 'id':
+        return 1
+    if name.endswith('_date') or name.endswith('_time') or name in ('now', 'at', 'created_at'):
+        return datetime.now().replace(microsecond=0)
+    if name in ('limit', 'batch_size', 'days'):
+        return 10
+    if name in ('offset', 'last_id'):
+        return 0
+    if name.startswith('is_') or name in ('status', 'button', 'count', 'ordering', 'lease_time'):
+        return 1
+    if 'price' in name or name.endswith('_rate') or name.endswith('number') or name == 'zip_code':
+        return 10000
+    return 'sample'
+
+
+class SampleDict(dict):
+    """
+    어떤 키를 읽어도 이름에 맞는 값을 돌려주는 딕셔너리
+    """
+    def __missing__(self, key):
+        return sample_value(key)
+
+    def get(self, key, default=None):
+        return self[key]
+
+
+class FilterDict(dict):
+    """
+    켜진 필터만 값이 있고 나머지는 None, 읽은 키를 accessed 에 기록
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.accessed = []
+
+    def __getitem__(self, key):
+        if key not in self.accessed:
+            self.accessed.append(key)
+        return super().__getitem__(key)
+
+    def __missing__(self, key):
+        return None
+
+    def get(self, key, default=None):
+        return self[key]
+
+
+class SampleRow:
+    """
+    fetchone, fetchall 대신 돌려주는 row, 어떤 컬럼을 읽어도 값이 있음
+    """
+    # JSON 배열로 묶어서 가져오는 컬럼 ( ProductDao.select_product )
+    JSON_COLUMNS = {'options', 'image_list'}
+
+    def __getitem__(self, key):
+        if key in self.JSON_COLUMNS:
+            return '[]'
+        return 1 if isinstance(key, int) else sample_value(key)
+
+    def keys(self):
+        return []
+
+    def __iter__(self):
+        return iter(())
+
+
+class SampleResult:
+    def __init__(self, params):
+        # rowcount 를 리스트 길이와 비교하는 DAO 가 있어서 리스트 파라미터의 길이를 돌려줌
+        if isinstance(params, (list, tuple)):
+            self.rowcount = len(params)
+        else:
+            lists = [value for value in dict.values(params or {}) if isinstance(value, (list, tuple))]
+            self.rowcount = len(lists[0]) if lists else 1
+        self.lastrowid = 1
+
+    def fetchone(self):
+        return SampleRow()
+
+    def fetchall(self):
+        # 가져온 row 수를 요청한 id 수와 비교하는 DAO 가 있어서 rowcount 만큼 돌려줌
+        return [SampleRow() for _ in range(max(self.rowcount, 1))]
+
+    def scalar(self):
+        return 1
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class ExplainSession:
+    """
+    session.execute 로 받은 sql 구문과 파라미터를 실행하지 않고 모아둠
+    DAO 가 데이터베이스에 맞는 sql 을 만들도록 get_bind 는 EXPLAIN 을 실행할 연결을 돌려줌
+    """
+    def __init__(self, bind):
+        self.bind = bind
+        self.statements = []
+
+    def get_bind(self):
+        return self.bind
+
+    def execute(self, clause, params=None):
+        self.statements.append((clause, params))
+        return SampleResult(params)
+
+
+def load_samples(connection):
+    # 실행 계획이 실제 데이터 분포를 보도록 존재하는 id 사용 ( 테이블이 비어 있으면 1 )
+    queries = {
+        'seller_id':    'SELECT MAX(seller_id) FROM products',
+        'product_id':   'SELECT MAX(id) FROM products',
+        'order_id':     'SELECT MAX(id) FROM orders',
+        'account':      'SELECT MAX(account) FROM sellers',
+        'category_id':  'SELECT MIN(categories_id) FROM sub_categories'
+    }
+    for name, query in queries.items():
+        value = connection.execute(text(query)).scalar()
+        if value is not None:
+            SAMPLES[name] = value
+
+
+def method_arguments(method):
+    # 인자 이름으로 DAO 메소드에 넘길 값 만들기 ( session 제외 )
+    arguments = {}
+    for name in list(inspect.signature(method).parameters)[1:]:
+        if name == 'session':
+            continue
+        if name in ARGUMENTS.get(method.__name__, {}):
+            arguments[name] = ARGUMENTS[method.__name__][name]
+        elif name in DICT_LIST_ARGUMENTS:
+            arguments[name] = [SampleDict(), SampleDict()]
+        elif name in DICT_ARGUMENTS:
+            arguments[name] = SampleDict()
+        else:
+            arguments[name] = sample_value(name)
+
+    return arguments
+
+
+def capture(dao, method, arguments, bind):
+    """ DAO 메소드를 ExplainSession 으로 호출해서 실행하려던 sql 구문 모으기
+
+    Returns:
+        statements : ( TextClause, 파라미터 ) 리스트
+        error      : 메소드 실행 중 에러, 없으면 None
+    """
+    session = ExplainSession(bind)
+    try:
+        getattr(dao, method.__name__)(session=session, **arguments)
+        error = None
+    except Exception as e:
+        error = '{}: {}'.format(type(e).__name__, e)
+
+    return session.statements, error
+
+
+def filter_combinations(dao, method, max_filters, bind):
+    """ 동적 목록 쿼리의 필터 조합 만들기
+
+    모든 필터를 끈 상태와 켠 상태로 실행해보면서 DAO 가 읽는 필터 키를 찾고,
+    필터마다 ( 꺼짐, 값 ... ) 중 하나를 고르는 모든 조합을 돌려줌
+    """
+    keys = []
+    while True:
+        found = list(keys)
+        for filters in ({}, {key: FILTER_VARIANTS.get(key, (sample_value(key),))[0] for key in keys}):
+            query_string_list = FilterDict(filters)
+            capture(dao, method, {'query_string_list': query_string_list}, bind)
+            found.extend(key for key in query_string_list.accessed if key not in found)
+        if found == keys:
+            break
+        keys = found
+
+    states = [(None,) + tuple(FILTER_VARIANTS.get(key, (sample_value(key),))) for key in keys]
+    for values in itertools.product(*states):
+        filters = {key: value for key, value in zip(keys, values) if value is not None}
+        if max_filters is None or len(filters) <= max_filters:
+            yield filters
+
+
+def explain(connection, clause, params):
+    """ 모은 sql 구문에 EXPLAIN 실행하기
+
+    executemany 는 첫 번째 줄의 파라미터로 실행하고, 딕셔너리에 없는 바인드 파라미터는 이름으로 값을 만듦
+    """
+    if isinstance(params, (list, tuple)):
+        params = params[0] if params else {}
+
+    values = {}
+    for name, bind in clause._bindparams.items():
+        value = dict.__getitem__(params, name) if isinstance(params, dict) and dict.__contains__(params, name) \
+            else sample_value(name)
+        if getattr(bind, 'expanding', False) and not isinstance(value, (list, tuple, set)):
+            value = [value]
+        values[name] = list(value) if isinstance(value, set) else value
+
+    statement = copy.copy(clause)
+    if connection.dialect.name == 'sqlite':
+        statement.text = 'EXPLAIN QUERY PLAN ' + clause.text
+        return [sqlite_plan_row(dict(row)) for row in connection.execute(statement, values)]
+
+    statement.text = 'EXPLAIN ' + clause.text
+    return [{
+        'table':    row['table'],
+        'type':     row['type'],
+        'key':      row['key'],
+        'rows':     row['rows'],
+        'extra':    row['Extra'] or ''
+    } for row in (dict(row) for row in connection.execute(statement, values))]
+
+
+def sqlite_plan_row(row):
+    # SCAN products / SEARCH products USING INDEX ... / USE TEMP B-TREE FOR ORDER BY
+    detail = row['detail']
+    words = detail.split()
+    table = words[1] if words[0] in ('SCAN', 'SEARCH') and len(words) > 1 else None
+    extra = []
+    if 'TEMP B-TREE FOR ORDER BY' in detail:
+        extra.append('Using filesort')
+    if 'TEMP B-TREE FOR GROUP BY' in detail or 'TEMP B-TREE FOR DISTINCT' in detail:
+        extra.append('Using temporary')
+
+    return {
+        'table':    table,
+        'type':     'ALL' if words[0] == 'SCAN' and 'INDEX' not in detail else detail.split(' ')[0].lower(),
+        'key':      None,
+        'rows':     None,
+        'extra':    '; '.join(extra)
+    }
+
+
+def plan_flags(plan, min_scan_rows, max_rows):
+    """ 실행 계획에서 문제 찾기
+
+    Returns:
+        flags          : full_scan:테이블, filesort, temporary, rows_examined
+        estimated_rows : 테이블별 예상 row 수의 곱 ( nested loop join 에서 읽는 row 수 추정 )
+    """
+    flags = []
+    estimated_rows = None
+    for row in plan:
+        if row['rows'] is not None:
+            estimated_rows = (estimated_rows or 1) * max(int(row['rows']), 1)
+
+        if row['type'] == 'ALL' and (row['rows'] is None or int(row['rows']) >= min_scan_rows):
+            flags.append('full_scan:{}'.format(row['table']))
+        if 'Using filesort' in row['extra'] and 'filesort' not in flags:
+            flags.append('filesort')
+        if 'Using temporary' in row['extra'] and 'temporary' not in flags:
+            flags.append('temporary')
+
+    if max_rows is not None and estimated_rows is not None and estimated_rows > max_rows:
+        flags.append('rows_examined')
+
+    return flags, estimated_rows
+
+
+def check(connection, min_scan_rows=MIN_SCAN_ROWS, max_rows=None, max_filters=None):
+    """ 모든 DAO 메소드의 sql 구문에 EXPLAIN 실행하기
+
+    같은 sql 구문은 한 번만 EXPLAIN 하고, 그 구문을 만든 필터 조합을 같이 기록함
+
+    Returns:
+        statements : ( DAO 메소드, 지문 ) 별 실행 계획과 문제 목록
+        errors     : 호출 또는 EXPLAIN 에 실패한 메소드
+    """
+    statements = {}
+    errors = []
+
+    for dao_class in DAOS:
+        dao = dao_class()
+        for name, method in inspect.getmembers(dao_class, inspect.isfunction):
+            if name.startswith('_'):
+                continue
+
+            label = '{}.{}'.format(dao_class.__name__, name)
+            if 'query_string_list' in inspect.signature(method).parameters:
+                runs = [(filters, {'query_string_list': FilterDict(filters)})
+                        for filters in filter_combinations(dao, method, max_filters, connection)]
+            else:
+                runs = [(None, method_arguments(method))]
+
+            for filters, arguments in runs:
+                captured, error = capture(dao, method, arguments, connection)
+                if error is not None:
+                    errors.append({'method': label, 'filters': filters, 'error': error})
+
+                for clause, params in captured:
+                    key = (label, fingerprint(clause.text))
+                    entry = statements.get(key)
+                    if entry is None:
+                        entry = statements[key] = {'method': label, 'fingerprint': key[1], 'filters': []}
+                        try:
+                            entry['plan'] = explain(connection, clause, params)
+                            entry['flags'], entry['estimated_rows'] = plan_flags(entry['plan'], min_scan_rows,
+                                                                                 max_rows)
+                        except Exception as e:
+                            entry['plan'], entry['flags'], entry['estimated_rows'] = [], [], None
+                            errors.append({'method': label, 'filters': filters,
+                                           'error': 'EXPLAIN {}: {}'.format(type(e).__name__, e)})
+
+                    if filters is not None:
+                        entry['filters'].append(filters)
+
+    return list(statements.values()), errors
+
+
+def new_flags(statements, baseline):
+    # 이전 결과에 없던 ( 메소드, 지문, 문제 )
+    known = {(entry['method'], entry['fingerprint'], flag) for entry in baseline['statements']
+             for flag in entry['flags']}
+    return [(entry['method'], entry['fingerprint'], flag) for entry in statements for flag in entry['flags']
+            if (entry['method'], entry['fingerprint'], flag) not in known]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN every DAO statement and flag bad plans')
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--output', help='결과 JSON 파일, 없으면 stdout')
+    parser.add_argument('--baseline', help='이전 결과 파일, 새로 생긴 문제만 실패로 봄')
+    parser.add_argument('--min-scan-rows', type=int, default=MIN_SCAN_ROWS)
+    parser.add_argument('--max-rows', type=int, help='예상 row 수가 이 값보다 크면 rows_examined 로 표시')
+    parser.add_argument('--max-filters', type=int, help='동시에 켜는 필터 수 제한 ( 기본값 모든 조합 )')
+    parser.add_argument('--fail-on-error', action='store_true', help='EXPLAIN 에 실패한 구문이 있어도 실패')
+    args = parser.parse_args()
+
+    engine = create_database_engine(args.db_url)
+    with engine.connect() as connection:
+        load_samples(connection)
+        statements, errors = check(connection, args.min_scan_rows, args.max_rows, args.max_filters)
+
+    flagged = [entry for entry in statements if entry['flags']]
+    report = {
+        'created_at':   datetime.now().isoformat(),
+        'dialect':      engine.dialect.name,
+        'summary': {
+            'statements':   len(statements),
+            'flagged':      len(flagged),
+            'errors':       len(errors),
+            'flags':        {flag: sum(flag in entry['flags'] for entry in statements)
+                             for flag in sorted({flag for entry in flagged for flag in entry['flags']})}
+        },
+        'statements':   sorted(statements, key=lambda entry: (not entry['flags'], entry['method'])),
+        'errors':       errors
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            failures = new_flags(statements, json.load(baseline))
+    else:
+        failures = [(entry['method'], entry['fingerprint'], flag) for entry in flagged for flag in entry['flags']]
+
+    for method, statement, flag in failures:
+        print('{:12} {:50} {}'.format(flag, method, statement[:120]), file=sys.stderr)
+
+    if failures or (args.fail_on_error and errors):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
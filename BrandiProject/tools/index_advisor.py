@@ -0,0 +1,369 @@
+"""
+느린 sql 지문 ( fingerprint ) 으로 새 인덱스를 추천하는 도구
+
+/internal/slow-queries 응답을 저장한 JSON 파일이나 slow_query 로거의 JSON 로그를 읽어서
+지문마다 테이블별 같음 조건 ( = , IN, IS NULL ), 범위 조건 ( <, >, ... ), 정렬 컬럼을 찾고
+같음 조건 -> 정렬 -> 범위 조건 순서의 복합 인덱스를 만듦
+
+이미 있는 인덱스 ( migrations/ 의 CREATE INDEX, 또는 --db-url 로 준 데이터베이스의 인덱스 ) 가
+추천 인덱스와 같은 컬럼으로 시작하면 추천하지 않음. 추천은 관련 지문의 total_ms 합이 큰 순서
+
+    curl -H "Authorization: ..." http://localhost:5000/internal/slow-queries?limit=500 > slow.json
+    python -m tools.index_advisor slow.json
+    python -m tools.index_advisor slow.json slow_query.log --migration slow_query_indexes
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from tools.migrate import MIGRATIONS_DIR, load_migrations
+
+# 인덱스 하나의 최대 컬럼 수
+MAX_INDEX_COLUMNS = 4
+
+KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'ON', 'SET', 'ORDER', 'GROUP', 'LIMIT', 'OFFSET',
+            'UNION', 'AND', 'OR', 'USING', 'AS', 'SELECT', 'VALUES'}
+
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.I)
+COLUMN = r'((?:\w+\.)?[a-z_]\w*)'
+PREDICATE_PATTERN = re.compile(COLUMN + r'\s*(<=|>=|<>|!=|=|<|>|\bIN\b|\bIS NULL\b)\s*(?:' + COLUMN + r'\b(?!\s*\())?',
+                               re.I)
+ORDER_BY_PATTERN = re.compile(r'\bORDER BY\s+(.+?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|\bUNION\b|\)|$)', re.I)
+CREATE_INDEX_PATTERN = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]*)\)', re.I)
+DROP_INDEX_PATTERN = re.compile(r'DROP\s+INDEX\s+(\w+)\s+ON\s+(\w+)', re.I)
+CREATE_TABLE_PATTERN = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.I)
+PRIMARY_KEY_PATTERN = re.compile(r'^\s*(\w+)\s[^,\n]*\bPRIMARY KEY\b', re.I | re.M)
+FOREIGN_KEY_PATTERN = re.compile(r'FOREIGN KEY\s*\((\w+)\)', re.I)
+
+
+def load_slow_queries(paths):
+    """ 느린 sql 목록 읽기
+
+    /internal/slow-queries 응답 ( {"slow_queries": [...]} ) 또는 한 줄에 JSON 하나인 slow_query 로그
+    로그는 앞에 붙은 로그 포맷을 무시하고 줄의 첫 { 부터 읽음
+
+    Returns:
+        entries : { ( dao, 지문 ): {'dao', 'fingerprint', 'count', 'total_ms'} }
+    """
+    entries = {}
+
+    def add(entry, count, total_ms):
+        key = (entry.get('dao'), entry['fingerprint'])
+        merged = entries.setdefault(key, {'dao': key[0], 'fingerprint': key[1], 'count': 0, 'total_ms': 0.0})
+        merged['count'] += count
+        merged['total_ms'] += total_ms
+
+    for path in paths:
+        with open(path, encoding='utf-8') as input_file:
+            content = input_file.read()
+
+        try:
+            document = json.loads(content)
+        except ValueError:
+            document = None
+
+        if isinstance(document, dict) and 'slow_queries' in document:
+            for entry in document['slow_queries']:
+                add(entry, entry['count'], entry['total_ms'])
+            continue
+
+        for line in content.splitlines():
+            start = line.find('{')
+            if start == -1:
+                continue
+            try:
+                entry = json.loads(line[start:])
+            except ValueError:
+                continue
+            if 'fingerprint' in entry:
+                add(entry, 1, entry.get('elapsed_ms', 0.0))
+
+    return entries
+
+
+def existing_indexes_from_migrations(directory=MIGRATIONS_DIR):
+    """ migrations/ 의 sql 로 테이블별 인덱스 컬럼 구하기
+
+    PRIMARY KEY, CREATE INDEX 와 외래키 컬럼 ( MySQL 이 인덱스를 자동으로 만듦 ) 을 인덱스로 봄
+
+    Returns:
+        indexes : { 테이블: [ ( 컬럼, ... ), ... ] }
+    """
+    indexes = {}
+    named = {}
+    for migration in load_migrations(directory):
+        for statement in migration.statements():
+            table_match = CREATE_TABLE_PATTERN.match(statement)
+            if table_match:
+                table = table_match.group(1)
+                for column in PRIMARY_KEY_PATTERN.findall(statement):
+                    indexes.setdefault(table, []).append((column,))
+                for column in FOREIGN_KEY_PATTERN.findall(statement):
+                    indexes.setdefault(table, []).append((column,))
+                continue
+
+            index_match = CREATE_INDEX_PATTERN.match(statement)
+            if index_match:
+                name, table, columns = index_match.groups()
+                named[(table, name)] = tuple(column.strip().split()[0] for column in columns.split(','))
+                continue
+
+            drop_match = DROP_INDEX_PATTERN.match(statement)
+            if drop_match:
+                named.pop((drop_match.group(2), drop_match.group(1)), None)
+
+    for (table, _), columns in named.items():
+        indexes.setdefault(table, []).append(columns)
+
+    return indexes
+
+
+def existing_indexes_from_database(db_url):
+    # 데이터베이스에 실제로 있는 인덱스
+    from sqlalchemy import create_engine, inspect
+
+    inspector = inspect(create_engine(db_url))
+    indexes = {}
+    for table in inspector.get_table_names():
+        table_indexes = indexes.setdefault(table, [])
+        primary_key = inspector.get_pk_constraint(table)['constrained_columns']
+        if primary_key:
+            table_indexes.append(tuple(primary_key))
+        for index in inspector.get_indexes(table):
+            table_indexes.append(tuple(index['column_names']))
+
+    return indexes
+
+
+def parse_fingerprint(statement):
+    """ 지문에서 테이블별 같음 조건, 범위 조건, 정렬 컬럼, 조인 컬럼 찾기
+
+    별칭 ( FROM products a ) 은 테이블 이름으로 바꾸고, 별칭 없는 컬럼은 테이블이 하나일 때만 사용
+
+    Returns:
+        access : { 테이블: {'equality': [컬럼], 'range': [컬럼], 'order': [컬럼], 'join': {상대 테이블: [컬럼]}} }
+    """
+    aliases = {}
+    for table, alias in TABLE_PATTERN.findall(statement):
+        aliases[table] = table
+        if alias and alias.upper() not in KEYWORDS:
+            aliases[alias] = table
+
+    tables = set(aliases.values())
+    access = {}
+
+    def resolve(column):
+        if '.' in column:
+            alias, name = column.split('.', 1)
+            return aliases.get(alias), name
+        return (next(iter(tables)) if len(tables) == 1 else None), column
+
+    def table_access(table):
+        return access.setdefault(table, {'equality': [], 'range': [], 'order': [], 'join': {}})
+
+    def add(kind, column):
+        table, name = resolve(column)
+        if table is None or name.upper() in KEYWORDS:
+            return
+        columns = table_access(table)[kind]
+        if name not in columns:
+            columns.append(name)
+
+    def add_join(column, other):
+        (table, name), (other_table, _) = resolve(column), resolve(other)
+        if table is None or other_table is None or table == other_table:
+            return
+        columns = table_access(table)['join'].setdefault(other_table, [])
+        if name not in columns:
+            columns.append(name)
+
+    where = re.split(r'\bWHERE\b|\bON\b', statement, flags=re.I)
+    for part in where[1:]:
+        for left, operator, right in PREDICATE_PATTERN.findall(part):
+            operator = operator.upper()
+            if operator in ('<>', '!='):
+                continue
+            if right and right.upper() not in KEYWORDS:
+                if operator == '=':
+                    add_join(left, right)
+                    add_join(right, left)
+                continue
+            if operator in ('=', 'IN', 'IS NULL'):
+                add('equality', left)
+            else:
+                add('range', left)
+
+    for order_by in ORDER_BY_PATTERN.findall(statement):
+        for column in order_by.split(','):
+            column = column.strip().split(' ')[0]
+            if column and column != '?':
+                add('order', column)
+
+    return access
+
+
+def candidate_indexes(access):
+    """ 테이블 하나의 추천 인덱스 후보 만들기
+
+    - 필터 : 같음 조건 -> 정렬 -> 범위 조건 순서, 정렬이 있으면 정렬을 인덱스로 처리하는 쪽을 고름
+             ( LIMIT 과 같이 쓰면 filesort 없이 앞에서 멈춤 )
+    - 조인 : 조인 상대 테이블마다 조인 컬럼 -> 같음 조건 순서 ( 이 테이블을 나중에 읽을 때 )
+
+    InnoDB 의 보조 인덱스는 끝에 기본키 ( id ) 가 붙어 있어서 마지막 id 컬럼은 빼고,
+    기본키로 찾는 테이블은 후보를 만들지 않음
+
+    Returns:
+        filter_columns : 필터 인덱스 컬럼, 없으면 None
+        join_columns   : 조인 인덱스 컬럼 리스트
+    """
+    equality = access['equality']
+    if 'id' in equality:
+        return None, []
+
+    columns = list(equality)
+    if access['order']:
+        columns += [column for column in access['order'] if column not in columns]
+    elif access['range']:
+        columns += [column for column in access['range'][:1] if column not in columns]
+
+    while columns and columns[-1] == 'id':
+        columns.pop()
+
+    join_columns = []
+    for partner_columns in access['join'].values():
+        if 'id' in partner_columns:
+            continue
+        join_columns.append(tuple((partner_columns + [column for column in equality
+                                                      if column not in partner_columns])[:MAX_INDEX_COLUMNS]))
+
+    return tuple(columns[:MAX_INDEX_COLUMNS]) or None, join_columns
+
+
+def is_covered(columns, equality, indexes):
+    """ 이미 있는 인덱스가 추천 인덱스를 대신할 수 있는지 확인하기
+
+    같음 조건 컬럼은 순서와 상관없이 인덱스의 앞부분에 모두 있으면 되고, 나머지 컬럼은 순서대로 이어져야 함
+    """
+    equality_count = 0
+    while equality_count < len(columns) and columns[equality_count] in equality:
+        equality_count += 1
+
+    for index in indexes:
+        if len(index) < len(columns):
+            continue
+        if set(index[:equality_count]) != set(columns[:equality_count]):
+            continue
+        if index[equality_count:len(columns)] == columns[equality_count:]:
+            return True
+
+    return False
+
+
+def advise(entries, indexes):
+    """ 느린 sql 들로 인덱스 추천하기
+
+    같음 조건이 이미 있는 인덱스로 처리되는 테이블은 먼저 읽는 테이블로 보고 조인 인덱스는 추천하지 않음
+
+    Returns:
+        suggestions : total_ms 합이 큰 순서의 추천 목록
+    """
+    suggestions = {}
+    for entry in entries.values():
+        for table, access in parse_fingerprint(entry['fingerprint']).items():
+            table_indexes = indexes.get(table, [])
+            filter_columns, join_columns = candidate_indexes(access)
+
+            candidates = []
+            if filter_columns and not is_covered(filter_columns, access['equality'], table_indexes):
+                candidates.append(filter_columns)
+            equality = tuple(access['equality'])
+            if not equality or not is_covered(equality, equality, table_indexes):
+                candidates += [columns for columns in join_columns
+                               if not is_covered(columns, list(columns), table_indexes)]
+
+            for columns in candidates:
+                suggestion = suggestions.setdefault((table, columns), {
+                    'table':        table,
+                    'columns':      list(columns),
+                    'total_ms':     0.0,
+                    'count':        0,
+                    'queries':      []
+                })
+                suggestion['total_ms'] += entry['total_ms']
+                suggestion['count'] += entry['count']
+                suggestion['queries'].append({'dao': entry['dao'], 'fingerprint': entry['fingerprint'],
+                                              'total_ms': round(entry['total_ms'], 3)})
+
+    # 다른 추천 인덱스의 앞부분과 같은 추천은 긴 인덱스에 합침
+    for key in sorted(suggestions, key=lambda key: len(key[1])):
+        table, columns = key
+        for other_table, other_columns in suggestions:
+            if other_table == table and len(other_columns) > len(columns) and other_columns[:len(columns)] == columns:
+                longer = suggestions[(other_table, other_columns)]
+                shorter = suggestions.pop(key)
+                longer['total_ms'] += shorter['total_ms']
+                longer['count'] += shorter['count']
+                longer['queries'] += shorter['queries']
+                break
+
+    result = sorted(suggestions.values(), key=lambda suggestion: suggestion['total_ms'], reverse=True)
+    for suggestion in result:
+        suggestion['total_ms'] = round(suggestion['total_ms'], 3)
+        suggestion['ddl'] = 'CREATE INDEX {} ON {} ({});'.format(
+            index_name(suggestion['table'], suggestion['columns']), suggestion['table'],
+            ', '.join(suggestion['columns']))
+
+    return result
+
+
+def index_name(table, columns):
+    return 'ix_{}_{}'.format(table, '_'.join(columns))[:64]
+
+
+def write_migration(suggestions, name, directory=MIGRATIONS_DIR):
+    # 추천 인덱스로 다음 버전의 migration 파일 만들기
+    migrations = load_migrations(directory)
+    version = migrations[-1].version + 1 if migrations else 1
+    path = os.path.join(directory, '{:04d}_{}.sql'.format(version, name))
+
+    lines = ['-- tools.index_advisor 가 느린 sql 지문으로 추천한 인덱스', '']
+    for suggestion in suggestions:
+        lines.append('-- total {} ms, {} 회: {}'.format(
+            suggestion['total_ms'], suggestion['count'],
+            ', '.join(sorted({query['dao'] or '-' for query in suggestion['queries']}))))
+        lines.append(suggestion['ddl'])
+        lines.append('')
+
+    with open(path, 'w', encoding='utf-8') as migration_file:
+        migration_file.write('\n'.join(lines))
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='suggest indexes from slow query fingerprints')
+    parser.add_argument('inputs', nargs='+', help='/internal/slow-queries 응답 JSON 또는 slow_query 로그 파일')
+    parser.add_argument('--db-url', help='이 데이터베이스의 인덱스와 비교, 없으면 migrations/ 의 인덱스와 비교')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR)
+    parser.add_argument('--min-total-ms', type=float, default=0.0, help='total_ms 합이 이 값보다 작은 추천은 제외')
+    parser.add_argument('--migration', help='추천 인덱스로 이 이름의 다음 버전 migration 파일 만들기')
+    args = parser.parse_args()
+
+    if args.db_url:
+        indexes = existing_indexes_from_database(args.db_url)
+    else:
+        indexes = existing_indexes_from_migrations(args.dir)
+
+    suggestions = [suggestion for suggestion in advise(load_slow_queries(args.inputs), indexes)
+                   if suggestion['total_ms'] >= args.min_total_ms]
+
+    print(json.dumps({'suggestions': suggestions}, indent=2, ensure_ascii=False))
+
+    if args.migration and suggestions:
+        print('wrote {}'.format(write_migration(suggestions, args.migration, args.dir)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
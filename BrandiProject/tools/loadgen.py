@@ -0,0 +1,339 @@
+"""
+로컬 서버에 셀러 시나리오를 동시에 실행하는 부하 테스트 도구
+
+시나리오 ( --mix 로 비율 지정 )
+    browse   : /home -> /product/management 여러 페이지
+    order    : /order/product/<id> 조회 -> 같은 상품 주문 ( Idempotency-Key )
+    shipment : /order/status/1 조회 -> /order/shipment 로 여러 주문 배송처리
+
+가상 사용자는 /login 으로 토큰을 받고 --iterations-per-login 번 시나리오를 실행할 때마다 다시 로그인함
+단계 ( login, home, product_management ... ) 별로 처리량, p50 / p95 / p99 응답 시간, 에러 비율을 보여줌
+
+    constant : --users 명이 --duration 초 동안 실행
+    ramp     : --start-users 명부터 --step-seconds 마다 --step-users 명씩 늘리면서 처리량이 더 늘지 않는 지점을 찾음
+    soak     : --users 명이 --duration 초 동안 실행하면서 --report-interval 초마다 결과를 출력
+
+tools.datagen 으로 넣은 셀러 계정을 사용하고, 서버는 로그인 제한 ( LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE ) 을
+늘려서 실행해야 함
+
+    python -m tools.loadgen --base-url http://127.0.0.1:5000 --accounts 2-500 --mode ramp --max-users 200
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+
+import aiohttp
+
+SCENARIOS = ('browse', 'order', 'shipment')
+
+ORDER_USER = {
+    'user_name':        'loadgen',
+    'phone_number':     '010-0000-0000',
+    'zip_code':         12345,
+    'address':          'loadgen',
+    'detail_address':   'loadgen'
+}
+
+
+def percentile(sorted_values, ratio):
+    # nearest-rank
+    return sorted_values[max(0, math.ceil(ratio * len(sorted_values)) - 1)]
+
+
+class StepStats:
+    """
+    단계별 응답 시간과 상태 코드 ( 예외는 status 0 )
+    """
+    def __init__(self):
+        self.latencies = {}
+        self.status_codes = {}
+        self.started = time.perf_counter()
+
+    def record(self, step, elapsed, status):
+        self.latencies.setdefault(step, []).append(elapsed)
+        codes = self.status_codes.setdefault(step, {})
+        codes[status] = codes.get(status, 0) + 1
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started
+        steps = {}
+        for step, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            codes = self.status_codes[step]
+            errors = sum(count for status, count in codes.items() if status == 0 or status >= 400)
+            server_errors = sum(count for status, count in codes.items() if status == 0 or status >= 500)
+            steps[step] = {
+                'requests':         len(latencies),
+                'throughput_rps':   round(len(latencies) / seconds, 2),
+                'p50_ms':           round(percentile(latencies, 0.50) * 1000, 2),
+                'p95_ms':           round(percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms':           round(percentile(latencies, 0.99) * 1000, 2),
+                'error_rate':       round(errors / len(latencies), 4),
+                'server_error_rate': round(server_errors / len(latencies), 4),
+                'status_codes':     {str(status): count for status, count in sorted(codes.items())}
+            }
+
+        total = sum(step['requests'] for step in steps.values())
+        errors = sum(step['requests'] * step['error_rate'] for step in steps.values())
+        server_errors = sum(step['requests'] * step['server_error_rate'] for step in steps.values())
+        all_latencies = sorted(latency for latencies in self.latencies.values() for latency in latencies)
+
+        return {
+            'seconds':          round(seconds, 1),
+            'requests':         total,
+            'throughput_rps':   round(total / seconds, 2) if seconds else 0,
+            'p95_ms':           round(percentile(all_latencies, 0.95) * 1000, 2) if all_latencies else None,
+            'error_rate':       round(errors / total, 4) if total else 0,
+            'server_error_rate': round(server_errors / total, 4) if total else 0,
+            'steps':            steps
+        }
+
+
+class VirtualUser:
+    """
+    셀러 계정 하나로 로그인하고 시나리오를 반복 실행
+    """
+    def __init__(self, runner, account):
+        self.runner = runner
+        self.account = account
+        self.token = None
+        self.iterations = 0
+        self.rng = random.Random('{}:{}'.format(runner.args.seed, account))
+
+    async def request(self, step, method, path, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if self.token is not None:
+            headers['Authorization'] = self.token
+
+        started = time.perf_counter()
+        try:
+            async with self.runner.session.request(method, self.runner.args.base_url + path, headers=headers,
+                                                   **kwargs) as response:
+                body = await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            body, status = None, 0
+
+        self.runner.record(step, time.perf_counter() - started, status)
+
+        if status != 200 or not body:
+            return None
+        return json.loads(body)
+
+    async def login(self):
+        tokens = await self.request('login', 'POST', '/login', json={
+            'account': self.account, 'password': self.runner.args.password})
+        self.token = tokens['access_token'] if tokens else None
+
+    async def browse(self):
+        await self.request('home', 'GET', '/home')
+
+        products = None
+        for page in range(self.rng.randint(1, self.runner.args.pages)):
+            products = await self.request('product_management', 'GET', '/product/management',
+                                          params={'limit': 10, 'offset': page * 10}) or products
+            await self.think()
+
+        return products
+
+    async def order(self):
+        products = await self.request('product_management', 'GET', '/product/management',
+                                      params={'limit': 10, 'offset': self.rng.randrange(0, 100, 10)})
+        if not products or not products['product_list']:
+            return
+
+        product_id = self.rng.choice(products['product_list'])['product_id']
+        product = await self.request('order_product_get', 'GET', '/order/product/{}'.format(product_id))
+        if not product or not product['options']:
+            return
+
+        await self.think()
+        option = self.rng.choice(product['options'])
+        await self.request('order_product_post', 'POST', '/order/product/{}'.format(product_id),
+                           headers={'Idempotency-Key': str(uuid.uuid4())},
+                           json=dict(ORDER_USER, count=1, color_id=option['color_id'], size_id=option['size_id'],
+                                     total_price=product['price']))
+
+    async def shipment(self):
+        orders = await self.request('order_status', 'GET', '/order/status/1',
+                                    params={'limit': self.runner.args.shipment_batch})
+        if not orders or not orders['order_list']:
+            return
+
+        await self.think()
+        order_id_list = sorted({order['order_id'] for order in orders['order_list']})
+        await self.request('order_shipment', 'POST', '/order/shipment',
+                           json={'order_id_list': order_id_list, 'shipment_button': 1})
+
+    async def think(self):
+        if self.runner.args.think_ms:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.runner.args.think_ms))
+
+    async def run(self, stop):
+        scenarios, weights = zip(*self.runner.mix)
+        while not stop.is_set():
+            if self.token is None or self.iterations % self.runner.args.iterations_per_login == 0:
+                await self.login()
+                if self.token is None:
+                    # 로그인이 안 되는 계정 ( 입점대기, 퇴점 ) 은 잠깐 쉬었다가 다시 시도
+                    await asyncio.sleep(1)
+                    continue
+
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await getattr(self, scenario)()
+            self.iterations += 1
+            await self.think()
+
+
+class LoadRunner:
+    def __init__(self, args):
+        self.args = args
+        self.mix = parse_mix(args.mix)
+        self.accounts = parse_accounts(args.accounts, args.account_prefix)
+        self.session = None
+        self.stats = []
+        self.users = []
+
+    def record(self, step, elapsed, status):
+        # 지금 구간의 결과와 전체 결과에 같이 기록
+        for stats in self.stats:
+            stats.record(step, elapsed, status)
+
+    def add_users(self, count, stop):
+        for _ in range(count):
+            user = VirtualUser(self, self.accounts[len(self.users) % len(self.accounts)])
+            self.users.append(asyncio.ensure_future(user.run(stop)))
+
+    async def run(self):
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        connector = aiohttp.TCPConnector(limit=0)
+        total = StepStats()
+        self.stats = [total]
+        stop = asyncio.Event()
+        stages = []
+
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as self.session:
+            if self.args.mode == 'ramp':
+                users = self.args.start_users
+                while users <= self.args.max_users:
+                    stage = StepStats()
+                    self.stats = [total, stage]
+                    self.add_users(users - len(self.users), stop)
+                    await asyncio.sleep(self.args.step_seconds)
+
+                    summary = dict(stage.summary(), users=users)
+                    stages.append(summary)
+                    log('users {users:>5}  {throughput_rps:>9} rps  p95 {p95_ms:>9}ms  errors {error_rate}'.format(
+                        **summary))
+                    users += self.args.step_users
+            else:
+                self.add_users(self.args.users, stop)
+                deadline = time.perf_counter() + self.args.duration
+                while time.perf_counter() < deadline:
+                    interval = StepStats()
+                    self.stats = [total, interval]
+                    await asyncio.sleep(min(self.args.report_interval, deadline - time.perf_counter()))
+
+                    summary = dict(interval.summary(), users=self.args.users)
+                    stages.append(summary)
+                    log('{seconds:>6}s  {throughput_rps:>9} rps  p95 {p95_ms}ms  errors {error_rate}'.format(
+                        **summary))
+
+            stop.set()
+            await asyncio.gather(*self.users, return_exceptions=True)
+
+        return {
+            'mode':         self.args.mode,
+            'mix':          dict(self.mix),
+            'total':        total.summary(),
+            'stages':       stages,
+            'saturation':   saturation_point(stages) if self.args.mode == 'ramp' else None
+        }
+
+
+def saturation_point(stages, min_gain=0.05, max_error_rate=0.01):
+    """ 사용자를 늘려도 처리량이 min_gain 보다 적게 늘거나 서버 에러 ( 5xx, 타임아웃 ) 비율이 max_error_rate 를 넘는 첫 단계
+
+    이미 배송처리된 주문처럼 4xx 응답은 시나리오 결과라서 포화 판단에 넣지 않음
+
+    Returns:
+        saturation : 그 직전 단계의 사용자 수와 처리량, 끝까지 늘어나면 None
+    """
+    for previous, stage in zip(stages, stages[1:]):
+        gain = (stage['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps'] \
+            if previous['throughput_rps'] else 0
+        if gain < min_gain or stage['server_error_rate'] > max_error_rate:
+            return {'users': previous['users'], 'throughput_rps': previous['throughput_rps'],
+                    'p95_ms': previous['p95_ms']}
+
+    return None
+
+
+def parse_mix(value):
+    # browse=6,order=3,shipment=1
+    mix = []
+    for item in value.split(','):
+        scenario, _, weight = item.partition('=')
+        if scenario not in SCENARIOS:
+            raise argparse.ArgumentTypeError('unknown scenario {}'.format(scenario))
+        mix.append((scenario, float(weight or 1)))
+    return mix
+
+
+def parse_accounts(value, prefix):
+    # 2-500 이면 datagen2 ~ datagen500
+    first, _, last = value.partition('-')
+    return ['{}{}'.format(prefix, seller_id) for seller_id in range(int(first), int(last or first) + 1)]
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='scenario load generator')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--mode', choices=('constant', 'ramp', 'soak'), default='constant')
+    parser.add_argument('--mix', default='browse=6,order=3,shipment=1')
+    parser.add_argument('--accounts', default='2-500', help='셀러 id 구간')
+    parser.add_argument('--account-prefix', default='datagen')
+    parser.add_argument('--password', default='Datagen!2345')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--report-interval', type=float, default=10)
+    parser.add_argument('--start-users', type=int, default=10)
+    parser.add_argument('--step-users', type=int, default=10)
+    parser.add_argument('--max-users', type=int, default=200)
+    parser.add_argument('--step-seconds', type=float, default=30)
+    parser.add_argument('--think-ms', type=float, default=100, help='요청 사이 평균 대기 시간')
+    parser.add_argument('--pages', type=int, default=5, help='browse 에서 볼 최대 페이지 수')
+    parser.add_argument('--shipment-batch', type=int, default=20)
+    parser.add_argument('--iterations-per-login', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='결과 JSON 파일')
+    args = parser.parse_args()
+
+    if args.mode == 'soak' and args.duration == parser.get_default('duration'):
+        args.duration = 3600
+
+    result = asyncio.get_event_loop().run_until_complete(LoadRunner(args).run())
+
+    if result['saturation']:
+        log('saturation at {users} users, {throughput_rps} rps, p95 {p95_ms}ms'.format(**result['saturation']))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
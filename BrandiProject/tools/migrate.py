@@ -0,0 +1,304 @@
+"""
+migrations/ 폴더의 버전별 sql 파일을 순서대로 적용하는 도구
+
+파일 이름은 <4자리 버전>_<이름>.sql, 적용한 버전과 파일 체크섬은 schema_migrations 테이블에 기록함
+이미 적용한 파일이 바뀌면 check 가 실패하기 때문에 스키마 변경은 항상 새 버전 파일로 추가함
+
+sql 파일은 MySQL 문법으로 쓰고, SQLite 데이터베이스에는 model.dialect 가 SQLite 문법으로 바꿔서 적용함
+MySQL 은 DDL 이 바로 커밋되기 때문에 파일 중간에서 실패하면 앞의 구문은 적용된 채로 남음
+실패한 구문을 고치고 이미 적용된 구문은 지운 뒤 다시 up 을 실행함
+
+migrations/ 를 쓰기 전부터 있던 운영 데이터베이스는 0001 ( 기본 테이블 ), 0002 ( 기본 데이터 ) 가 이미 있어서
+up 을 실행하면 0001 의 CREATE TABLE 이 실패함. stamp 2 로 두 버전을 실행하지 않고 적용된 것으로 기록한 뒤 up 을 실행함
+
+    python -m tools.migrate --db-url mysql+pymysql://... status
+    python -m tools.migrate --db-url mysql+pymysql://... up
+    python -m tools.migrate --db-url mysql+pymysql://... up --to 3
+    python -m tools.migrate --db-url mysql+pymysql://... check
+    python -m tools.migrate --db-url mysql+pymysql://... stamp 2
+    python -m tools.migrate --db-url sqlite:///brandi.db up
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+from model.dialect import create_database_engine, dialect_of
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+class Migration:
+    """
+    버전 하나의 sql 파일
+    """
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+        with open(path, encoding='utf-8') as sql_file:
+            self.sql = sql_file.read()
+
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+
+    def statements(self):
+        return split_statements(self.sql)
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    # 버전 순서대로 정렬한 migration 목록, 같은 버전이 두 개면 에러
+    migrations = {}
+    for file_name in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(file_name)
+        if match is None:
+            continue
+
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError('duplicate migration version {}: {}'.format(version, file_name))
+
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, file_name))
+
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql):
+    """ sql 파일을 ; 기준으로 구문 하나씩 나누기
+
+    따옴표 안의 ; 와 -- 주석은 구분자로 보지 않음
+    """
+    statements = []
+    current = []
+    quote = None
+    idx = 0
+    while idx < len(sql):
+        char = sql[idx]
+        if quote:
+            current.append(char)
+            if char == '\\':
+                current.append(sql[idx + 1:idx + 2])
+                idx += 1
+            elif char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            current.append(char)
+        elif sql.startswith('--', idx):
+            end = sql.find('\n', idx)
+            idx = len(sql) if end == -1 else end
+            continue
+        elif char == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        idx += 1
+
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+
+    return statements
+
+
+def ensure_migration_table(connection):
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INT             NOT NULL PRIMARY KEY,
+            name        VARCHAR(100)    NOT NULL,
+            checksum    CHAR(64)        NOT NULL,
+            applied_at  DATETIME        NOT NULL
+        )
+    """))
+
+
+def applied_migrations(connection):
+    # { 버전: row } 적용된 migration
+    ensure_migration_table(connection)
+    rows = connection.execute(text("""
+        SELECT
+            version,
+            name,
+            checksum,
+            applied_at
+        FROM schema_migrations
+        ORDER BY version
+    """)).fetchall()
+
+    return {row['version']: row for row in rows}
+
+
+def pending_migrations(connection, migrations, target=None):
+    applied = applied_migrations(connection)
+    return [migration for migration in migrations
+            if migration.version not in applied and (target is None or migration.version <= target)]
+
+
+def apply_migration(engine, migration, translate=None):
+    """ migration 하나 적용하고 schema_migrations 에 기록하기
+
+    Args:
+        engine    : sqlalchemy engine
+        migration : Migration
+        translate : 구문 하나를 다른 데이터베이스 문법의 구문 리스트로 바꾸는 함수, 없으면 engine 의 dialect 로 바꿈
+                    ( MySQL 은 그대로, SQLite 는 SQLiteDialect.translate_ddl )
+
+    """
+    if translate is None:
+        translate = dialect_of(engine.dialect.name).translate_ddl
+
+    with engine.begin() as connection:
+        for idx, statement in enumerate(migration.statements()):
+            try:
+                # 파일의 구문은 바인드 파라미터가 없어서 text() 로 감싸지 않고 그대로 실행
+                # 드라이버가 % ( 나머지 연산 ) 를 파라미터 자리로 보지 않도록 파라미터 없이 실행
+                for translated in translate(statement):
+                    connection.execution_options(no_parameters=True).execute(translated)
+            except Exception as e:
+                raise RuntimeError('{:04d}_{} statement {} failed: {}'.format(
+                    migration.version, migration.name, idx + 1, e)) from e
+
+        record_migration(connection, migration)
+
+
+def record_migration(connection, migration):
+    # schema_migrations 에 적용한 버전 기록하기
+    connection.execute(text("""
+            INSERT INTO schema_migrations (
+                version,
+                name,
+                checksum,
+                applied_at
+            ) VALUES (
+                :version,
+                :name,
+                :checksum,
+                :applied_at
+            )
+        """), {'version': migration.version, 'name': migration.name, 'checksum': migration.checksum,
+               'applied_at': datetime.now().replace(microsecond=0)})
+
+
+def upgrade(engine, target=None, directory=MIGRATIONS_DIR, translate=None, log=print):
+    """ 적용하지 않은 migration 을 버전 순서대로 target 버전까지 적용하기
+
+    Returns:
+        applied : 적용한 버전 리스트
+    """
+    migrations = load_migrations(directory)
+    with engine.connect() as connection:
+        pending = pending_migrations(connection, migrations, target)
+
+    for migration in pending:
+        log('apply {:04d}_{}'.format(migration.version, migration.name))
+        apply_migration(engine, migration, translate)
+
+    return [migration.version for migration in pending]
+
+
+def stamp(engine, version, directory=MIGRATIONS_DIR, log=print):
+    """ version 까지의 migration 을 실행하지 않고 적용된 것으로 기록하기
+
+    스키마가 이미 version 까지와 같은 데이터베이스 ( migrations/ 를 쓰기 전부터 있던 운영 데이터베이스 ) 에서 사용
+
+    Returns:
+        stamped : 기록한 버전 리스트
+    """
+    migrations = load_migrations(directory)
+    if version not in {migration.version for migration in migrations}:
+        raise ValueError('unknown migration version {}'.format(version))
+
+    with engine.begin() as connection:
+        pending = pending_migrations(connection, migrations, version)
+        for migration in pending:
+            log('stamp {:04d}_{}'.format(migration.version, migration.name))
+            record_migration(connection, migration)
+
+    return [migration.version for migration in pending]
+
+
+def verify(connection, migrations):
+    """ 적용된 migration 과 파일이 같은지 확인하기
+
+    Returns:
+        problems : 체크섬이 바뀐 파일, 없어진 파일 메세지 리스트
+    """
+    files = {migration.version: migration for migration in migrations}
+    problems = []
+    for version, row in applied_migrations(connection).items():
+        if version not in files:
+            problems.append('{:04d}_{} applied but file is missing'.format(version, row['name']))
+        elif files[version].checksum != row['checksum']:
+            problems.append('{:04d}_{} changed after it was applied'.format(version, row['name']))
+
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='versioned schema migrations')
+    parser.add_argument('--db-url', required=True)
+    parser.add_argument('--dir', default=MIGRATIONS_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='적용된 버전과 적용할 버전 보기')
+    up_parser = subparsers.add_parser('up', help='적용하지 않은 버전 적용하기')
+    up_parser.add_argument('--to', type=int, help='이 버전까지만 적용')
+    subparsers.add_parser('check', help='적용된 파일이 바뀌었거나 적용할 버전이 있으면 실패')
+    stamp_parser = subparsers.add_parser('stamp', help='이 버전까지 실행하지 않고 적용된 것으로 기록하기')
+    stamp_parser.add_argument('version', type=int)
+    args = parser.parse_args()
+
+    engine = create_database_engine(args.db_url)
+    migrations = load_migrations(args.dir)
+
+    if args.command == 'up':
+        with engine.connect() as connection:
+            problems = verify(connection, migrations)
+        if problems:
+            sys.exit('\n'.join(problems))
+
+        applied = upgrade(engine, args.to, args.dir)
+        print('applied {} migrations'.format(len(applied)) if applied else 'up to date')
+        return
+
+    if args.command == 'stamp':
+        try:
+            stamped = stamp(engine, args.version, args.dir)
+        except ValueError as e:
+            sys.exit(str(e))
+
+        print('stamped {} migrations'.format(len(stamped)) if stamped else 'already applied')
+        return
+
+    with engine.connect() as connection:
+        applied = applied_migrations(connection)
+        problems = verify(connection, migrations)
+
+    if args.command == 'status':
+        for migration in migrations:
+            row = applied.get(migration.version)
+            print('{:04d}_{:40} {}'.format(migration.version, migration.name,
+                                           row['applied_at'] if row else 'pending'))
+        for problem in problems:
+            print(problem)
+        return
+
+    pending = [migration for migration in migrations if migration.version not in applied]
+    for migration in pending:
+        problems.append('{:04d}_{} not applied'.format(migration.version, migration.name))
+
+    if problems:
+        sys.exit('\n'.join(problems))
+
+    print('{} migrations applied, schema up to date'.format(len(applied)))
+
+
+if __name__ == '__main__':
+    main()
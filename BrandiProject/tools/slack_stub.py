@@ -0,0 +1,90 @@
+"""
+슬랙 API 대신 사용하는 로컬 HTTP stand-in 서버
+
+테스트나 로컬 개발에서 config 의 SLACK_API_URL 을 이 서버 주소로 지정하면
+worker.StatusNotifier 가 실제 슬랙 대신 이 서버로 메세지를 보냄
+
+    python -m tools.slack_stub --port 9000
+    SLACK_API_URL = 'http://127.0.0.1:9000/api/'
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class SlackStub:
+    """
+    chat.postMessage 요청을 받아서 messages 에 저장하고 {"ok": true} 응답
+    fail_count 만큼은 fail_status ( 기본 500 ) 실패 응답을 보내서 재시도 동작을 확인할 수 있음
+    """
+    def __init__(self, host='127.0.0.1', port=0, fail_status=500):
+        self.messages = []
+        self.fail_count = 0
+        self.fail_status = fail_status
+        self.failed_requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}/api/'.format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    payload = json.loads(body or '{}')
+                else:
+                    payload = {key: value[0] for key, value in parse_qs(body).items()}
+
+                with stub.lock:
+                    if stub.fail_count > 0:
+                        stub.fail_count -= 1
+                        stub.failed_requests += 1
+                        status, response = stub.fail_status, {'ok': False, 'error': 'internal_error'}
+                    else:
+                        stub.messages.append({'method': self.path.rsplit('/', 1)[-1], **payload})
+                        status, response = 200, {'ok': True}
+
+                data = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='local slack api stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    args = parser.parse_args()
+
+    stub = SlackStub(args.host, args.port)
+    print('slack stub listening on {}'.format(stub.base_url))
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
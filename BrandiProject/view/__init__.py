@@ -1,9 +1,11 @@
 from .seller_view import seller_endpoints
 from .product_view import product_endpoints
 from .order_view import order_endpoints
+from .metrics_view import metrics_endpoints
 
 __all__ = [
     'seller_endpoints',
     'product_endpoints',
-    'order_endpoints'
-]
\ No newline at end of file
+    'order_endpoints',
+    'metrics_endpoints'
+]
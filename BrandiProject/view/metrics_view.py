@@ -0,0 +1,44 @@
+from flask import Response, jsonify
+from flask_request_validator import Param, GET, Enum, validate_params
+from .seller_view import login_required
+
+
+def metrics_endpoints(app, metrics):
+
+    @app.route("/metrics", methods=['GET'])
+    def get_metrics():
+        """ 메트릭 API
+
+        라우트별 요청 처리 시간, DAO 메소드별 sql 실행 시간, 백그라운드 작업 통계를 Prometheus text 형식으로 가져오기
+
+        Returns:
+            200 : Prometheus text
+
+        """
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.route("/internal/slow-queries", methods=['GET'])
+    @login_required
+    @validate_params(
+        Param('order_by', GET, str, required=False, rules=[Enum('total_ms', 'max_ms', 'count')]),
+        Param('limit', GET, int, required=False)
+    )
+    def get_slow_queries(*args):
+        """ 느린 sql 목록 API
+
+        SLOW_QUERY_THRESHOLD_MS 보다 오래 걸린 sql 을 ( 라우트, DAO 메소드, 지문 ) 별로 모아서 가져오기
+
+        Args:
+            *args:
+                order_by : 정렬 기준 ( total_ms, max_ms, count )
+                limit    : 가져올 개수
+
+        Returns:
+            200 : slow_queries ( type : dict )
+            404 : 느린 sql 기록을 사용하지 않을 때
+
+        """
+        if metrics.slow_queries is None:
+            return jsonify({'message': 'slow query log disabled'}), 404
+
+        return jsonify(metrics.slow_queries.top(args[0] or 'total_ms', args[1] or 20)), 200
@@ -1,12 +1,87 @@
-from flask import jsonify, g
+import logging
+from flask import jsonify, g, request, current_app
 from flask_request_validator import Param, JSON, validate_params, Pattern, PATH, GET
+from functools import wraps
 from .seller_view import login_required
 from exceptions import NoDataException, NoAffectedRowException
 from config import shipment_button
 
+logger = logging.getLogger(__name__)
+
+
+# Idempotency-Key decorator
+def idempotent(idempotency_service, get_session):
+    def decorator(func):
+        # validate_params 는 감싼 함수가 **kwargs 를 받으면 파라미터를 키워드로 넘기기 때문에 *args 만 받음
+        @wraps(func)
+        def decorated_function(*args):
+            # 헤더가 없으면 기존처럼 처리
+            idempotency_key = request.headers.get('Idempotency-Key')
+            if idempotency_key is None:
+                return func(*args)
+
+            if not idempotency_key or len(idempotency_key) > 255:
+                return jsonify({'message': 'invalid idempotency key'}), 400
+
+            request_hash = idempotency_service.request_hash(request.method, request.path, request.get_data())
+
+            # 키를 먼저 등록하고 커밋해서 같은 키의 다른 요청이 처리 중인 걸 알 수 있게 함
+            session = None
+            try:
+                session = get_session()
+                stored = idempotency_service.begin(g.seller_id, idempotency_key, request_hash, session)
+                session.commit()
+
+            except Exception as e:
+                if session:
+                    session.rollback()
+                return jsonify({'message': '{}'.format(e)}), 500
+
+            finally:
+                if session:
+                    session.close()
+
+            if stored == 'in progress':
+                return jsonify({'message': 'request in progress'}), 409
+
+            if stored == 'key reused':
+                return jsonify({'message': 'idempotency key reused'}), 422
+
+            # 이미 처리된 요청이면 재고를 건드리지 않고 처음 응답을 그대로 돌려줌
+            if stored is not None:
+                response = current_app.response_class(stored[1], status=stored[0], mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+
+            response = current_app.make_response(func(*args))
+
+            # 응답 저장에 실패하면 키는 claim lease 동안 처리 중으로 남고, 그 뒤의 재시도는 다시 처리됨
+            session = None
+            try:
+                session = get_session()
+                idempotency_service.complete(g.seller_id, idempotency_key, request_hash,
+                                             response.status_code, response.get_data(as_text=True), session)
+                session.commit()
+
+            except Exception:
+                logger.exception('idempotency response save failed')
+                if session:
+                    session.rollback()
+
+            finally:
+                if session:
+                    session.close()
+
+            return response
+
+        return decorated_function
+
+    return decorator
+
 
 def order_endpoints(app, services, get_session):
     order_service = services.order_service
+    idempotency_service = services.idempotency_service
 
     @app.route("/order/product/<int:product_id>", methods=['GET'])
     @login_required
@@ -59,6 +134,7 @@ def order_endpoints(app, services, get_session):
         Param('size_id', JSON, int),
         Param('total_price', JSON, int)
     )
+    @idempotent(idempotency_service, get_session)
     def post_order_product(*args):
         """ 상품 주문하기 API
 
@@ -79,7 +155,7 @@ def order_endpoints(app, services, get_session):
 
         Returns:
             200 : success, 주문 데이터를 데이터베이스 저장에 성공했을 때
-            400 : 재고수량에 맞지 않는 수량을 주문했을 때
+            400 : 재고수량에 맞지 않는 수량을 주문했을 때, 총 결제금액이 판매가와 맞지 않을 때
             500 : Exception
 
         """
@@ -107,6 +183,10 @@ def order_endpoints(app, services, get_session):
             if order_data == 'invalid count':
                 return jsonify({'message': "invalid count"}), 400
 
+            # 총 결제금액이 상품의 판매가와 맞지 않을 때 에러 발생
+            if order_data == 'invalid price':
+                return jsonify({'message': "invalid price"}), 400
+
             session.commit()
             return jsonify({'message': 'success'}), 200
 
@@ -126,6 +206,86 @@ def order_endpoints(app, services, get_session):
             if session:
                 session.close()
 
+    @app.route("/order/products", methods=['POST'])
+    @login_required
+    @validate_params(
+        Param('user_name', JSON, str),
+        Param('phone_number', JSON, str, rules=[Pattern(r'^010-[0-9]{3,4}-[0-9]{4}$')]),
+        Param('zip_code', JSON, int),
+        Param('address', JSON, str),
+        Param('detail_address', JSON, str),
+        Param('order_lines', JSON, list),
+        Param('total_price', JSON, int)
+    )
+    @idempotent(idempotency_service, get_session)
+    def post_order_products(*args):
+        """ 여러 상품 한 번에 주문하기 API
+
+        Body 로 주문자 데이터와 주문 상품 리스트를 받아 하나의 주문으로 저장하기
+
+        Args:
+            *args:
+                user_name      : 주문자명
+                phone_number   : 주문자의 핸드폰 번호
+                zip_code       : 주문자 우편번호
+                address        : 주문자 주소
+                detail_address : 주문자 상세주소
+                order_lines    : 리스트. [{ 상품 id, 컬러 id, 사이즈 id, 주문 수량 }]
+                total_price    : 모든 상품의 총 결제금액
+
+        Returns:
+            200 : success, 주문 id
+            400 : 주문 상품 리스트가 잘못되었을 때, 재고수량에 맞지 않는 수량을 주문했을 때,
+                  총 결제금액이 판매가와 맞지 않을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            order_data = {
+                'user_name':        args[0],
+                'phone_number':     args[1],
+                'zip_code':         args[2],
+                'address':          args[3],
+                'detail_address':   args[4],
+                'total_price':      args[6]
+            }
+            order_lines = args[5]
+
+            # 주문 상품은 1개 이상, 설정된 최대 개수 이하이고 모든 값이 양의 정수
+            line_keys = ('product_id', 'color_id', 'size_id', 'count')
+            if not order_lines or len(order_lines) > app.config.get('ORDER_LINE_LIMIT', 50) \
+                    or any(not isinstance(line, dict)
+                           or any(not isinstance(line.get(key), int) or line[key] <= 0 for key in line_keys)
+                           for line in order_lines):
+                return jsonify({'message': 'invalid order lines'}), 400
+
+            order_id = order_service.order_products(order_data, order_lines, g.seller_id, session)
+
+            if order_id in ('invalid option', 'invalid count', 'invalid price'):
+                return jsonify({'message': order_id}), 400
+
+            session.commit()
+            return jsonify({'message': 'success', 'order_id': order_id}), 200
+
+        except NoAffectedRowException as e:
+            session.rollback()
+            return jsonify({'message': 'no affected row error {}'.format(e.message)}), e.status_code
+
+        except NoDataException as e:
+            session.rollback()
+            return jsonify({'message': 'no data error {}'.format(e.message)}), e.status_code
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
     @app.route("/order/status/<int:order_status_id>", methods=['GET'])
     @login_required
     @validate_params(
@@ -184,7 +344,8 @@ def order_endpoints(app, services, get_session):
                 'phone_number':         args[8],
                 'product_name':         args[9],
                 'order_by':             2 if args[10] is None else args[10],
-                'brand_name_korean':    args[11]
+                'brand_name_korean':    args[11],
+                'seller_id':            g.seller_id
             }
 
             order_list = order_service.get_order_product_list(query_string_list, session)
@@ -296,6 +457,45 @@ def order_endpoints(app, services, get_session):
             if session:
                 session.close()
 
+    @app.route("/order/batch", methods=['POST'])
+    @login_required
+    @validate_params(
+        Param('order_id_list', JSON, list)
+    )
+    def post_order_batch(order_id_list):
+        """ 여러 주문 상세 데이터 한 번에 가져오기 API
+
+        Body 로 주문 id 리스트를 받아 주문마다 /order/<order_id> 와 같은 데이터 가져오기
+
+        Args:
+            order_id_list: 주문 id 리스트 ( 1개 이상, 설정된 최대 개수 이하 )
+
+        Returns:
+            200 : orders ( 주문 id 포함 ), missing ( 없는 주문 id )
+            400 : 주문 id 리스트가 잘못되었을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            if not order_id_list or len(order_id_list) > app.config.get('BATCH_ID_LIMIT', 100) \
+                    or any(not isinstance(order_id, int) or order_id <= 0 for order_id in order_id_list):
+                return jsonify({'message': 'invalid order id list'}), 400
+
+            orders = order_service.get_orders_details(order_id_list, session)
+
+            return jsonify(orders), 200
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
     @app.route("/order/change_number", methods=['PUT'])
     @login_required
     @validate_params(
@@ -1,5 +1,8 @@
-from flask import jsonify, g
+import csv
+import os
+from flask import jsonify, g, request
 from .seller_view import login_required
+from service import ProductImportReader
 from flask_request_validator import Param, PATH, validate_params, JSON, Enum, GET, Pattern
 from exceptions import NoAffectedRowException, NoDataException
 
@@ -90,7 +93,8 @@ def product_endpoints(app, services, get_session):
 
         Returns:
             200 : success, 상품 등록에 성공했을 때
-            400 : key error , 옵션리스트 안에 컬러아이디, 사이즈아이디, 재고관리여부 중 하나라도 없을 때
+            400 : key error , 옵션리스트 안에 컬러아이디, 사이즈아이디, 재고관리여부 중 하나라도 없을 때,
+                할인 날짜 형식이 맞지 않을 때
             500 : Exception
 
         """
@@ -126,6 +130,13 @@ def product_endpoints(app, services, get_session):
                 if options['color_id'] is None or options['size_id'] is None or options['is_inventory_manage'] is None:
                     return jsonify({'message': 'option data not exist'}), 400
 
+            # 할인 날짜 형식이 맞지 않으면 에러 발생 ( 할인가 계산 전에 확인 )
+            for key in ('discount_start_date', 'discount_end_date'):
+                try:
+                    product_service.pricing_engine.to_datetime(product_data[key])
+                except ValueError:
+                    return jsonify({'message': 'invalid date'}), 400
+
             product_service.post_register_product(product_data, session)
 
             session.commit()
@@ -179,15 +190,19 @@ def product_endpoints(app, services, get_session):
     @app.route("/product/update/<int:product_id>", methods=['GET'])
     @login_required
     @validate_params(
-        Param('product_id', PATH, int)
+        Param('product_id', PATH, int),
+        Param('with_detail', GET, int, rules=[Enum(0, 1)], required=False)
     )
-    def get_update_product(product_id):
+    def get_update_product(*args):
         """ 상품 상세페이지 ( 수정 )
 
         상품 수정 페이지 들어갔을 때 등록되어 있는 상품 데이터 가져오기
 
         Args:
-            product_id: 상품 id
+            *args:
+                product_id  : 상품 id
+                with_detail : 상세 설명 ( html ) 포함 여부, 0 이면 빼고 /product/update/<product_id>/detail 로 따로 가져옴
+                              ( 기본값 1 )
 
         Returns:
             200 : product_data ( type : dict )
@@ -198,7 +213,7 @@ def product_endpoints(app, services, get_session):
         try:
             session = get_session()
 
-            product_data = product_service.get_product(product_id, session)
+            product_data = product_service.get_product(args[0], session, args[1] != 0)
 
             return jsonify(product_data)
 
@@ -214,6 +229,87 @@ def product_endpoints(app, services, get_session):
             if session:
                 session.close()
 
+    @app.route("/product/update/<int:product_id>/detail", methods=['GET'])
+    @login_required
+    @validate_params(
+        Param('product_id', PATH, int)
+    )
+    def get_update_product_detail(product_id):
+        """ 상품 상세 설명 ( 수정 )
+
+        상세 설명 ( html ) 은 크기가 커서 상품 데이터와 따로 가져오기
+
+        Args:
+            product_id: 상품 id
+
+        Returns:
+            200 : detail ( type : dict )
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            detail = product_service.get_product_detail(product_id, session)
+
+            return jsonify(detail)
+
+        except NoDataException as e:
+            session.rollback()
+            return jsonify({'message': 'no data {}'.format(e.message)}), e.status_code
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
+    @app.route("/product/batch", methods=['POST'])
+    @login_required
+    @validate_params(
+        Param('product_id_list', JSON, list),
+        Param('with_detail', JSON, int, rules=[Enum(0, 1)], required=False)
+    )
+    def post_product_batch(*args):
+        """ 여러 상품 상세 데이터 한 번에 가져오기 API
+
+        Body 로 상품 id 리스트를 받아 상품마다 /product/update/<product_id> 와 같은 데이터 가져오기
+
+        Args:
+            *args:
+                product_id_list : 상품 id 리스트 ( 1개 이상, 설정된 최대 개수 이하 )
+                with_detail     : 상세 설명 ( html ) 포함 여부 ( 기본값 1 )
+
+        Returns:
+            200 : products ( 상품 id 포함 ), missing ( 없는 상품 id )
+            400 : 상품 id 리스트가 잘못되었을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            product_id_list = args[0]
+            if not product_id_list or len(product_id_list) > app.config.get('BATCH_ID_LIMIT', 100) \
+                    or any(not isinstance(product_id, int) or product_id <= 0 for product_id in product_id_list):
+                return jsonify({'message': 'invalid product id list'}), 400
+
+            products = product_service.get_products(product_id_list, session, args[1] != 0)
+
+            return jsonify(products), 200
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
     @app.route("/product/update/<int:product_id>", methods=['PUT'])
     @login_required
     @validate_params(
@@ -268,7 +364,7 @@ def product_endpoints(app, services, get_session):
 
         Returns:
             200 : success, 상품 데이터 업데이트에 성공했을 때
-            400 : 옵션리스트에 컬러아이디, 사이즈아이디, 재고관리여부가 하나라도 없을 때
+            400 : 옵션리스트에 컬러아이디, 사이즈아이디, 재고관리여부가 하나라도 없을 때, 할인 날짜 형식이 맞지 않을 때
             500 : Exception
 
         """
@@ -306,6 +402,13 @@ def product_endpoints(app, services, get_session):
                 if options['color_id'] is None or options['size_id'] is None or options['is_inventory_manage'] is None:
                     return jsonify({'message': 'option data not exist'}), 400
 
+            # 할인 날짜 형식이 맞지 않으면 에러 발생 ( 할인가 계산 전에 확인 )
+            for key in ('discount_start_date', 'discount_end_date'):
+                try:
+                    product_service.pricing_engine.to_datetime(product_data[key])
+                except ValueError:
+                    return jsonify({'message': 'invalid date'}), 400
+
             product_service.post_update_product(product_data, session)
 
             session.commit()
@@ -337,7 +440,10 @@ def product_endpoints(app, services, get_session):
         Param('start_date', GET, str, required=False),
         Param('end_date', GET, str, required=False),
         Param('seller_property_id', GET, int, required=False),
-        Param('brand_name_korean', GET, str, required=False)
+        Param('brand_name_korean', GET, str, required=False),
+        Param('min_price', GET, int, required=False),
+        Param('max_price', GET, int, required=False),
+        Param('order_by', GET, int, rules=[Enum(1, 2, 3)], required=False)
     )
     def management_product(*args):
         """ 상품 관리 리스트 API
@@ -358,6 +464,9 @@ def product_endpoints(app, services, get_session):
                 end_date           : 해당날짜 이전에 등록된 상품
                 seller_property_id : 셀러 속성 id ( 로드샵, 마켓 등 )
                 brand_name_korean  : 브랜드명 ( 한글 )
+                min_price          : 최소 판매가 ( 할인가 기준 )
+                max_price          : 최대 판매가 ( 할인가 기준 )
+                order_by           : 정렬 순서 ( 1 : 등록일 역순, 2 : 판매가순, 3 : 판매가 역순 )
 
         Returns:
             200 : product_list ( type : dict )
@@ -382,6 +491,9 @@ def product_endpoints(app, services, get_session):
                 'end_date':             args[9],
                 'seller_property_id':   args[10],
                 'brand_name_korean':    args[11],
+                'min_price':            args[12],
+                'max_price':            args[13],
+                'order_by':             1 if args[14] is None else args[14],
                 'seller_id':            g.seller_id
             }
 
@@ -396,3 +508,247 @@ def product_endpoints(app, services, get_session):
         finally:
             if session:
                 session.close()
+
+    @app.route("/product/<int:product_id>/history", methods=['GET'])
+    @login_required
+    @validate_params(
+        Param('product_id', PATH, int),
+        Param('at', GET, str, rules=[Pattern(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}( [0-9]{2}:[0-9]{2}:[0-9]{2})?$')],
+              required=False),
+        Param('limit', GET, int, required=False),
+        Param('offset', GET, int, required=False)
+    )
+    def get_product_history(*args):
+        """ 상품 가격 이력 API
+
+        쿼리 파라미터로 시점을 받으면 그 시점에 유효했던 이력을, 없으면 전체 이력을 최근 순서로 가져오기
+
+        Args:
+            *args:
+                product_id : 상품 id
+                at         : 조회 시점 ( YYYY-MM-DD HH:MM:SS )
+                limit      : pagination 범위
+                offset     : pagination 시작 번호
+
+        Returns:
+            200 : history ( type : dict )
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            history = product_service.get_product_history(args[0], args[1],
+                                                          50 if args[2] is None else args[2],
+                                                          0 if args[3] is None else args[3],
+                                                          session)
+
+            return jsonify(history)
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
+    @app.route("/product/history", methods=['POST'])
+    @login_required
+    @validate_params(
+        Param('product_id_list', JSON, list),
+        Param('at', JSON, str, rules=[Pattern(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}( [0-9]{2}:[0-9]{2}:[0-9]{2})?$')])
+    )
+    def get_product_prices_at(product_id_list, at):
+        """ 여러 상품의 특정 시점 가격 API
+
+        Body 로 상품 id 리스트와 시점을 받아 그 시점에 유효했던 상품들의 가격 이력 가져오기
+
+        Args:
+            product_id_list : 상품 id 리스트
+            at              : 조회 시점 ( YYYY-MM-DD HH:MM:SS )
+
+        Returns:
+            200 : records ( type : dict )
+            400 : 상품 id 리스트가 비었거나 너무 많을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            # 상품 id 리스트는 1개 이상, 설정된 최대 개수 이하
+            if not product_id_list or len(product_id_list) > app.config.get('PRODUCT_HISTORY_LIMIT', 1000) \
+                    or any(not isinstance(product_id, int) for product_id in product_id_list):
+                return jsonify({'message': 'invalid product id list'}), 400
+
+            prices = product_service.get_product_prices_at(product_id_list, at, session)
+
+            return jsonify(prices)
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
+    @app.route("/product/bulk", methods=['PATCH'])
+    @login_required
+    @validate_params(
+        Param('product_id_list', JSON, list),
+        Param('is_sell', JSON, int, required=False, rules=[Enum(0, 1)]),
+        Param('is_display', JSON, int, required=False, rules=[Enum(0, 1)]),
+        Param('price', JSON, int, required=False),
+        Param('discount_rate', JSON, int, required=False),
+        Param('discount_start_date', JSON, str, required=False),
+        Param('discount_end_date', JSON, str, required=False)
+    )
+    def patch_products(*args):
+        """ 상품 일괄 수정 API
+
+        Body 로 상품 id 리스트와 수정할 값을 받아 보낸 컬럼만 한 번에 수정하기
+
+        Args:
+            *args:
+                product_id_list     : 수정할 상품 id 리스트
+                is_sell             : 판매 여부
+                is_display          : 진열 여부
+                price               : 상품 가격
+                discount_rate       : 할인율
+                discount_start_date : 할인 시작 날짜
+                discount_end_date   : 할인 마지막 날짜
+
+        Returns:
+            200 : 수정된 상품 id 리스트, 존재하지 않는 상품 id 리스트, 이력이 추가된 상품 개수 ( type : dict )
+            400 : 상품 id 리스트가 비었거나 너무 많을 때, 수정할 값이 없을 때, 할인 날짜 형식이 맞지 않을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            product_id_list = args[0]
+
+            # 상품 id 리스트는 1개 이상, 설정된 최대 개수 이하
+            if not product_id_list or len(product_id_list) > app.config.get('PRODUCT_BULK_UPDATE_LIMIT', 1000) \
+                    or any(not isinstance(product_id, int) for product_id in product_id_list):
+                return jsonify({'message': 'invalid product id list'}), 400
+
+            columns = {
+                'is_sell':              args[1],
+                'is_display':           args[2],
+                'price':                args[3],
+                'discount_rate':        args[4],
+                'discount_start_date':  args[5],
+                'discount_end_date':    args[6]
+            }
+
+            # 할인 날짜 형식이 맞지 않으면 에러 발생 ( 할인가 계산 전에 확인 )
+            for key in ('discount_start_date', 'discount_end_date'):
+                try:
+                    product_service.pricing_engine.to_datetime(columns[key])
+                except ValueError:
+                    return jsonify({'message': 'invalid date'}), 400
+
+            result = product_service.patch_products(product_id_list, columns, session)
+
+            if result == 'invalid request':
+                return jsonify({'message': 'no update data'}), 400
+
+            session.commit()
+            return jsonify(result), 200
+
+        except NoAffectedRowException as e:
+            session.rollback()
+            return jsonify({'message': 'no affected row error {}'.format(e.message)}), e.status_code
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
+    @app.route("/product/import", methods=['POST'])
+    @login_required
+    def post_import_products():
+        """ 상품 일괄 등록 API
+
+        multipart 로 CSV 또는 JSON lines 파일 ( file ) 을 받아 상품을 여러 개 등록하기
+        파일 형식은 form 의 format ( csv, jsonl ) 이 없으면 파일 확장자로 판단
+        PRODUCT_IMPORT_BATCH_SIZE 개씩 한 트랜잭션으로 등록하고, 등록하지 못한 줄은 에러 리포트로 돌려줌
+
+        Returns:
+            200 : 등록된 상품 개수, 실패한 줄 개수, 줄마다의 에러 ( type : dict )
+            400 : 파일이 없거나 파일 형식을 알 수 없을 때, 파일을 읽을 수 없을 때
+            500 : Exception
+
+        """
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'message': 'file not exist'}), 400
+
+        file_format = request.form.get('format') or os.path.splitext(upload.filename or '')[1][1:].lower()
+        if file_format not in ProductImportReader.FORMATS:
+            return jsonify({'message': 'invalid file format'}), 400
+
+        batch_size = app.config.get('PRODUCT_IMPORT_BATCH_SIZE', 100)
+        max_rows = app.config.get('PRODUCT_IMPORT_MAX_ROWS', 10000)
+        errors = []
+
+        def import_batch(batch):
+            # 한 묶음을 한 트랜잭션으로 등록하고, 실패하면 묶음 안의 모든 줄을 에러로 기록
+            try:
+                product_service.import_products([product_data for _, product_data in batch], g.seller_id, session)
+                session.commit()
+                return len(batch)
+
+            except Exception as e:
+                session.rollback()
+                message = e.message if isinstance(e, (NoAffectedRowException, NoDataException)) else '{}'.format(e)
+                errors.extend({'row': row_number, 'errors': [message]} for row_number, _ in batch)
+                return 0
+
+        session = None
+        imported = 0
+        try:
+            session = get_session()
+            batch = []
+
+            for row_number, product_data, row_errors in ProductImportReader(upload.stream, file_format):
+                if row_number > max_rows:
+                    errors.append({'row': row_number, 'errors': ['too many rows']})
+                    break
+
+                if row_errors:
+                    errors.append({'row': row_number, 'errors': row_errors})
+                    continue
+
+                batch.append((row_number, product_data))
+                if len(batch) >= batch_size:
+                    imported += import_batch(batch)
+                    batch = []
+
+            if batch:
+                imported += import_batch(batch)
+
+            return jsonify({'imported': imported, 'failed': len(errors), 'errors': errors}), 200
+
+        # 이미 커밋된 묶음은 그대로 두고 읽은 곳까지의 결과를 같이 돌려줌
+        except (UnicodeDecodeError, csv.Error) as e:
+            session.rollback()
+            return jsonify({'message': 'invalid file {}'.format(e), 'imported': imported, 'errors': errors}), 400
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
@@ -4,6 +4,7 @@ from flask import request, jsonify, g, current_app
 from flask_request_validator import Param, Pattern, validate_params, JSON, MinLength, Enum, GET, PATH
 from functools import wraps
 from exceptions import NoAffectedRowException, NoDataException
+from rate_limiter import LoginRateLimiter
 
 
 # access_token decorator
@@ -30,9 +31,37 @@ def login_required(func):
     return decorated_function
 
 
+# login throttle decorator
+def login_throttle(limiter):
+    def decorator(func):
+        @wraps(func)
+        def decorated_function(*args, **kwargs):
+            # 데이터베이스 조회와 bcrypt 확인 전에 계정, IP 별 시도 횟수를 먼저 확인
+            body = request.get_json(silent=True) or {}
+            account = body.get('account') if isinstance(body, dict) else None
+
+            if not limiter.allow(account, request.remote_addr):
+                return jsonify({'message': 'too many login attempts'}), 429
+
+            # 로그인에 성공하면 계정 시도 횟수는 돌려줌 ( 실패한 시도만 계정 버킷에서 차감 )
+            response = current_app.make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                limiter.succeeded(account)
+
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
 def seller_endpoints(app, services, get_session):
     seller_service = services.seller_service
 
+    # 로그인 시도 제한, 제한 횟수는 app.extensions 에 등록해서 metrics 로 확인
+    login_limiter = LoginRateLimiter.from_config(app.config)
+    app.extensions['login_rate_limiter'] = login_limiter
+
     @app.route("/signup", methods=['POST'])
     @validate_params(
         Param('brand_crm_number', JSON, str, rules=[Pattern(r'^[0-9]{2,3}-[0-9]{3,4}-[0-9]{4}$')]),
@@ -103,6 +132,7 @@ def seller_endpoints(app, services, get_session):
                 session.close()
 
     @app.route("/login", methods=['POST'])
+    @login_throttle(login_limiter)
     @validate_params(
         Param('account', JSON, str),
         Param('password', JSON, str)
@@ -116,9 +146,10 @@ def seller_endpoints(app, services, get_session):
                 password : 비밀번호
 
         Returns:
-            200 : 로그인 성공 하면 access token 발행
+            200 : 로그인 성공 하면 access token, refresh token 발행
             400 : 계정이 존재하지 않을 때, 비밀번호가 틀렸을 때, soft delete 된 계정일 때,
                 셀러의 상태가 입점 대기 상태일 때
+            429 : 계정 또는 IP 의 로그인 시도 횟수를 초과했을 때
             500 : Exception
 
         """
@@ -147,11 +178,74 @@ def seller_endpoints(app, services, get_session):
             if token == 'not authorized':
                 return jsonify({'message': 'not authorized'}), 400
 
-            return jsonify({'access_token': token})
+            # 발행한 refresh token 저장
+            session.commit()
+            return jsonify(token)
 
         except KeyError:
             return jsonify({'message': 'key error'}), 400
 
+        except NoAffectedRowException as e:
+            session.rollback()
+            return jsonify({'message': 'no affected row error {}'.format(e.message)}), e.status_code
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
+    @app.route("/login/refresh", methods=['POST'])
+    @validate_params(
+        Param('refresh_token', JSON, str)
+    )
+    def refresh_log_in(refresh_token):
+        """ access token 재발행 API
+
+        로그인 때 받은 refresh token 으로 비밀번호 확인 없이 access token 재발행하기
+        사용된 refresh token 은 폐기되고 새로운 refresh token 이 함께 발행됨
+
+        Args:
+            refresh_token : refresh token
+
+        Returns:
+            200 : access token, refresh token 재발행
+            400 : 폐기되었거나 존재하지 않는 토큰일 때, soft delete 된 계정일 때,
+                셀러의 상태가 입점 대기 상태일 때
+            401 : 만료된 토큰일 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+            token = seller_service.refresh_login(refresh_token, session)
+
+            # 폐기되었거나 존재하지 않는 토큰일 때
+            if token == 'invalid token':
+                return jsonify({'message': 'invalid refresh token'}), 400
+
+            # 만료된 토큰일 때
+            if token == 'expired token':
+                return jsonify({'message': 'expired refresh token'}), 401
+
+            # 소프트 딜리트 된 계정일 때
+            if token == 'deleted account':
+                return jsonify({'message': 'account deleted'}), 400
+
+            # 셀러 상태가 입점 대기 일 때
+            if token == 'not authorized':
+                return jsonify({'message': 'not authorized'}), 400
+
+            session.commit()
+            return jsonify(token)
+
+        except NoAffectedRowException as e:
+            session.rollback()
+            return jsonify({'message': 'no affected row error {}'.format(e.message)}), e.status_code
+
         except Exception as e:
             session.rollback()
             return jsonify({'message': '{}'.format(e)}), 500
@@ -240,7 +334,7 @@ def seller_endpoints(app, services, get_session):
         Returns:
             200 : success, 셀러 데이터 업데이트 성공 시
             400 : 담당자 정보 안에 이름, 핸드폰 번호, 이메일 중 하나라도 없을 때,
-                담당자 이메일 형식 맞지 않을 때, 담당자 핸드폰 번호 형식 맞지 않을 때
+                담당자 이메일 형식 맞지 않을 때, 담당자 핸드폰 번호 형식 맞지 않을 때, 존재하지 않는 셀러 상태일 때
             500 : Exception
 
         """
@@ -282,7 +376,9 @@ def seller_endpoints(app, services, get_session):
                 if re.match(r'^010-[0-9]{3,4}-[0-9]{4}$', manager['phone_number']) is None:
                     return jsonify({'message': 'invalid phone number'}), 400
 
-            seller_service.post_my_page(seller, session)
+            if seller_service.post_my_page(seller, session) == 'invalid status':
+                session.rollback()
+                return jsonify({'message': 'invalid seller status'}), 400
 
             session.commit()
             return jsonify({'message': 'success'}), 200
@@ -396,6 +492,7 @@ def seller_endpoints(app, services, get_session):
 
         마스터가 버튼을 눌러 셀러의 상태를 변경함
         셀러의 상태가 변경될 때마다 슬랙 채널로 "(seller_id)번 셀러의 상태가 (status)로 변경되었습니다" 라는 메세지 전송
+        메세지는 outbox 에 저장되고 백그라운드 worker 가 전송하기 때문에 슬랙 전송을 기다리지 않음
 
         Args:
             seller_id: 셀러의 id
@@ -403,7 +500,7 @@ def seller_endpoints(app, services, get_session):
 
         Returns:
             200 : success, 셀러의 상태가 정상적으로 변경되었을 때
-            400 : 눌린 버튼과 셀러의 상태가 맞지 않을 때, 슬랙봇 메세지가 전송 실패되었을 때
+            400 : 눌린 버튼과 셀러의 상태가 맞지 않을 때
             500 : Exception
 
         """
@@ -417,10 +514,6 @@ def seller_endpoints(app, services, get_session):
             if status == 'invalid request':
                 return jsonify({'message': 'invalid request'}), 400
 
-            # 슬랙봇 메세지가 전송실패되었을 때
-            if status == 'message fail':
-                return jsonify({'message': 'message failed'}), 400
-
             session.commit()
             return jsonify({'message': 'success'}), 200
 
@@ -440,6 +533,68 @@ def seller_endpoints(app, services, get_session):
             if session:
                 session.close()
 
+    @app.route("/master/management-seller/status", methods=['PUT'])
+    @login_required
+    @validate_params(
+        Param('seller_id_list', JSON, list),
+        Param('button', JSON, int)
+    )
+    def put_management_seller_bulk(seller_id_list, button):
+        """ 마스터 셀러계정관리 여러 셀러 상태 변경 API
+
+        마스터가 여러 셀러를 선택하고 버튼을 눌러 셀러들의 상태를 한 번에 변경함
+        변경 규칙에 맞지 않는 셀러는 변경하지 않고 셀러별 결과에 표시함
+
+        Args:
+            seller_id_list : 셀러 id 리스트
+            button         : 셀러의 상태 변경 버튼 ( 입점으로 변경, 휴점으로 변경 등 )
+
+        Returns:
+            200 : results ( type : dict ), 셀러별 상태 변경 결과
+            400 : 마스터 계정이 아닐 때, 존재하지 않는 버튼일 때, 셀러 id 리스트가 비었거나 너무 많을 때
+            500 : Exception
+
+        """
+        session = None
+        try:
+            session = get_session()
+
+            # 셀러 id 리스트는 1개 이상, 설정된 최대 개수 이하
+            if not seller_id_list or len(seller_id_list) > app.config.get('BULK_SELLER_STATUS_LIMIT', 1000):
+                return jsonify({'message': 'invalid seller id list'}), 400
+
+            if any(not isinstance(seller_id, int) for seller_id in seller_id_list):
+                return jsonify({'message': 'invalid seller id list'}), 400
+
+            results = seller_service.post_seller_status_bulk(seller_id_list, button, g.seller_id, session)
+
+            # 마스터 계정이 아닐 때 에러 발생
+            if results == 'not authorized':
+                return jsonify({'message': 'no master'}), 400
+
+            # 존재하지 않는 버튼일 때 에러 발생
+            if results == 'invalid button':
+                return jsonify({'message': 'invalid button'}), 400
+
+            session.commit()
+            return jsonify(results), 200
+
+        except NoAffectedRowException as e:
+            session.rollback()
+            return jsonify({'message': 'no affected row error {}'.format(e.message)}), e.status_code
+
+        except NoDataException as e:
+            session.rollback()
+            return jsonify({'message': 'no data {}'.format(e.message)}), e.status_code
+
+        except Exception as e:
+            session.rollback()
+            return jsonify({'message': '{}'.format(e)}), 500
+
+        finally:
+            if session:
+                session.close()
+
     @app.route("/home", methods=['GET'])
     @login_required
     def get_home_seller():
@@ -563,7 +718,7 @@ def seller_endpoints(app, services, get_session):
         Returns:
             200 : success, 데이터 수정하기 성공했을 때
             400 : 담당자 정보에 이름, 핸드폰 번호, 이메일 중 하나라도 없을 때 ,
-                  이메일 형식이 맞지 않을 때, 핸드폰번호 형식이 맞지 않을 때
+                  이메일 형식이 맞지 않을 때, 핸드폰번호 형식이 맞지 않을 때, 존재하지 않는 셀러 상태일 때
             500 : Exception
 
         """
@@ -607,7 +762,9 @@ def seller_endpoints(app, services, get_session):
                 if re.match(r'^010-[0-9]{3,4}-[0-9]{4}$', manager['phone_number']) is None:
                     return jsonify({'message': 'invalid phone number'}), 400
 
-            seller_service.put_master_seller_page(seller, session)
+            if seller_service.put_master_seller_page(seller, session) == 'invalid status':
+                session.rollback()
+                return jsonify({'message': 'invalid seller status'}), 400
 
             session.commit()
             return jsonify({'message': 'success'}), 200
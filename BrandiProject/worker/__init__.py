@@ -0,0 +1,9 @@
+from .status_notifier import StatusNotifier
+from .discount_scheduler import DiscountScheduler
+from .idempotency_sweeper import IdempotencySweeper
+
+__all__ = [
+    'StatusNotifier',
+    'DiscountScheduler',
+    'IdempotencySweeper'
+]
@@ -0,0 +1,83 @@
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from .interval_worker import IntervalWorker
+
+logger = logging.getLogger(__name__)
+
+
+class DiscountScheduler(IntervalWorker):
+    """
+    할인 기간이 시작되거나 끝난 상품의 is_discount, discount_price 를 수정하고 선분이력을 남기는 백그라운드 작업
+
+    batch_size 개씩 한 트랜잭션으로 처리하고, dry_run 이면 대상 상품만 로그로 남김
+    실행 시간과 처리 개수는 stats 에 저장해서 metrics 로 확인
+
+    모든 앱 프로세스에서 실행되기 때문에 worker_leases 의 실행 권한을 가진 프로세스만 처리함
+    실행 권한은 처리하는 트랜잭션에서 lease_seconds 동안 가져오고 실행할 때마다 연장해서,
+    권한을 가진 프로세스가 멈추면 lease_seconds 가 지난 뒤 다른 프로세스가 이어서 처리
+    """
+    name = 'discount-scheduler'
+
+    def __init__(self, product_service, worker_lease_dao, session_factory, config):
+        super().__init__(config.get('DISCOUNT_SCHEDULER_INTERVAL', 60), config.get('DISCOUNT_SCHEDULER_BATCH_SIZE', 500))
+        self.product_service = product_service
+        self.worker_lease_dao = worker_lease_dao
+        self.session_factory = session_factory
+        self.dry_run = config.get('DISCOUNT_SCHEDULER_DRY_RUN', False)
+        self.lease_seconds = config.get('DISCOUNT_SCHEDULER_LEASE', 300)
+        self.owner = uuid.uuid4().hex
+        self.stats = {'runs': 0, 'skipped': 0, 'activated': 0, 'expired': 0, 'last_run_ms': 0.0, 'total_run_ms': 0.0}
+
+    def run_once(self, dry_run=None):
+        """ 할인 기간이 바뀐 상품 한 묶음 처리하기
+
+        Args:
+            dry_run : 설정값 대신 사용할 dry run 여부
+
+        Returns:
+            처리한 상품 개수 ( dry run 이거나 다른 프로세스가 실행 권한을 가지고 있으면 0 )
+
+        """
+        dry_run = self.dry_run if dry_run is None else dry_run
+        started = time.perf_counter()
+        session = None
+        try:
+            session = self.session_factory()
+            now = datetime.now()
+
+            if not self.worker_lease_dao.acquire_lease(self.name, self.owner, now,
+                                                       now + timedelta(seconds=self.lease_seconds), session):
+                session.rollback()
+                self.stats['skipped'] += 1
+                return 0
+
+            result = self.product_service.sync_discount_windows(now, self.batch_size, dry_run, session)
+
+            if dry_run:
+                session.rollback()
+                logger.info('discount scheduler dry run - activate %s, expire %s',
+                            result['activated'], result['expired'])
+                return 0
+
+            session.commit()
+
+        except Exception:
+            if session:
+                session.rollback()
+            raise
+
+        finally:
+            if session:
+                session.close()
+
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stats['runs'] += 1
+            self.stats['last_run_ms'] = elapsed
+            self.stats['total_run_ms'] += elapsed
+
+        self.stats['activated'] += len(result['activated'])
+        self.stats['expired'] += len(result['expired'])
+
+        return result['count']
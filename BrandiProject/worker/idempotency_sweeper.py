@@ -0,0 +1,41 @@
+from datetime import datetime
+from .interval_worker import IntervalWorker
+
+
+class IdempotencySweeper(IntervalWorker):
+    """
+    만료된 Idempotency-Key 를 batch_size 개씩 나눠서 삭제하는 백그라운드 작업
+    한 번에 많이 지우면서 테이블을 오래 잠그지 않도록 묶음마다 커밋
+    """
+    name = 'idempotency-sweeper'
+
+    def __init__(self, idempotency_service, session_factory, config):
+        super().__init__(config.get('IDEMPOTENCY_SWEEP_INTERVAL', 300), config.get('IDEMPOTENCY_SWEEP_BATCH_SIZE', 1000))
+        self.idempotency_service = idempotency_service
+        self.session_factory = session_factory
+        self.stats = {'deleted': 0}
+
+    def run_once(self):
+        """ 만료된 키 한 묶음 삭제하기
+
+        Returns:
+            삭제한 키 개수
+
+        """
+        session = None
+        try:
+            session = self.session_factory()
+            deleted = self.idempotency_service.delete_expired_keys(datetime.now(), self.batch_size, session)
+            session.commit()
+
+        except Exception:
+            if session:
+                session.rollback()
+            raise
+
+        finally:
+            if session:
+                session.close()
+
+        self.stats['deleted'] += deleted
+        return deleted
@@ -0,0 +1,38 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalWorker:
+    """
+    interval 초마다 run_once 를 실행하는 백그라운드 쓰레드
+    run_once 가 batch_size 만큼 처리했으면 남은 작업이 있다고 보고 기다리지 않고 다시 실행
+    """
+    name = 'interval-worker'
+
+    def __init__(self, interval, batch_size):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                while self.run_once() >= self.batch_size and not self.stop_event.is_set():
+                    pass
+            except Exception:
+                logger.exception('%s failed', self.name)
+
+    def run_once(self):
+        """ 작업을 한 묶음 처리하고 처리한 개수를 반환 """
+        raise NotImplementedError
@@ -0,0 +1,104 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from slack import WebClient
+from config import slack_channel
+from .interval_worker import IntervalWorker
+
+logger = logging.getLogger(__name__)
+
+# 슬랙 메세지에 쓰이는 셀러 상태 이름
+STATUS_NAMES = {
+    1: '입점대기로',
+    2: '입점으로',
+    3: '휴점으로',
+    4: '퇴점대기로',
+    5: '퇴점으로',
+    6: '입점거절로'
+}
+
+
+class StatusNotifier(IntervalWorker):
+    """
+    seller_status_events ( outbox ) 에 쌓인 셀러 상태 변경 알림을 백그라운드 쓰레드에서 슬랙으로 전송
+
+    상태 변경 요청은 outbox 에 insert 만 하고 바로 응답하기 때문에 슬랙이 느려도 요청이나 row lock 을 잡고 있지 않음
+    여러 알림을 한 메세지로 묶어서 보내고, 실패하면 재시도 횟수에 따라 점점 늦게 다시 보냄 ( exponential backoff )
+    """
+    name = 'status-notifier'
+
+    def __init__(self, seller_dao, session_factory, config):
+        super().__init__(config.get('STATUS_NOTIFIER_INTERVAL', 5), config.get('STATUS_NOTIFIER_BATCH_SIZE', 50))
+        self.seller_dao = seller_dao
+        self.session_factory = session_factory
+        self.lease_seconds = config.get('STATUS_NOTIFIER_LEASE', 60)
+        self.base_backoff = config.get('STATUS_NOTIFIER_BASE_BACKOFF', 5)
+        self.max_backoff = config.get('STATUS_NOTIFIER_MAX_BACKOFF', 3600)
+
+        # 테스트에서는 SLACK_API_URL 을 로컬 stand-in 서버 ( tools/slack_stub.py ) 로 지정
+        self.client = WebClient(token=config.get('SLACK_API_TOKEN'),
+                                base_url=config.get('SLACK_API_URL', WebClient.BASE_URL))
+        self.stats = {'sent': 0, 'failed': 0, 'batches': 0}
+
+    def run_once(self):
+        """ 전송할 알림을 한 묶음 가져와서 슬랙으로 보내기
+
+        Returns:
+            처리한 알림의 개수
+
+        """
+        session = None
+        try:
+            session = self.session_factory()
+            now = datetime.now()
+            events = self.seller_dao.claim_status_events(uuid.uuid4().hex, now,
+                                                         now + timedelta(seconds=self.lease_seconds),
+                                                         self.batch_size, session)
+            # 선점한 상태를 먼저 커밋해서 슬랙 전송 중에는 트랜잭션을 잡고 있지 않음
+            session.commit()
+
+            if not events:
+                return 0
+
+            event_ids = [event['id'] for event in events]
+            try:
+                self.client.chat_postMessage(
+                    channel=slack_channel['CHANNEL'],
+                    text='\n'.join(self.message(event) for event in events)
+                )
+            except Exception:
+                logger.exception('slack message failed')
+                self.stats['failed'] += len(events)
+
+                # 재시도 횟수가 같은 알림끼리 묶어서 다음 전송 시간 수정
+                retry_groups = {}
+                for event in events:
+                    retry_groups.setdefault(event['attempts'], []).append(event['id'])
+
+                for attempts, ids in retry_groups.items():
+                    backoff = min(self.base_backoff * 2 ** attempts, self.max_backoff)
+                    self.seller_dao.retry_status_events(ids, datetime.now() + timedelta(seconds=backoff), session)
+
+                session.commit()
+                return len(events)
+
+            self.seller_dao.mark_status_events_sent(event_ids, datetime.now(), session)
+            session.commit()
+            self.stats['sent'] += len(events)
+            self.stats['batches'] += 1
+
+            return len(events)
+
+        except Exception:
+            if session:
+                session.rollback()
+            raise
+
+        finally:
+            if session:
+                session.close()
+
+    @staticmethod
+    def message(event):
+        return 'id {}번 셀러의 상태가 {} 변경되었습니다.'.format(
+            event['seller_id'], STATUS_NAMES.get(event['seller_status_id'], event['seller_status_id']))